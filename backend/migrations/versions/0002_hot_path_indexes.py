@@ -0,0 +1,68 @@
+"""Indexes for the hot query paths
+
+Every listing is keyset paginated on (created_at, id), so each index leads
+with the filter columns and ends with the sort key: the page is read in order
+straight from the index, no sort and no sequential scan. The single column
+indexes on the primary keys duplicated the pkey indexes and are dropped.
+
+Indexes are built CONCURRENTLY so upgrading a live database does not block
+writes to the tables.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ("ix_users_created_at", "users", ["created_at", "id"], None),
+    ("ix_projects_created_at", "projects", ["created_at", "id"], None),
+    # ProjectRepository.get_by_user_id, TaskRepository.filter_criteria(visible_to=)
+    ("ix_projects_user_id_created_at", "projects", ["user_id", "created_at", "id"], None),
+    ("ix_tasks_created_at", "tasks", ["created_at", "id"], None),
+    # TaskRepository.get_by_project_id, also FK lookups when deleting a project
+    ("ix_tasks_project_id_created_at", "tasks", ["project_id", "created_at", "id"], None),
+    # GET /api/tasks?project_id=&completed=
+    ("ix_tasks_project_id_completed", "tasks", ["project_id", "completed", "created_at", "id"], None),
+    # TaskRepository.get_by_user_id
+    ("ix_tasks_user_id_created_at", "tasks", ["user_id", "created_at", "id"], None),
+    # TaskRepository.get_subtasks and the children step of the tree CTEs
+    ("ix_tasks_parent_task_id_created_at", "tasks", ["parent_task_id", "created_at", "id"], None),
+    # TaskRepository.get_project_tree roots
+    ("ix_tasks_project_id_roots", "tasks", ["project_id"], "parent_task_id IS NULL"),
+    # GET /api/tasks?user_id=&completed=false
+    ("ix_tasks_user_id_pending", "tasks", ["user_id", "created_at", "id"], "NOT completed"),
+]
+
+REDUNDANT_INDEXES = [("ix_users_id", "users"), ("ix_projects_id", "projects"), ("ix_tasks_id", "tasks")]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in REDUNDANT_INDEXES:
+            op.create_index(name, table, ["id"], postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
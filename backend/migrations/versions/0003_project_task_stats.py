@@ -0,0 +1,107 @@
+"""Per-project task counters
+
+project_task_stats holds, per project, how many tasks it has, how many are
+completed and how many are subtasks. The counters are maintained by
+statement-level triggers on tasks: each INSERT, UPDATE or DELETE statement
+adds its per-project deltas (from the transition tables) in one upsert, so
+single creations, bulk inserts and COPY, subtree operations and moves between
+projects are all covered, whichever code path issued them. Statements that
+change none of the counted columns write nothing.
+
+Rows are upserted in project_id order, the order the reconciliation job
+(ProjectStatsRepository.reconcile) locks them in, so the two cannot deadlock.
+A project without a row has no tasks. The table is backfilled from the
+existing tasks; creating the triggers locks tasks against writes until this
+migration commits, so no write is missed in between.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Per-project deltas of a set of task rows, ``sign`` 1 for new rows and -1 for old ones
+_DELTAS = """
+    SELECT project_id, {sign} AS total, {sign} * completed::int AS completed,
+           {sign} * (parent_task_id IS NOT NULL)::int AS subtasks
+    FROM {table}
+"""
+
+_APPLY = """
+        INSERT INTO project_task_stats AS stats (project_id, total, completed, subtasks)
+        SELECT project_id, sum(total), sum(completed), sum(subtasks)
+        FROM ({rows}) AS delta
+        GROUP BY project_id
+        HAVING sum(total) <> 0 OR sum(completed) <> 0 OR sum(subtasks) <> 0
+        ORDER BY project_id
+        ON CONFLICT (project_id) DO UPDATE SET
+            total = stats.total + excluded.total,
+            completed = stats.completed + excluded.completed,
+            subtasks = stats.subtasks + excluded.subtasks;
+"""
+
+NEW_ROWS = _DELTAS.format(sign=1, table="new_rows")
+OLD_ROWS = _DELTAS.format(sign=-1, table="old_rows")
+
+APPLY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION project_task_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {_APPLY.format(rows=NEW_ROWS)}
+    ELSIF TG_OP = 'UPDATE' THEN
+        {_APPLY.format(rows=NEW_ROWS + " UNION ALL " + OLD_ROWS)}
+    ELSE
+        {_APPLY.format(rows=OLD_ROWS)}
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+# (trigger name, event, transition tables)
+TRIGGERS = [
+    ("tasks_stats_insert", "INSERT", "NEW TABLE AS new_rows"),
+    ("tasks_stats_update", "UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    ("tasks_stats_delete", "DELETE", "OLD TABLE AS old_rows"),
+]
+
+BACKFILL = """
+INSERT INTO project_task_stats (project_id, total, completed, subtasks)
+SELECT project_id, count(*), count(*) FILTER (WHERE completed), count(*) FILTER (WHERE parent_task_id IS NOT NULL)
+FROM tasks
+GROUP BY project_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "project_task_stats",
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("subtasks", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(APPLY_FUNCTION)
+    for name, event, referencing in TRIGGERS:
+        op.execute(
+            f"CREATE TRIGGER {name} AFTER {event} ON tasks REFERENCING {referencing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION project_task_stats_apply()"
+        )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    for name, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS project_task_stats_apply()")
+    op.drop_table("project_task_stats")
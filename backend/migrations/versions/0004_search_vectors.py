@@ -0,0 +1,57 @@
+"""Full-text search vectors for tasks and projects
+
+Stored generated tsvector columns, so Postgres keeps them in sync with the
+text on every write (COPY included) and ranking reads them instead of
+re-parsing the text. Project names weigh more than their descriptions. GIN
+indexes serve the @@ matches of GET /api/search.
+
+Adding a stored generated column rewrites the table under an exclusive lock;
+on a large live database run this migration in a maintenance window. The
+indexes are then built CONCURRENTLY, like in 0002.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match the Computed() expressions of the models and SEARCH_CONFIG in repos.search_repository
+TASK_VECTOR = "to_tsvector('spanish', detalle)"
+PROJECT_VECTOR = (
+    "setweight(to_tsvector('spanish', nombre), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(description, '')), 'B')"
+)
+
+# (name, table)
+INDEXES = [("ix_tasks_search_vector", "tasks"), ("ix_projects_search_vector", "projects")]
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(TASK_VECTOR, persisted=True)))
+    op.add_column("projects", sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(PROJECT_VECTOR, persisted=True)))
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, ["search_vector"],
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_column("projects", "search_vector")
+    op.drop_column("tasks", "search_vector")
@@ -0,0 +1,96 @@
+"""
+Time to list every task of a project through the API, domain models vs FAST_JSON.
+
+Seeds one project with N tasks, then pages through /api/tasks/project/{id}
+with the largest page size, once with the regular path (ORM objects, domain
+and response models, response_model validation) and once with the raw rows
+encoded by orjson. Both listings must return the same JSON. Uses the router
+of the current API_MODE:
+
+    cd backend && python scripts/bench_list_serialization.py [tasks] [repeats]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from api import pagination  # noqa: E402
+from config.database import SessionLocal, init_db  # noqa: E402
+from config.jwt import create_access_token  # noqa: E402
+from main import API_MODE, app  # noqa: E402
+from models.task import TaskBulkItem  # noqa: E402
+from repos.project_repository import ProjectRepository  # noqa: E402
+from repos.task_repository import TaskRepository  # noqa: E402
+from repos.user_repository import UserRepository  # noqa: E402
+
+
+def list_all(client: TestClient, url: str, headers: dict) -> List[dict]:
+    items: List[dict] = []
+    params = {"limit": pagination.MAX_LIMIT}
+    while True:
+        response = client.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        items.extend(response.json())
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return items
+        params["after"] = cursor
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    init_db()
+
+    db = SessionLocal()
+    # Inserted directly: UserRepository.create would pay for a password hash
+    user = UserRepository._UserDB(nombre=f"bench-{uuid.uuid4().hex[:12]}", password_hash="-")
+    db.add(user)
+    db.flush()
+    project = ProjectRepository._ProjectDB(nombre="bench", user_id=user.id)
+    db.add(project)
+    db.commit()
+    user_id, project_id = user.id, project.id
+    TaskRepository(db).create_many(
+        [TaskBulkItem(detalle=f"tarea {i}", project_id=project_id, user_id=user_id) for i in range(count)]
+    )
+
+    url = f"/api/tasks/project/{project_id}"
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    try:
+        with TestClient(app) as client:
+            results = {}
+            for fast_json in (False, True):
+                pagination.FAST_JSON = fast_json
+                list_all(client, url, headers)  # warm-up
+                timings = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    items = list_all(client, url, headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[fast_json] = (statistics.median(timings), items)
+
+        models_ms, models_items = results[False]
+        fast_ms, fast_items = results[True]
+        assert len(fast_items) == count and fast_items == models_items, "FAST_JSON changed the response"
+        print(f"API_MODE={API_MODE}, {count} tasks in pages of {pagination.MAX_LIMIT}, median of {repeats}")
+        print(f"  models:    {models_ms:9.1f} ms  {count / models_ms * 1000:10.0f} tasks/s")
+        print(f"  FAST_JSON: {fast_ms:9.1f} ms  {count / fast_ms * 1000:10.0f} tasks/s  ({models_ms / fast_ms:.1f}x)")
+    finally:
+        db.rollback()
+        db.execute(delete(TaskRepository._TaskDB).where(TaskRepository._TaskDB.project_id == project_id))
+        db.execute(delete(ProjectRepository._ProjectDB).where(ProjectRepository._ProjectDB.id == project_id))
+        db.execute(delete(UserRepository._UserDB).where(UserRepository._UserDB.id == user_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Password verifications per second on the hashing process pool, by pool size.
+
+Uses the configured KDF and cost (PASSWORD_KDF, PASSWORD_BCRYPT_ROUNDS, ...),
+so it also helps picking a cost the hardware can sustain at peak logins:
+
+    cd backend && python scripts/bench_password_hashing.py [verifications]
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import passwords  # noqa: E402
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    stored = passwords._hash("correct horse battery staple")
+    cpus = os.cpu_count() or 1
+    print(f"{passwords.PASSWORD_KDF}, {count} verifications, {cpus} CPUs")
+
+    for workers in sorted({1, 2, max(cpus // 2, 1), cpus}):
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            list(pool.map(passwords._hash, ["warm-up"] * workers))
+            start = time.perf_counter()
+            results = list(pool.map(passwords._verify, ["correct horse battery staple"] * count, [stored] * count))
+            elapsed = time.perf_counter() - start
+        assert all(valid for valid, _ in results)
+        print(f"{workers:3} workers: {count / elapsed:8.1f} verifications/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Latency of the repository mutations, load-mutate-refresh vs UPDATE/DELETE ... RETURNING.
+
+The "orm" column replays how update/mark_completed/delete used to work (SELECT
+the row, change the ORM object, commit, refresh), "returning" calls the
+current TaskRepository methods. Statements are counted per operation, COMMIT
+included; the gap per operation grows with the round trip time to the
+database, so run it against a realistic DATABASE_URL:
+
+    cd backend && python scripts/bench_repository_mutations.py [operations]
+"""
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import delete, event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from config.database import SessionLocal, engine, init_db  # noqa: E402
+from models.task import TaskCreate  # noqa: E402
+from repos.project_repository import ProjectRepository  # noqa: E402
+from repos.task_repository import TaskRepository  # noqa: E402
+from repos.user_repository import UserRepository  # noqa: E402
+
+TaskDB = TaskRepository._TaskDB
+
+
+def orm_update(db: Session, task_id: int, task_data: TaskCreate) -> None:
+    db_obj = db.query(TaskDB).filter(TaskDB.id == task_id).first()
+    db_obj.detalle = task_data.detalle
+    db.commit()
+    db.refresh(db_obj)
+
+
+def orm_mark_completed(db: Session, task_id: int) -> None:
+    db_obj = db.query(TaskDB).filter(TaskDB.id == task_id).first()
+    db_obj.completed = True
+    db.commit()
+    db.refresh(db_obj)
+
+
+def orm_delete(db: Session, task_id: int) -> None:
+    db_obj = db.query(TaskDB).filter(TaskDB.id == task_id).first()
+    db.delete(db_obj)
+    db.commit()
+
+
+def measure(operation: Callable[[int], None], task_ids: List[int], statements: List[str]) -> Dict[str, float]:
+    latencies = []
+    statements.clear()
+    for task_id in task_ids:
+        start = time.perf_counter()
+        operation(task_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "median": statistics.median(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1],
+        "statements": len(statements) / len(task_ids),
+    }
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    init_db()
+    statements: List[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    # psycopg2 sends BEGIN along with the first statement, COMMIT on its own
+    event.listen(engine, "commit", lambda conn: statements.append("COMMIT"))
+
+    db = SessionLocal()
+    # Inserted directly: UserRepository.create would pay for a password hash
+    user = UserRepository._UserDB(nombre=f"bench-{uuid.uuid4().hex[:12]}", password_hash="-")
+    db.add(user)
+    db.flush()
+    project = ProjectRepository._ProjectDB(nombre="bench", user_id=user.id)
+    db.add(project)
+    db.commit()
+    user_id, project_id = user.id, project.id
+
+    tasks = TaskRepository(db)
+    task_data = TaskCreate(detalle="renamed", project_id=project_id, user_id=user_id)
+
+    def new_tasks() -> List[int]:
+        db_objs = [TaskDB(detalle="bench", project_id=project_id, user_id=user_id) for _ in range(count)]
+        db.add_all(db_objs)
+        db.commit()
+        return [db_obj.id for db_obj in db_objs]
+
+    try:
+        print(f"{count} operations per row, latency in ms")
+        print(f"{'':16}{'orm median':>12}{'p95':>8}{'stmts':>7}{'returning median':>18}{'p95':>8}{'stmts':>7}")
+        benchmarks = [
+            ("update", lambda i: orm_update(db, i, task_data), lambda i: tasks.update(i, task_data)),
+            ("mark_completed", lambda i: orm_mark_completed(db, i), tasks.mark_completed),
+            ("delete", lambda i: orm_delete(db, i), tasks.delete),
+        ]
+        for name, orm_operation, repo_operation in benchmarks:
+            orm = measure(orm_operation, new_tasks(), statements)
+            returning = measure(repo_operation, new_tasks(), statements)
+            print(
+                f"{name:16}{orm['median']:12.3f}{orm['p95']:8.3f}{orm['statements']:7.1f}"
+                f"{returning['median']:18.3f}{returning['p95']:8.3f}{returning['statements']:7.1f}"
+            )
+    finally:
+        db.rollback()
+        db.execute(delete(TaskDB).where(TaskDB.project_id == project_id))
+        db.execute(delete(ProjectRepository._ProjectDB).where(ProjectRepository._ProjectDB.id == project_id))
+        db.execute(delete(UserRepository._UserDB).where(UserRepository._UserDB.id == user_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
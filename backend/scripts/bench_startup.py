@@ -0,0 +1,95 @@
+"""
+Import and boot time of the API, to keep an eye on how fast a new replica serves.
+
+Import time is `import main` in a fresh interpreter. Boot time starts uvicorn
+and measures from spawn until GET /health (liveness) and GET /ready
+(database migrated or checked, pools warm) first answer 200, for the old
+sequence (STARTUP_BACKGROUND=false, DB_MIGRATE_ON_STARTUP=always) and the
+default one. Needs the database and Redis of the environment (DATABASE_URL,
+REDIS_URL) and uses the current API_MODE:
+
+    cd backend && python scripts/bench_startup.py [repeats]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional, Tuple
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# (label, environment overrides)
+CONFIGURATIONS = [
+    ("blocking, always migrate", {"STARTUP_BACKGROUND": "false", "DB_MIGRATE_ON_STARTUP": "always"}),
+    ("blocking, auto", {"STARTUP_BACKGROUND": "false", "DB_MIGRATE_ON_STARTUP": "auto"}),
+    ("background, auto", {"STARTUP_BACKGROUND": "true", "DB_MIGRATE_ON_STARTUP": "auto"}),
+]
+BOOT_TIMEOUT = 60  # seconds
+
+
+def import_time() -> float:
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=SRC, env=_env({}), capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def boot_time(overrides: Dict[str, str]) -> Tuple[float, float]:
+    """Seconds from spawn to the first 200 of /health and of /ready"""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SRC, env=_env(overrides), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    live: Optional[float] = None
+    try:
+        while time.perf_counter() - start < BOOT_TIMEOUT:
+            if live is None and _ok(f"http://127.0.0.1:{port}/health"):
+                live = time.perf_counter() - start
+            if live is not None and _ok(f"http://127.0.0.1:{port}/ready"):
+                return live, time.perf_counter() - start
+            time.sleep(0.005)
+        raise TimeoutError(f"not ready after {BOOT_TIMEOUT}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _ok(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(overrides: Dict[str, str]) -> Dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=SRC, RATE_LIMIT_ENABLED="false")
+    env.update(overrides)
+    return env
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"API_MODE={os.getenv('API_MODE', 'sync')}, median of {repeats}")
+    imports = [import_time() for _ in range(repeats)]
+    print(f"  import main:              {statistics.median(imports) * 1000:7.0f} ms")
+    for label, overrides in CONFIGURATIONS:
+        timings = [boot_time(overrides) for _ in range(repeats)]
+        live = statistics.median(t[0] for t in timings)
+        ready = statistics.median(t[1] for t in timings)
+        print(f"  {label:25} live {live * 1000:7.0f} ms   ready {ready * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Fail if any repository query is planned as a sequential scan.
+
+Seeds a realistic amount of users, projects and tasks inside a transaction,
+ANALYZEs, runs EXPLAIN on every listing / lookup the repositories issue and
+rolls everything back. Runs as part of the test suite (tests/test_query_plans.py,
+whenever DATABASE_URL points at a disposable database) and standalone, with a
+report of every plan:
+
+    cd backend && DATABASE_URL=... python scripts/check_query_plans.py
+
+Exits with status 1 listing the offending queries.
+"""
+import os
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import Select, select, text  # noqa: E402
+from sqlalchemy.engine import Connection  # noqa: E402
+
+from config.database import engine, run_migrations  # noqa: E402
+from models.pagination import PageRequest  # noqa: E402
+from repos.pagination import keyset_query  # noqa: E402
+from repos.project_repository import ProjectRepository  # noqa: E402
+from repos.project_stats_repository import ProjectStatsRepository  # noqa: E402
+from repos.search_repository import SearchRepository  # noqa: E402
+from repos.task_repository import TaskRepository  # noqa: E402
+from repos.user_repository import UserRepository  # noqa: E402
+
+USERS = int(os.getenv("SEED_USERS", "2000"))
+PROJECTS_PER_USER = 10
+ROOT_TASKS_PER_PROJECT = 5
+SUBTASKS_PER_PROJECT = 5
+
+CHECKED_TABLES = {"users", "projects", "tasks", "project_task_stats"}
+
+
+def seed(conn: Connection) -> Dict[str, int]:
+    """Insert the dataset, returns ids to use as query parameters"""
+    projects = USERS * PROJECTS_PER_USER
+    roots = projects * ROOT_TASKS_PER_PROJECT
+    subtasks = projects * SUBTASKS_PER_PROJECT
+
+    first_user = conn.execute(text("""
+        WITH created AS (
+            INSERT INTO users (nombre, password_hash, created_at)
+            SELECT 'plan_check_' || g, 'x', now() - g * interval '1 minute'
+            FROM generate_series(1, :n) g
+            RETURNING id
+        ) SELECT min(id) FROM created
+    """), {"n": USERS}).scalar_one()
+    first_project = conn.execute(text("""
+        WITH created AS (
+            INSERT INTO projects (nombre, user_id, created_at)
+            SELECT 'project ' || g, :first_user + g % :users, now() - g * interval '1 second'
+            FROM generate_series(1, :n) g
+            RETURNING id
+        ) SELECT min(id) FROM created
+    """), {"n": projects, "first_user": first_user, "users": USERS}).scalar_one()
+    # A third of the tasks are assigned, a quarter completed
+    first_root = conn.execute(text("""
+        WITH created AS (
+            INSERT INTO tasks (detalle, project_id, user_id, completed, created_at)
+            SELECT 'task ' || g, :first_project + g % :projects,
+                   CASE WHEN g % 3 = 0 THEN :first_user + g % :users END,
+                   g % 4 = 0, now() - g * interval '1 second'
+            FROM generate_series(1, :n) g
+            RETURNING id
+        ) SELECT min(id) FROM created
+    """), {"n": roots, "first_project": first_project, "projects": projects,
+           "first_user": first_user, "users": USERS}).scalar_one()
+    conn.execute(text("""
+        INSERT INTO tasks (detalle, project_id, user_id, parent_task_id, completed, created_at)
+        SELECT 'subtask ' || g, :first_project + (g % :roots + 1) % :projects,
+               CASE WHEN g % 3 = 0 THEN :first_user + g % :users END,
+               :first_root + g % :roots, g % 4 = 0, now() - g * interval '1 second'
+        FROM generate_series(1, :n) g
+    """), {"n": subtasks, "roots": roots, "first_root": first_root, "first_project": first_project,
+           "projects": projects, "first_user": first_user, "users": USERS})
+
+    for table in CHECKED_TABLES:
+        conn.execute(text(f"ANALYZE {table}"))
+
+    task_id = first_root + roots // 2
+    project_id = first_project + projects // 2
+    return {
+        "user_id": first_user + USERS // 2,
+        "project_id": project_id,
+        "task_id": task_id,
+        # Cursors in the middle of the data, as the second page of a listing would be
+        "project_cursor": conn.execute(text("SELECT created_at, id FROM projects WHERE id = :id"), {"id": project_id}).one(),
+        "task_cursor": conn.execute(text("SELECT created_at, id FROM tasks WHERE id = :id"), {"id": task_id}).one(),
+    }
+
+
+def queries(ids: Dict[str, Any]) -> Iterator[Tuple[str, Select]]:
+    """Every query shape the repositories run, with representative parameters"""
+    user, project, task = UserRepository._UserDB, ProjectRepository._ProjectDB, TaskRepository._TaskDB
+    first_page = PageRequest(limit=100)
+    next_project_page = PageRequest(limit=100, after=tuple(ids["project_cursor"]))
+    next_page = PageRequest(limit=100, after=tuple(ids["task_cursor"]))
+
+    yield "users.get_by_nombre", select(user).where(user.nombre == "plan_check_1")
+    yield "users.get_page", keyset_query(user, first_page)
+    yield "projects.get_page", keyset_query(project, first_page)
+    yield "projects.get_by_user_id", keyset_query(project, first_page, project.user_id == ids["user_id"])
+    yield "projects.get_by_user_id (next page)", keyset_query(project, next_project_page, project.user_id == ids["user_id"])
+
+    task_listings = {
+        "tasks.get_page": {},
+        "tasks.get_page(visible_to)": {"visible_to": ids["user_id"]},
+        "tasks.get_by_project_id": {"project_id": ids["project_id"]},
+        "tasks.get_page(project_id, completed)": {"project_id": ids["project_id"], "completed": False},
+        "tasks.get_by_user_id": {"user_id": ids["user_id"]},
+        "tasks.get_page(user_id, pending)": {"user_id": ids["user_id"], "completed": False},
+        "tasks.get_subtasks": {"parent_task_id": ids["task_id"]},
+    }
+    for name, filters in task_listings.items():
+        criteria = TaskRepository.filter_criteria(**filters)
+        yield name, keyset_query(task, first_page, *criteria)
+        yield f"{name} (next page)", keyset_query(task, next_page, *criteria)
+
+    # ?ids= lookups the size of a board's assignees and parent tasks
+    yield "users.get_by_ids", UserRepository.by_ids_query(list(range(ids["user_id"], ids["user_id"] + 10)))
+    yield "projects.get_by_ids", ProjectRepository.by_ids_query(
+        list(range(ids["project_id"], ids["project_id"] + 20)), ids["user_id"]
+    )
+    yield "tasks.get_by_ids(visible_to)", TaskRepository.by_ids_query(
+        list(range(ids["task_id"], ids["task_id"] + 100)), visible_to=ids["user_id"]
+    )
+    yield "tasks.get_tree", TaskRepository.tree_query(task.id == ids["task_id"])
+    yield "tasks.get_tree(max_depth)", TaskRepository.tree_query(task.id == ids["task_id"], 1)
+    yield "tasks.get_project_tree", TaskRepository.tree_query(
+        (task.project_id == ids["project_id"]) & task.parent_task_id.is_(None)
+    )
+    yield "tasks.subtree_ids", TaskRepository.subtree_ids(ids["task_id"])
+    yield "project_stats.get_by_user_id", ProjectStatsRepository.user_stats_query(ids["user_id"])
+    yield "project_stats.reconcile", ProjectStatsRepository.reconcile_query(
+        list(range(ids["project_id"], ids["project_id"] + 100))
+    )
+    # A word in a handful of tasks and a prefix in every one of them
+    yield "search (rare word)", SearchRepository.search_query(ids["user_id"], "12345", 21)
+    yield "search (common prefix)", SearchRepository.search_query(ids["user_id"], "task:*", 21)
+
+
+def seq_scans(plan: dict) -> List[str]:
+    """Tables read with a sequential scan anywhere in ``plan``"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in CHECKED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def scans(plan: dict) -> List[str]:
+    """Short description of how each table is read, for the report"""
+    found = []
+    if "Index Name" in plan:
+        found.append(f"{plan['Node Type']} {plan['Index Name']}")
+    elif plan.get("Node Type") == "Seq Scan":
+        found.append(f"Seq Scan {plan['Relation Name']}")
+    for child in plan.get("Plans", []):
+        found.extend(scans(child))
+    return found
+
+
+def explain(conn: Connection, stmt: Select) -> dict:
+    compiled = stmt.compile(dialect=conn.dialect)
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar_one()[0]["Plan"]
+
+
+def check(report: Callable[[str], None] = lambda line: None) -> List[str]:
+    """Seed, EXPLAIN every query and roll back; returns the queries planned as sequential scans"""
+    run_migrations()
+    failures = []
+    with engine.connect() as conn:
+        with conn.begin() as transaction:
+            try:
+                ids = seed(conn)
+                for name, stmt in queries(ids):
+                    plan = explain(conn, stmt)
+                    bad = seq_scans(plan)
+                    status = "SEQ SCAN" if bad else "ok"
+                    report(f"{status:9} {name:50} {', '.join(scans(plan))}")
+                    if bad:
+                        failures.append(f"{name}: sequential scan on {', '.join(bad)}")
+            finally:
+                transaction.rollback()
+    return failures
+
+
+def main() -> int:
+    failures = check(print)
+    if failures:
+        print("\nQueries regressed to sequential scans:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nAll queries use indexes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
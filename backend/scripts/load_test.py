@@ -0,0 +1,366 @@
+"""
+HTTP load test: mixed workload against the API, latency percentiles per route.
+
+Seeds users, projects and task trees straight into DATABASE_URL, starts the
+app with uvicorn (plus a project worker, so the creation queue drains) unless
+--url points at a running one, and drives it with --concurrency virtual users
+for --duration seconds. Each virtual user logs in as its own seeded user and
+picks actions at random with the --mix weights; runs with the same --seed
+send the same request sequence per user.
+
+Results are printed and written as JSON (--output): requests, errors,
+throughput and p50/p95/p99 per route template. With --baseline the run is
+compared against a previous result and exits 1 if a route got slower or lost
+throughput beyond --tolerance:
+
+    cd backend
+    python scripts/load_test.py --output scripts/load_test_baseline.json   # on main
+    python scripts/load_test.py --baseline scripts/load_test_baseline.json # on a branch
+
+The app runs with the environment of this process (API_MODE, FAST_JSON,
+DB_POOL_SIZE, ...), so configurations can be compared the same way. Rate
+limiting is off unless RATE_LIMIT_ENABLED is set explicitly.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from config.database import SessionLocal, init_db  # noqa: E402
+from config.passwords import _hash  # noqa: E402
+from models.task import TaskBulkItem  # noqa: E402
+from repos.project_repository import ProjectRepository  # noqa: E402
+from repos.task_repository import TaskRepository  # noqa: E402
+from repos.user_repository import UserRepository  # noqa: E402
+
+PASSWORD = "load-test-password"
+DEFAULT_MIX = "login=5,list_projects=30,list_tasks=30,create_subtask=15,complete_task=15,create_project=5"
+
+
+@dataclass
+class SeededUser:
+    nombre: str
+    project_ids: List[int]
+    pending_tasks: List[Tuple[int, int]]  # (task id, project id)
+
+
+@dataclass
+class VirtualUser:
+    """Per-user state, so actions stay valid (no subtasks under completed tasks)"""
+    seeded: SeededUser
+    rng: random.Random
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+# Route template -> (latency in ms, status code, 0 if the request failed) samples
+Samples = Dict[str, List[Tuple[float, int]]]
+
+
+def seed(users: int, projects: int, tasks: int, rng: random.Random) -> List[SeededUser]:
+    """Insert ``users`` users with ``projects`` projects of ``tasks`` tasks each, nested as trees"""
+    init_db()
+    run_id = uuid.uuid4().hex[:8]
+    password_hash = _hash(PASSWORD)  # one hash for everybody, seeding is not what is measured
+    db = SessionLocal()
+    task_repo = TaskRepository(db)
+    seeded = []
+    try:
+        for u in range(users):
+            user = UserRepository._UserDB(nombre=f"load-{run_id}-{u}", password_hash=password_hash)
+            db.add(user)
+            db.flush()
+            db_projects = [
+                ProjectRepository._ProjectDB(nombre=f"Proyecto {p}", description="load test", user_id=user.id)
+                for p in range(projects)
+            ]
+            db.add_all(db_projects)
+            db.commit()
+
+            items = []
+            for db_project in db_projects:
+                for t in range(tasks):
+                    # About a third are roots, the rest hang from an earlier task of the same project
+                    parent = f"{db_project.id}-{rng.randrange(t)}" if t and rng.random() > 0.3 else None
+                    items.append(TaskBulkItem(
+                        detalle=f"Tarea {t}", project_id=db_project.id, user_id=user.id,
+                        temp_id=f"{db_project.id}-{t}", parent_temp_id=parent
+                    ))
+            task_ids = task_repo.create_many(items)
+            pending = [(task_id, item.project_id) for task_id, item in zip(task_ids, items)]
+            seeded.append(SeededUser(user.nombre, [p.id for p in db_projects], pending))
+    finally:
+        db.close()
+    return seeded
+
+
+async def login(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    response = await timed(client, samples, "POST /api/auth/login", "POST", "/api/auth/login",
+                           json={"username": vu.seeded.nombre, "password": PASSWORD})
+    if response is not None and response.status_code == 200:
+        vu.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def sign_in(client: httpx.AsyncClient, vu: VirtualUser) -> None:
+    """Unmeasured login before the run, waiting out the hasher backpressure (503)"""
+    while not vu.headers:
+        response = await client.post("/api/auth/login", json={"username": vu.seeded.nombre, "password": PASSWORD})
+        if response.status_code == 200:
+            vu.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        elif response.status_code == 503:
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        else:
+            response.raise_for_status()
+
+
+async def list_projects(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    await timed(client, samples, "GET /api/projects", "GET", "/api/projects", headers=vu.headers)
+
+
+async def list_tasks(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    project_id = vu.rng.choice(vu.seeded.project_ids)
+    await timed(client, samples, "GET /api/tasks/project/{project_id}", "GET",
+                f"/api/tasks/project/{project_id}", headers=vu.headers)
+
+
+async def create_subtask(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    if not vu.seeded.pending_tasks:
+        return await list_tasks(client, vu, samples)
+    parent_id, project_id = vu.rng.choice(vu.seeded.pending_tasks)
+    body = {"detalle": "Subtarea", "project_id": project_id}
+    response = await timed(client, samples, "POST /api/tasks/{task_id}/subtasks", "POST",
+                           f"/api/tasks/{parent_id}/subtasks", headers=vu.headers, json=body)
+    if response is not None and response.status_code == 200:
+        vu.seeded.pending_tasks.append((response.json()["id"], project_id))
+
+
+async def complete_task(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    if not vu.seeded.pending_tasks:
+        return await list_tasks(client, vu, samples)
+    pending = vu.seeded.pending_tasks
+    task_id, _ = pending.pop(vu.rng.randrange(len(pending)))
+    await timed(client, samples, "PATCH /api/tasks/{task_id}/complete", "PATCH",
+                f"/api/tasks/{task_id}/complete", headers=vu.headers)
+
+
+async def create_project(client: httpx.AsyncClient, vu: VirtualUser, samples: Samples) -> None:
+    body = {"nombre": "Proyecto nuevo", "description": "load test"}
+    await timed(client, samples, "POST /api/projects", "POST", "/api/projects", headers=vu.headers, json=body)
+
+
+ACTIONS = {
+    "login": login,
+    "list_projects": list_projects,
+    "list_tasks": list_tasks,
+    "create_subtask": create_subtask,
+    "complete_task": complete_task,
+    "create_project": create_project,
+}
+
+
+async def timed(client: httpx.AsyncClient, samples: Samples, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        response = None
+    elapsed = (time.perf_counter() - start) * 1000
+    samples[route].append((elapsed, response.status_code if response is not None else 0))
+    return response
+
+
+async def run_user(client: httpx.AsyncClient, vu: VirtualUser, mix: Dict[str, int], deadline: float, samples: Samples) -> None:
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        action = vu.rng.choices(names, weights)[0]
+        await ACTIONS[action](client, vu, samples)
+
+
+async def drive(url: str, seeded: List[SeededUser], args: argparse.Namespace, mix: Dict[str, int]) -> Tuple[Samples, float]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        users = [
+            VirtualUser(seeded[i % len(seeded)], random.Random(f"{args.seed}-{i}"))
+            for i in range(args.concurrency)
+        ]
+        await asyncio.gather(*(sign_in(client, vu) for vu in users))
+        if args.warmup > 0:
+            deadline = time.monotonic() + args.warmup
+            await asyncio.gather(*(run_user(client, vu, mix, deadline, defaultdict(list)) for vu in users))
+
+        samples: Samples = defaultdict(list)
+        start = time.monotonic()
+        await asyncio.gather(*(run_user(client, vu, mix, start + args.duration, samples) for vu in users))
+        return samples, time.monotonic() - start
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[Tuple[float, int]], elapsed: float) -> dict:
+    values = sorted(latency for latency, _ in latencies)
+    statuses = defaultdict(int)
+    for _, status in latencies:
+        statuses[str(status)] += 1
+    return {
+        "requests": len(values),
+        "errors": sum(count for status, count in statuses.items() if not "200" <= status < "400"),
+        "statuses": dict(sorted(statuses.items())),
+        "rps": round(len(values) / elapsed, 2),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+
+
+def report(samples: Samples, elapsed: float, args: argparse.Namespace, mix: Dict[str, int]) -> dict:
+    return {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "api_mode": os.getenv("API_MODE", "sync"),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "mix": mix,
+            "dataset": {"users": args.users, "projects": args.projects, "tasks": args.tasks},
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "routes": {route: summarize(latencies, elapsed) for route, latencies in sorted(samples.items())},
+        "total": summarize([sample for latencies in samples.values() for sample in latencies], elapsed),
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"{'route':40}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in [*result["routes"].items(), ("total", result["total"])]:
+        print(f"{route:40}{stats['requests']:10}{stats['errors']:8}{stats['rps']:10.1f}"
+              f"{stats['p50_ms']:10.2f}{stats['p95_ms']:10.2f}{stats['p99_ms']:10.2f}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of ``result`` against ``baseline``: p95 up or throughput down by more than ``tolerance``"""
+    regressions = []
+    print(f"\n{'route':40}{'p95 base':>10}{'p95 now':>10}{'rps base':>10}{'rps now':>10}")
+    for route, base in baseline["routes"].items():
+        now = result["routes"].get(route)
+        if now is None:
+            continue
+        print(f"{route:40}{base['p95_ms']:10.2f}{now['p95_ms']:10.2f}{base['rps']:10.1f}{now['rps']:10.1f}")
+        if now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {base['p95_ms']} -> {now['p95_ms']} ms")
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: {base['rps']} -> {now['rps']} req/s")
+        if now["errors"] / max(now["requests"], 1) > base["errors"] / max(base["requests"], 1) + 0.01:
+            regressions.append(f"{route}: errors {base['errors']}/{base['requests']} -> {now['errors']}/{now['requests']}")
+    return regressions
+
+
+def start_app(port: int, workers: int) -> List[subprocess.Popen]:
+    env = dict(os.environ)
+    # A handful of virtual users behind one IP would drain the buckets at once
+    env.setdefault("RATE_LIMIT_ENABLED", "false")
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=SRC_DIR,
+        env=env,
+    )
+    worker = subprocess.Popen([sys.executable, "-m", "repos.project_worker"], cwd=SRC_DIR, stdout=subprocess.DEVNULL)
+    return [app, worker]
+
+
+def wait_until_up(url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}, expected one of {', '.join(ACTIONS)}")
+        mix[name] = int(weight)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="API base URL; by default the app is started locally")
+    parser.add_argument("--port", type=int, default=8765, help="port of the locally started app")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the locally started app")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"action weights ({DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=20, help="seeded users")
+    parser.add_argument("--projects", type=int, default=5, help="seeded projects per user")
+    parser.add_argument("--tasks", type=int, default=50, help="seeded tasks per project")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the dataset and of the request sequence")
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--baseline", help="compare against this previous --output")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative p95/throughput change")
+    args = parser.parse_args()
+
+    seeded = seed(args.users, args.projects, args.tasks, random.Random(args.seed))
+    processes = []
+    url = args.url
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        processes = start_app(args.port, args.workers)
+    try:
+        wait_until_up(url)
+        samples, elapsed = asyncio.run(drive(url, seeded, args, args.mix))
+    finally:
+        for process in processes:
+            process.send_signal(signal.SIGTERM)
+        for process in processes:
+            process.wait()
+
+    result = report(samples, elapsed, args, args.mix)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# Async twin of api.auth_router, mounted when API_MODE=async
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.user import UserCreate
+from services.user_service import AsyncUserService
+from config.database import get_async_db
+from config.jwt import create_access_token
+from config.passwords import PasswordHasherBusy
+from api.auth_router import AuthResponse, LoginRequest
+
+router = APIRouter(prefix="/api/auth", tags=["authentication"])
+
+def get_user_service(db: AsyncSession = Depends(get_async_db)) -> AsyncUserService:
+    return AsyncUserService(db)
+
+@router.post("/login", response_model=AuthResponse)
+async def login(
+    login_data: LoginRequest,
+    service: AsyncUserService = Depends(get_user_service)
+):
+    """Login user with username and password"""
+    user = await service.authenticate(login_data.username, login_data.password)
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    # Create JWT token
+    access_token = create_access_token(data={"sub": str(user.id), "username": user.nombre})
+
+    return AuthResponse(
+        access_token=access_token,
+        token_type="bearer",
+        user={"id": str(user.id), "username": user.nombre}
+    )
+
+@router.post("/register", response_model=AuthResponse)
+async def register(
+    register_data: LoginRequest,
+    service: AsyncUserService = Depends(get_user_service)
+):
+    """Register new user with username and password"""
+    # Check if user already exists
+    existing_user = await service.get_user_by_nombre(register_data.username)
+    if existing_user:
+        raise HTTPException(status_code=400, detail="User already exists")
+
+    # Create new user (password hashing is handled by the repository)
+    user_data = UserCreate(
+        nombre=register_data.username,
+        password=register_data.password
+    )
+
+    try:
+        user = await service.create_user(user_data)
+
+        # Create JWT token
+        access_token = create_access_token(data={"sub": str(user.id), "username": user.nombre})
+
+        return AuthResponse(
+            access_token=access_token,
+            token_type="bearer",
+            user={"id": str(user.id), "username": user.nombre}
+        )
+    except PasswordHasherBusy:
+        raise  # 503, see main
+    except Exception as e:
+        print(f"Registration error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
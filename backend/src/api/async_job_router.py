@@ -0,0 +1,42 @@
+# Async twin of api.job_router, mounted when API_MODE=async
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from models.job import Job
+from models.user import User
+from config.auth_dependency import get_current_user_async as get_current_user
+from config.jobs import get_job_async, job_event_stream, wait_for_job
+from api.job_router import EVENTS_TIMEOUT, LONG_POLL_MAX_WAIT
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_WAIT, description="Segundos a esperar a que el trabajo termine (long-poll)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Obtener el estado de un trabajo en segundo plano"""
+    if wait:
+        job = await wait_for_job(job_id, current_user.id, wait)
+    else:
+        job = await get_job_async(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Recibir los cambios de estado de un trabajo como Server-Sent Events hasta que termine"""
+    if not await get_job_async(job_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return StreamingResponse(
+        job_event_stream(job_id, current_user.id, EVENTS_TIMEOUT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
@@ -0,0 +1,168 @@
+# Async twin of api.project_router, mounted when API_MODE=async
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from typing import AsyncGenerator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.pagination import PageRequest
+from models.job import Job
+from models.user import User
+from models.project import ProjectCreate, Project, ProjectStats
+from services.project_service import AsyncProjectService
+from api.etag import PROJECT_TASKS, USER_PROJECTS, make_etag, not_modified
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import async_read_session, get_async_db, get_async_read_db, get_reader_id
+from config.auth_dependency import get_current_user_async as get_current_user
+
+router = APIRouter(prefix="/api/projects", tags=["projects"])
+
+
+def get_project_service(db: AsyncSession = Depends(get_async_db)) -> AsyncProjectService:
+    return AsyncProjectService(db)
+
+
+def get_project_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncProjectService:
+    """AsyncProjectService on a read replica, for the GET routes"""
+    return AsyncProjectService(db)
+
+
+async def get_user_projects_read_service(
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> AsyncGenerator[AsyncProjectService, None]:
+    """AsyncProjectService for the reads sent or cached with the user's project version: on the primary right after it moves"""
+    written = [AsyncProjectService.project_list_cache.written_key(reader_id)] if reader_id is not None else []
+    async with await async_read_session(reader_id, written) as db:
+        yield AsyncProjectService(db)
+
+
+async def get_project_stats_read_service(
+    project_id: int,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> AsyncGenerator[AsyncProjectService, None]:
+    """AsyncProjectService for the counters of a project, sent with its task version: on the primary right after it moves"""
+    async with await async_read_session(reader_id, [AsyncProjectService.stats_written_key(project_id)]) as db:
+        yield AsyncProjectService(db)
+
+
+"""Project endpoints.
+
+We expose both trailing and non-trailing slash variants because the main app
+has redirect_slashes = False. Without this, calling /api/projects (no slash)
+would return 404 even though /api/projects/ exists. By stacking two decorators
+we accept both forms without a 307 redirect that previously downgraded scheme.
+"""
+
+
+@router.get("/", response_model=List[Project])
+@router.get("", response_model=List[Project], include_in_schema=False)
+async def get_projects(
+    request: Request,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_user_projects_read_service)
+):
+    """Listar los proyectos del usuario autenticado (paginado), o los de ?ids="""
+    etag = make_etag(USER_PROJECTS, current_user.id, await service.get_user_version(current_user.id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    if ids is not None:
+        return batch_response(response, ids, await service.get_projects_by_ids(current_user.id, ids))
+    return paginate(response, await service.get_projects_by_user(current_user.id, page))
+
+
+@router.post("/", response_model=Job, status_code=202)
+@router.post("", response_model=Job, status_code=202, include_in_schema=False)
+async def create_project(
+    project: ProjectCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_project_service)
+):
+    """Encolar la creación de un proyecto; su estado se consulta en /api/jobs/{id}"""
+    job = await service.create_project(project, current_user.id)
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
+
+
+@router.get("/stats", response_model=List[ProjectStats])
+async def get_projects_stats(
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_project_read_service)
+):
+    """Contadores de tareas (total, completadas, subtareas) de todos los proyectos del usuario autenticado"""
+    return await service.get_user_project_stats(current_user.id)
+
+
+@router.get("/{project_id}", response_model=Project)
+async def get_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_user_projects_read_service)
+):
+    """Obtener un proyecto específico"""
+    # Projects are immutable, any change to them bumps their owner's version
+    version = await service.get_user_version(current_user.id)
+    project = await service.get_project_by_id(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+
+    # Verify user owns the project
+    if project.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="No tienes permiso para acceder a este proyecto")
+
+    unchanged = not_modified(request, response, make_etag(USER_PROJECTS, current_user.id, version, item=project.id))
+    if unchanged:
+        return unchanged
+    return project
+
+
+@router.get("/{project_id}/stats", response_model=ProjectStats)
+async def get_project_stats(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_project_stats_read_service)
+):
+    """Contadores de tareas de un proyecto (total, completadas, subtareas)"""
+    version = await service.get_stats_version(project_id)
+    project = await service.get_project_by_id(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+
+    # Verify user owns the project
+    if project.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="No tienes permiso para acceder a este proyecto")
+
+    unchanged = not_modified(request, response, make_etag(PROJECT_TASKS, project_id, version))
+    if unchanged:
+        return unchanged
+    return await service.get_project_stats(project_id)
+
+
+@router.delete("/{project_id}")
+async def delete_project(
+    project_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncProjectService = Depends(get_project_service)
+):
+    """Eliminar un proyecto"""
+    project = await service.get_project_by_id(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+
+    # Verify user owns the project
+    if project.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="No tienes permiso para eliminar este proyecto")
+
+    if not await service.delete_project(project_id):
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    return {"message": "Proyecto eliminado exitosamente"}
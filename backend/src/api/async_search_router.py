@@ -0,0 +1,34 @@
+# Async twin of api.search_router, mounted when API_MODE=async
+from fastapi import APIRouter, Depends, Response
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.search import SearchHit, SearchRequest
+from models.user import User
+from services.search_service import AsyncSearchService
+from api.pagination import paginate_search, search_request
+from config.database import get_async_read_db
+from config.auth_dependency import get_current_user_async as get_current_user
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+def get_search_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncSearchService:
+    return AsyncSearchService(db)
+
+
+"""Search endpoint (accepts both with/without trailing slash).
+See project_router for rationale.
+"""
+
+
+@router.get("/", response_model=List[SearchHit])
+@router.get("", response_model=List[SearchHit], include_in_schema=False)
+async def search(
+    response: Response,
+    request: SearchRequest = Depends(search_request),
+    current_user: User = Depends(get_current_user),
+    service: AsyncSearchService = Depends(get_search_service)
+):
+    """Buscar en los proyectos del usuario y sus tareas, por relevancia (paginado)"""
+    return paginate_search(response, await service.search(current_user.id, request))
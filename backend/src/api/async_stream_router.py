@@ -0,0 +1,54 @@
+# Async twin of api.stream_router, mounted when API_MODE=async
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket
+from fastapi.responses import StreamingResponse
+
+from models.user import User
+from services.project_service import AsyncProjectService
+from config.auth_dependency import get_current_user_async as get_current_user
+from config.database import async_read_session
+from config.events import STREAM_MAX_PROJECTS, change_event_stream
+from api.stream_router import serve_websocket
+
+router = APIRouter(prefix="/api/stream", tags=["stream"])
+
+
+async def check_stream_projects(user_id: int, project_ids: List[int]) -> List[int]:
+    """The requested projects if all of them belong to the user, raises otherwise"""
+    if len(project_ids) > STREAM_MAX_PROJECTS:
+        raise HTTPException(status_code=400, detail=f"Máximo {STREAM_MAX_PROJECTS} proyectos por conexión")
+    if not project_ids:
+        return []
+    async with await async_read_session(user_id) as db:
+        owned = await AsyncProjectService(db).get_owned_project_ids(user_id, project_ids)
+    if len(owned) != len(set(project_ids)):
+        raise HTTPException(status_code=403, detail="No tienes permiso para acceder a este proyecto")
+    return owned
+
+
+async def stream_project_ids(
+    project_id: List[int] = Query([], description="Proyectos de los que recibir los cambios de tareas"),
+    current_user: User = Depends(get_current_user)
+) -> List[int]:
+    return await check_stream_projects(current_user.id, project_id)
+
+
+@router.get("/")
+@router.get("", include_in_schema=False)
+async def stream(
+    current_user: User = Depends(get_current_user),
+    project_ids: List[int] = Depends(stream_project_ids)
+):
+    """Recibir como Server-Sent Events los cambios de los proyectos del usuario y de las tareas de los proyectos pedidos"""
+    return StreamingResponse(
+        change_event_stream(current_user.id, project_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, project_id: List[int] = Query([])):
+    """Same events as GET /api/stream over a WebSocket; the first message must be the JWT"""
+    await serve_websocket(websocket, project_id, check_stream_projects)
@@ -0,0 +1,273 @@
+# Async twin of api.task_router, mounted when API_MODE=async
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import AsyncGenerator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.pagination import PageRequest
+from models.task import TaskBulkItem, TaskBulkResult, TaskCreate, Task, TaskNode
+from models.user import User
+from services.task_service import AsyncTaskService
+from api.etag import PROJECT_TASKS, make_etag, not_modified, requested_versions
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import async_read_session, get_async_db, get_async_read_db, get_reader_id
+from config.auth_dependency import get_current_user_async as get_current_user
+
+router = APIRouter(prefix="/api/tasks", tags=["tasks"])
+
+
+def get_task_service(db: AsyncSession = Depends(get_async_db)) -> AsyncTaskService:
+    return AsyncTaskService(db)
+
+
+def get_task_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncTaskService:
+    """AsyncTaskService on a read replica, for the GET routes"""
+    return AsyncTaskService(db)
+
+
+async def get_project_tasks_read_service(
+    project_id: int,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> AsyncGenerator[AsyncTaskService, None]:
+    """AsyncTaskService for the reads of a project's tasks sent with its version: on the primary right after it moves"""
+    async with await async_read_session(reader_id, [AsyncTaskService.project_versions.written_key(project_id)]) as db:
+        yield AsyncTaskService(db)
+
+
+async def get_task_detail_read_service(
+    request: Request,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> AsyncGenerator[AsyncTaskService, None]:
+    """get_project_tasks_read_service for the projects named in If-None-Match, the versions GET /{task_id} may send"""
+    written = [AsyncTaskService.project_versions.written_key(project_id) for project_id, _ in requested_versions(request, PROJECT_TASKS)]
+    async with await async_read_session(reader_id, written) as db:
+        yield AsyncTaskService(db)
+
+
+"""Task endpoints (root accepts both with/without trailing slash).
+See project_router for rationale.
+"""
+
+
+@router.get("/", response_model=List[Task])
+@router.get("", response_model=List[Task], include_in_schema=False)
+async def get_tasks(
+    response: Response,
+    completed: Optional[bool] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_read_service)
+):
+    """Listar las tareas visibles para el usuario (proyectos propios o asignadas), paginado y filtrable, o las de ?ids="""
+    if ids is not None:
+        return batch_response(response, ids, await service.get_tasks_by_ids(current_user.id, ids))
+    return paginate(response, await service.get_all_tasks(
+        current_user.id, page, completed=completed, project_id=project_id, user_id=user_id
+    ))
+
+
+@router.post("/", response_model=Task)
+@router.post("", response_model=Task, include_in_schema=False)
+async def create_task(
+    task: TaskCreate,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Crear una nueva tarea"""
+    return await service.create_task(task)
+
+
+@router.post("/bulk", response_model=TaskBulkResult, status_code=201)
+async def create_tasks_bulk(
+    tasks: List[TaskBulkItem],
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Crear varias tareas en una sola transacción (las subtareas referencian a su padre por temp_id)"""
+    try:
+        return await service.create_tasks_bulk(tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{task_id}", response_model=Task)
+async def get_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_detail_read_service)
+):
+    """Obtener una tarea específica"""
+    # The ETag names the project of the task, so the versions the client may hold are read before loading the task
+    versions = {}
+    for project_id, _ in requested_versions(request, PROJECT_TASKS):
+        versions[project_id] = await service.get_project_version(project_id)
+
+    task = await service.get_task_by_id(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    # First request (or the task moved): a version read now could already include
+    # a write this task predates, send one that names the task but never matches
+    etag = make_etag(PROJECT_TASKS, task.project_id, versions.get(task.project_id, 0), item=task.id)
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return task
+
+
+@router.put("/{task_id}", response_model=Task)
+async def update_task(
+    task_id: int,
+    task: TaskCreate,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Actualizar una tarea"""
+    updated_task = await service.update_task(task_id, task)
+    if not updated_task:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return updated_task
+
+
+@router.patch("/{task_id}/complete", response_model=Task)
+async def complete_task(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Marcar una tarea como completada"""
+    completed_task = await service.mark_task_completed(task_id)
+    if not completed_task:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return completed_task
+
+
+@router.delete("/{task_id}")
+async def delete_task(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Eliminar una tarea"""
+    if not await service.delete_task(task_id):
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return {"message": "Tarea eliminada exitosamente"}
+
+
+@router.get("/project/{project_id}", response_model=List[Task])
+async def get_tasks_by_project(
+    project_id: int,
+    request: Request,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_project_tasks_read_service)
+):
+    """Obtener las tareas de un proyecto (paginado)"""
+    etag = make_etag(PROJECT_TASKS, project_id, await service.get_project_version(project_id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return paginate(response, await service.get_tasks_by_project(project_id, page))
+
+
+@router.get("/user/{user_id}", response_model=List[Task])
+async def get_tasks_by_user(
+    user_id: int,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_read_service)
+):
+    """Obtener las tareas asignadas a un usuario (paginado)"""
+    return paginate(response, await service.get_tasks_by_user(user_id, page))
+
+
+@router.get("/{task_id}/subtasks", response_model=List[Task])
+async def get_subtasks(
+    task_id: int,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_read_service)
+):
+    """Obtener las subtareas de una tarea (paginado)"""
+    return paginate(response, await service.get_subtasks(task_id, page))
+
+
+@router.post("/{parent_task_id}/subtasks", response_model=Task)
+async def create_subtask(
+    parent_task_id: int,
+    task: TaskCreate,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Crear una subtarea"""
+    subtask = await service.create_subtask(parent_task_id, task)
+    if not subtask:
+        raise HTTPException(
+            status_code=400,
+            detail="No se puede crear subtarea. La tarea padre no permite subtareas o no existe"
+        )
+    return subtask
+
+
+@router.get("/{task_id}/tree", response_model=TaskNode)
+async def get_task_tree(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="Niveles de subtareas a incluir (sin límite si se omite)"),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_read_service)
+):
+    """Obtener una tarea con todas sus subtareas anidadas"""
+    tree = await service.get_task_tree(task_id, max_depth)
+    if not tree:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return tree
+
+
+@router.get("/project/{project_id}/tree", response_model=List[TaskNode])
+async def get_project_task_tree(
+    project_id: int,
+    request: Request,
+    response: Response,
+    max_depth: Optional[int] = Query(None, ge=0, description="Niveles de subtareas a incluir (sin límite si se omite)"),
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_project_tasks_read_service)
+):
+    """Obtener todas las tareas de un proyecto anidadas bajo sus tareas raíz"""
+    etag = make_etag(PROJECT_TASKS, project_id, await service.get_project_version(project_id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return await service.get_project_tree(project_id, max_depth)
+
+
+@router.delete("/{task_id}/tree")
+async def delete_task_tree(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Eliminar una tarea junto con todas sus subtareas"""
+    deleted = await service.delete_task_tree(task_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return {"message": "Tareas eliminadas exitosamente", "deleted": deleted}
+
+
+@router.patch("/{task_id}/tree/complete")
+async def complete_task_tree(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncTaskService = Depends(get_task_service)
+):
+    """Marcar una tarea y todas sus subtareas como completadas"""
+    updated = await service.complete_task_tree(task_id)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return {"message": "Tareas completadas exitosamente", "updated": updated}
@@ -0,0 +1,90 @@
+# Async twin of api.user_router, mounted when API_MODE=async
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.pagination import PageRequest
+from models.user import UserCreate, User
+from services.user_service import AsyncUserService
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import get_async_db, get_async_read_db
+from config.auth_dependency import get_current_user_async as get_current_user
+
+router = APIRouter(prefix="/api/users", tags=["users"])
+
+
+def get_user_service(db: AsyncSession = Depends(get_async_db)) -> AsyncUserService:
+    return AsyncUserService(db)
+
+
+def get_user_read_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncUserService:
+    """AsyncUserService on a read replica, for the GET routes"""
+    return AsyncUserService(db)
+
+
+"""User endpoints (root accepts both with/without trailing slash).
+Redirects disabled at app level, so expose both to avoid 404.
+"""
+
+
+@router.get("/", response_model=List[User])
+@router.get("", response_model=List[User], include_in_schema=False)
+async def get_users(
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
+    current_user: User = Depends(get_current_user),
+    service: AsyncUserService = Depends(get_user_read_service)
+):
+    """Listar los usuarios (paginado), o los de ?ids="""
+    if ids is not None:
+        return batch_response(response, ids, await service.get_users_by_ids(ids))
+    return paginate(response, await service.get_all_users(page))
+
+
+@router.post("/", response_model=User)
+@router.post("", response_model=User, include_in_schema=False)
+async def create_user(
+    user: UserCreate,
+    service: AsyncUserService = Depends(get_user_service)
+):
+    """Crear un nuevo usuario"""
+    return await service.create_user(user)
+
+
+@router.get("/{user_id}", response_model=User)
+async def get_user(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    service: AsyncUserService = Depends(get_user_read_service)
+):
+    """Obtener un usuario específico"""
+    user = await service.get_user_by_id(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return user
+
+
+@router.put("/{user_id}", response_model=User)
+async def update_user(
+    user_id: int,
+    user: UserCreate,
+    service: AsyncUserService = Depends(get_user_service)
+):
+    """Actualizar un usuario"""
+    updated_user = await service.update_user(user_id, user)
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return updated_user
+
+
+@router.delete("/{user_id}")
+async def delete_user(
+    user_id: int,
+    service: AsyncUserService = Depends(get_user_service)
+):
+    """Eliminar un usuario"""
+    if not await service.delete_user(user_id):
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return {"message": "Usuario eliminado exitosamente"}
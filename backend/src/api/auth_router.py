@@ -1,12 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import hashlib
 
 from models.user import UserCreate
 from services.user_service import UserService
 from config.database import get_db
 from config.jwt import create_access_token
+from config.passwords import PasswordHasherBusy
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
@@ -22,22 +22,14 @@ class AuthResponse(BaseModel):
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
     return UserService(db)
 
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash using the same method as repository"""
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    return password_hash == hashed
-
 @router.post("/login", response_model=AuthResponse)
 def login(
     login_data: LoginRequest,
     service: UserService = Depends(get_user_service)
 ):
     """Login user with username and password"""
-    user = service.get_user_by_nombre(login_data.username)
-    if not user or not user.password_hash:
-        raise HTTPException(status_code=400, detail="Invalid credentials")
-
-    if not verify_password(login_data.password, user.password_hash):
+    user = service.authenticate(login_data.username, login_data.password)
+    if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
     # Create JWT token
@@ -77,6 +69,8 @@ def register(
             token_type="bearer",
             user={"id": str(user.id), "username": user.nombre}
         )
+    except PasswordHasherBusy:
+        raise  # 503, see main
     except Exception as e:
         print(f"Registration error: {e}")
         import traceback
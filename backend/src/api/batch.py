@@ -0,0 +1,44 @@
+"""Batch lookups by id on the list endpoints.
+
+GET /api/tasks, /api/users and /api/projects accept ?ids=3,1,2 to fetch
+several rows with a single query (id = ANY(:ids)) instead of one request per
+id. The response is the same plain JSON array as a listing, in the requested
+order (duplicates once); ids that do not exist, or that the user cannot see,
+are listed in the X-Missing-Ids header. Pagination parameters are ignored.
+"""
+from typing import List, Optional
+
+from fastapi import HTTPException, Query, Response
+
+from api.pagination import MAX_LIMIT
+
+MAX_BATCH_IDS = MAX_LIMIT
+MISSING_IDS_HEADER = "X-Missing-Ids"
+# Ids are Postgres integer columns, asyncpg refuses larger values outright
+MAX_ID = 2**31 - 1
+
+
+def batch_ids(
+    ids: Optional[str] = Query(None, description=f"Ids separados por coma, hasta {MAX_BATCH_IDS} (consulta por lote, sin paginación)")
+) -> Optional[List[int]]:
+    """Dependency parsing ?ids=1,2,3 into distinct ids in request order, None without ?ids="""
+    if ids is None:
+        return None
+    try:
+        parsed = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Lista de ids inválida")
+    if any(abs(item_id) > MAX_ID for item_id in parsed):
+        raise HTTPException(status_code=400, detail="Lista de ids inválida")
+    if len(parsed) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Se permiten hasta {MAX_BATCH_IDS} ids por consulta")
+    return parsed
+
+
+def batch_response(response: Response, ids: List[int], items: List) -> List:
+    """Report the ids missing from ``items`` in the X-Missing-Ids header and return ``items``"""
+    found = {item.id for item in items}
+    missing = [item_id for item_id in ids if item_id not in found]
+    if missing:
+        response.headers[MISSING_IDS_HEADER] = ",".join(map(str, missing))
+    return items
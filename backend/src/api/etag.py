@@ -0,0 +1,60 @@
+"""Conditional GETs for list and detail endpoints.
+
+ETags are weak and built from the version counters the services bump after
+every write (ProjectService per user, TaskService per project), never from the
+response body. The version is read before the data is loaded, and for
+DB_READ_YOUR_WRITES_WINDOW after a version moves the routes that send it read
+from the primary rather than a replica (VersionCounter.written_key), so an
+ETag can only be older than the data it was sent with, never newer, as long as
+replicas lag less than that window. A matching
+If-None-Match on a list is answered 304 from Redis alone, before anything is
+loaded from Postgres. Detail ETags also name the item (``make_etag(...,
+item=id)``), so one resource's tag never matches another, and are only
+compared once the item is loaded (from the entity cache, usually) and the
+caller is allowed to see it. Without Redis no ETag is sent and requests are
+served as usual.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from fastapi import Request, Response
+
+USER_PROJECTS = "u"  # projects of a user, ProjectService.get_user_version
+PROJECT_TASKS = "p"  # tasks of a project, TaskService.get_project_version
+
+# If-None-Match tags looked up per request, a client sends one per URL anyway
+MAX_REQUESTED_VERSIONS = 4
+
+_ETAG = re.compile(r'(?:W/)?"([a-z])(\d+)\.(\d+)(?:\.\d+)?"')
+
+
+def make_etag(kind: str, scope: int, version: Optional[int], item: Optional[int] = None) -> Optional[str]:
+    """Weak ETag of ``scope``'s data at ``version``, of one ``item`` of it for detail routes"""
+    if version is None:
+        return None
+    return f'W/"{kind}{scope}.{version}"' if item is None else f'W/"{kind}{scope}.{version}.{item}"'
+
+
+def requested_versions(request: Request, kind: str) -> List[Tuple[int, int]]:
+    """(scope, version) of every ETag of ``kind`` (list or detail) the client sent in If-None-Match"""
+    header = request.headers.get("if-none-match", "")
+    versions = [(int(scope), int(version)) for tag_kind, scope, version in _ETAG.findall(header) if tag_kind == kind]
+    return versions[:MAX_REQUESTED_VERSIONS]
+
+
+def not_modified(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    Compare ``etag`` with If-None-Match (weak comparison)
+
+    Returns:
+        A 304 response if the client already has this version, None otherwise
+        (``etag`` is then set on ``response`` for the route to fill in)
+    """
+    if etag is None:
+        return None
+    sent = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag.removeprefix("W/") in sent:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+
+from models.job import Job
+from models.user import User
+from config.auth_dependency import get_current_user
+from config.jobs import get_job_async, job_event_stream, wait_for_job
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+LONG_POLL_MAX_WAIT = 30  # seconds
+EVENTS_TIMEOUT = 60  # seconds an event stream stays open, EventSource reconnects
+
+
+"""Background job endpoints.
+
+They are async def even in sync mode: waiting on Redis pub/sub must not hold
+one of the threads that serve the sync routes.
+"""
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=LONG_POLL_MAX_WAIT, description="Segundos a esperar a que el trabajo termine (long-poll)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Obtener el estado de un trabajo en segundo plano"""
+    try:
+        if wait:
+            job = await wait_for_job(job_id, current_user.id, wait)
+        else:
+            job = await get_job_async(job_id, current_user.id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Estado de trabajos no disponible", headers={"Retry-After": "1"})
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Recibir los cambios de estado de un trabajo como Server-Sent Events hasta que termine"""
+    try:
+        job = await get_job_async(job_id, current_user.id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Estado de trabajos no disponible", headers={"Retry-After": "1"})
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return StreamingResponse(
+        job_event_stream(job_id, current_user.id, EVENTS_TIMEOUT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
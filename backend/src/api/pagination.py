@@ -0,0 +1,107 @@
+"""Keyset pagination for list endpoints.
+
+List endpoints keep returning a plain JSON array; the opaque cursor for the
+next page travels in the X-Next-Cursor header (absent on the last page) and is
+sent back as ?after=. Pages are ordered by (created_at, id).
+
+Search results (GET /api/search) are paginated the same way, ordered by rank
+instead, with a (rank, kind, id) cursor.
+
+With FAST_JSON on, pages are read as bare column rows and encoded straight to
+JSON bytes with orjson, skipping the domain/response models and FastAPI's
+response_model validation. The JSON is the same, field order aside.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Union
+
+import orjson
+from fastapi import HTTPException, Query, Response
+
+from config.env import env_bool
+from models.pagination import Cursor, Page, PageRequest
+from models.search import SearchCursor, SearchHit, SearchPage, SearchRequest
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_QUERY_LENGTH = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+FAST_JSON = env_bool("FAST_JSON", False)
+
+
+def _encode_fields(*fields) -> str:
+    raw = "|".join(str(field) for field in fields).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_fields(value: str) -> List[str]:
+    padded = value + "=" * (-len(value) % 4)
+    return base64.urlsafe_b64decode(padded).decode().split("|")
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    created_at, item_id = cursor
+    return _encode_fields(created_at.isoformat(), item_id)
+
+
+def decode_cursor(value: str) -> Cursor:
+    created_at, item_id = _decode_fields(value)
+    return datetime.fromisoformat(created_at), int(item_id)
+
+
+def encode_search_cursor(cursor: SearchCursor) -> str:
+    rank, kind, item_id = cursor
+    # repr round-trips the float exactly, the next page compares ranks for equality
+    return _encode_fields(repr(rank), kind, item_id)
+
+
+def decode_search_cursor(value: str) -> SearchCursor:
+    rank, kind, item_id = _decode_fields(value)
+    return float(rank), kind, int(item_id)
+
+
+def page_request(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Máximo de elementos por página"),
+    after: Optional[str] = Query(None, description=f"Cursor devuelto en el header {NEXT_CURSOR_HEADER}")
+) -> PageRequest:
+    """Dependency parsing ?limit=&after= into a PageRequest"""
+    if after is None:
+        return PageRequest(limit=limit, raw=FAST_JSON)
+    try:
+        return PageRequest(limit=limit, after=decode_cursor(after), raw=FAST_JSON)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def paginate(response: Response, page: Page) -> Union[List, Response]:
+    """Expose the next cursor as a header and return the page items (already encoded if raw)"""
+    if page.raw:
+        # Returning a Response bypasses response_model, keep the headers set so far
+        response = Response(orjson.dumps(page.items), media_type="application/json", headers=response.headers)
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page.next_cursor)
+    return response if page.raw else page.items
+
+
+def search_request(
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH, description="Texto a buscar"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT, description="Máximo de resultados por página"),
+    after: Optional[str] = Query(None, description=f"Cursor devuelto en el header {NEXT_CURSOR_HEADER}"),
+    prefix: bool = Query(True, description="Buscar la última palabra como prefijo (autocompletado)")
+) -> SearchRequest:
+    """Dependency parsing ?q=&limit=&after=&prefix= into a SearchRequest"""
+    if after is None:
+        return SearchRequest(q=q, limit=limit, prefix=prefix)
+    try:
+        return SearchRequest(q=q, limit=limit, after=decode_search_cursor(after), prefix=prefix)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def paginate_search(response: Response, page: SearchPage) -> List[SearchHit]:
+    """paginate() for search results"""
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_search_cursor(page.next_cursor)
+    return page.items
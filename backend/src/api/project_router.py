@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from typing import Generator, List, Optional
 from sqlalchemy.orm import Session
 
+from models.pagination import PageRequest
+from models.job import Job
 from models.user import User
-from models.project import ProjectCreate, Project
+from models.project import ProjectCreate, Project, ProjectStats
 from services.project_service import ProjectService
-from config.database import get_db
+from api.etag import PROJECT_TASKS, USER_PROJECTS, make_etag, not_modified
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import get_db, get_read_db, get_reader_id, read_session
 from config.auth_dependency import get_current_user
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
@@ -15,6 +20,35 @@ def get_project_service(db: Session = Depends(get_db)) -> ProjectService:
     return ProjectService(db)
 
 
+def get_project_read_service(db: Session = Depends(get_read_db)) -> ProjectService:
+    """ProjectService on a read replica, for the GET routes"""
+    return ProjectService(db)
+
+
+def get_user_projects_read_service(
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> Generator[ProjectService, None, None]:
+    """ProjectService for the reads sent or cached with the user's project version: on the primary right after it moves"""
+    written = [ProjectService.project_list_cache.written_key(reader_id)] if reader_id is not None else []
+    db = read_session(reader_id, written)
+    try:
+        yield ProjectService(db)
+    finally:
+        db.close()
+
+
+def get_project_stats_read_service(
+    project_id: int,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> Generator[ProjectService, None, None]:
+    """ProjectService for the counters of a project, sent with its task version: on the primary right after it moves"""
+    db = read_session(reader_id, [ProjectService.stats_written_key(project_id)])
+    try:
+        yield ProjectService(db)
+    finally:
+        db.close()
+
+
 """Project endpoints.
 
 We expose both trailing and non-trailing slash variants because the main app
@@ -27,31 +61,57 @@ we accept both forms without a 307 redirect that previously downgraded scheme.
 @router.get("/", response_model=List[Project])
 @router.get("", response_model=List[Project], include_in_schema=False)
 def get_projects(
+    request: Request,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
     current_user: User = Depends(get_current_user),
-    service: ProjectService = Depends(get_project_service)
+    service: ProjectService = Depends(get_user_projects_read_service)
 ):
-    """Listar todos los proyectos del usuario autenticado"""
-    return service.get_projects_by_user(current_user.id)
-
-
-@router.post("/", response_model=Project)
-@router.post("", response_model=Project, include_in_schema=False)
+    """Listar los proyectos del usuario autenticado (paginado), o los de ?ids="""
+    etag = make_etag(USER_PROJECTS, current_user.id, service.get_user_version(current_user.id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    if ids is not None:
+        return batch_response(response, ids, service.get_projects_by_ids(current_user.id, ids))
+    return paginate(response, service.get_projects_by_user(current_user.id, page))
+
+
+@router.post("/", response_model=Job, status_code=202)
+@router.post("", response_model=Job, status_code=202, include_in_schema=False)
 def create_project(
     project: ProjectCreate,
+    response: Response,
     current_user: User = Depends(get_current_user),
     service: ProjectService = Depends(get_project_service)
 ):
-    """Crear un nuevo proyecto"""
-    return service.create_project(project, current_user.id)
+    """Encolar la creación de un proyecto; su estado se consulta en /api/jobs/{id}"""
+    job = service.create_project(project, current_user.id)
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
+
+
+@router.get("/stats", response_model=List[ProjectStats])
+def get_projects_stats(
+    current_user: User = Depends(get_current_user),
+    service: ProjectService = Depends(get_project_read_service)
+):
+    """Contadores de tareas (total, completadas, subtareas) de todos los proyectos del usuario autenticado"""
+    return service.get_user_project_stats(current_user.id)
 
 
 @router.get("/{project_id}", response_model=Project)
 def get_project(
     project_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    service: ProjectService = Depends(get_project_service)
+    service: ProjectService = Depends(get_user_projects_read_service)
 ):
     """Obtener un proyecto específico"""
+    # Projects are immutable, any change to them bumps their owner's version
+    version = service.get_user_version(current_user.id)
     project = service.get_project_by_id(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Proyecto no encontrado")
@@ -61,9 +121,37 @@ def get_project(
         raise HTTPException(
             status_code=403, detail="No tienes permiso para acceder a este proyecto")
 
+    unchanged = not_modified(request, response, make_etag(USER_PROJECTS, current_user.id, version, item=project.id))
+    if unchanged:
+        return unchanged
     return project
 
 
+@router.get("/{project_id}/stats", response_model=ProjectStats)
+def get_project_stats(
+    project_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: ProjectService = Depends(get_project_stats_read_service)
+):
+    """Contadores de tareas de un proyecto (total, completadas, subtareas)"""
+    version = service.get_stats_version(project_id)
+    project = service.get_project_by_id(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+
+    # Verify user owns the project
+    if project.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="No tienes permiso para acceder a este proyecto")
+
+    unchanged = not_modified(request, response, make_etag(PROJECT_TASKS, project_id, version))
+    if unchanged:
+        return unchanged
+    return service.get_project_stats(project_id)
+
+
 @router.delete("/{project_id}")
 def delete_project(
     project_id: int,
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Response
+from typing import List
+from sqlalchemy.orm import Session
+
+from models.search import SearchHit, SearchRequest
+from models.user import User
+from services.search_service import SearchService
+from api.pagination import paginate_search, search_request
+from config.database import get_read_db
+from config.auth_dependency import get_current_user
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+def get_search_service(db: Session = Depends(get_read_db)) -> SearchService:
+    return SearchService(db)
+
+
+"""Search endpoint (accepts both with/without trailing slash).
+See project_router for rationale.
+"""
+
+
+@router.get("/", response_model=List[SearchHit])
+@router.get("", response_model=List[SearchHit], include_in_schema=False)
+def search(
+    response: Response,
+    request: SearchRequest = Depends(search_request),
+    current_user: User = Depends(get_current_user),
+    service: SearchService = Depends(get_search_service)
+):
+    """Buscar en los proyectos del usuario y sus tareas, por relevancia (paginado)"""
+    return paginate_search(response, service.search(current_user.id, request))
@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import aclosing
+from typing import Awaitable, Callable, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from models.user import User
+from services.project_service import ProjectService
+from config.auth_dependency import get_current_user, user_id_from_token
+from config.database import read_session
+from config.events import STREAM_MAX_PROJECTS, change_event_stream, change_events
+
+router = APIRouter(prefix="/api/stream", tags=["stream"])
+
+WEBSOCKET_AUTH_TIMEOUT = 10  # seconds for the client to send its token
+
+
+"""Change stream endpoints.
+
+Async def in both modes, like the job events: an open stream must not hold one
+of the threads that serve the sync routes. Project ownership is checked on a
+session of its own, closed before streaming starts, so a stream never holds a
+database connection.
+"""
+
+
+def check_stream_projects(user_id: int, project_ids: List[int]) -> List[int]:
+    """The requested projects if all of them belong to the user, raises otherwise"""
+    if len(project_ids) > STREAM_MAX_PROJECTS:
+        raise HTTPException(status_code=400, detail=f"Máximo {STREAM_MAX_PROJECTS} proyectos por conexión")
+    if not project_ids:
+        return []
+    with read_session(user_id) as db:
+        owned = ProjectService(db).get_owned_project_ids(user_id, project_ids)
+    if len(owned) != len(set(project_ids)):
+        raise HTTPException(status_code=403, detail="No tienes permiso para acceder a este proyecto")
+    return owned
+
+
+def stream_project_ids(
+    project_id: List[int] = Query([], description="Proyectos de los que recibir los cambios de tareas"),
+    current_user: User = Depends(get_current_user)
+) -> List[int]:
+    return check_stream_projects(current_user.id, project_id)
+
+
+@router.get("/")
+@router.get("", include_in_schema=False)
+async def stream(
+    current_user: User = Depends(get_current_user),
+    project_ids: List[int] = Depends(stream_project_ids)
+):
+    """Recibir como Server-Sent Events los cambios de los proyectos del usuario y de las tareas de los proyectos pedidos"""
+    return StreamingResponse(
+        change_event_stream(current_user.id, project_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, project_id: List[int] = Query([])):
+    """Same events as GET /api/stream over a WebSocket; the first message must be the JWT"""
+    await serve_websocket(websocket, project_id, lambda user_id, ids: run_in_threadpool(check_stream_projects, user_id, ids))
+
+
+async def serve_websocket(
+    websocket: WebSocket,
+    project_ids: List[int],
+    check_projects: Callable[[int, List[int]], Awaitable[List[int]]]
+) -> None:
+    """
+    Authenticate a WebSocket with its first message, then send it change events as JSON
+
+    Args:
+        websocket: Connection, not accepted yet
+        project_ids: Requested projects
+        check_projects: check_stream_projects for the mode's database access
+    """
+    await websocket.accept()
+    try:
+        async with asyncio.timeout(WEBSOCKET_AUTH_TIMEOUT):
+            token = await websocket.receive_text()
+    except (TimeoutError, WebSocketDisconnect):
+        await _close(websocket, "Token requerido")
+        return
+
+    user_id = user_id_from_token(token.removeprefix("Bearer ").strip())
+    if user_id is None:
+        await _close(websocket, "Token inválido")
+        return
+    try:
+        project_ids = await check_projects(user_id, project_ids)
+    except HTTPException as e:
+        await _close(websocket, e.detail)
+        return
+
+    try:
+        async with aclosing(change_events(user_id, project_ids)) as changes:
+            async for event, data in changes:
+                await websocket.send_text(f'{{"event": "{event}", "data": {data or "null"}}}')
+    except WebSocketDisconnect:
+        pass
+
+
+async def _close(websocket: WebSocket, reason: str) -> None:
+    try:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=reason)
+    except RuntimeError:
+        pass  # the client is already gone
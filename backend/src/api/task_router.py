@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Generator, List, Optional
 from sqlalchemy.orm import Session
 
-from models.task import TaskCreate, Task
+from models.pagination import PageRequest
+from models.task import TaskBulkItem, TaskBulkResult, TaskCreate, Task, TaskNode
 from models.user import User
 from services.task_service import TaskService
-from config.database import get_db
+from api.etag import PROJECT_TASKS, make_etag, not_modified, requested_versions
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import get_db, get_read_db, get_reader_id, read_session
 from config.auth_dependency import get_current_user
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
@@ -15,6 +19,36 @@ def get_task_service(db: Session = Depends(get_db)) -> TaskService:
     return TaskService(db)
 
 
+def get_task_read_service(db: Session = Depends(get_read_db)) -> TaskService:
+    """TaskService on a read replica, for the GET routes"""
+    return TaskService(db)
+
+
+def get_project_tasks_read_service(
+    project_id: int,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> Generator[TaskService, None, None]:
+    """TaskService for the reads of a project's tasks sent with its version: on the primary right after it moves"""
+    db = read_session(reader_id, [TaskService.project_versions.written_key(project_id)])
+    try:
+        yield TaskService(db)
+    finally:
+        db.close()
+
+
+def get_task_detail_read_service(
+    request: Request,
+    reader_id: Optional[int] = Depends(get_reader_id)
+) -> Generator[TaskService, None, None]:
+    """get_project_tasks_read_service for the projects named in If-None-Match, the versions GET /{task_id} may send"""
+    written = [TaskService.project_versions.written_key(project_id) for project_id, _ in requested_versions(request, PROJECT_TASKS)]
+    db = read_session(reader_id, written)
+    try:
+        yield TaskService(db)
+    finally:
+        db.close()
+
+
 """Task endpoints (root accepts both with/without trailing slash).
 See project_router for rationale.
 """
@@ -23,11 +57,21 @@ See project_router for rationale.
 @router.get("/", response_model=List[Task])
 @router.get("", response_model=List[Task], include_in_schema=False)
 def get_tasks(
+    response: Response,
+    completed: Optional[bool] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
     current_user: User = Depends(get_current_user),
-    service: TaskService = Depends(get_task_service)
+    service: TaskService = Depends(get_task_read_service)
 ):
-    """Listar todas las tareas"""
-    return service.get_all_tasks()
+    """Listar las tareas visibles para el usuario (proyectos propios o asignadas), paginado y filtrable, o las de ?ids="""
+    if ids is not None:
+        return batch_response(response, ids, service.get_tasks_by_ids(current_user.id, ids))
+    return paginate(response, service.get_all_tasks(
+        current_user.id, page, completed=completed, project_id=project_id, user_id=user_id
+    ))
 
 
 @router.post("/", response_model=Task)
@@ -41,16 +85,42 @@ def create_task(
     return service.create_task(task)
 
 
+@router.post("/bulk", response_model=TaskBulkResult, status_code=201)
+def create_tasks_bulk(
+    tasks: List[TaskBulkItem],
+    current_user: User = Depends(get_current_user),
+    service: TaskService = Depends(get_task_service)
+):
+    """Crear varias tareas en una sola transacción (las subtareas referencian a su padre por temp_id)"""
+    try:
+        return service.create_tasks_bulk(tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{task_id}", response_model=Task)
 def get_task(
     task_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    service: TaskService = Depends(get_task_service)
+    service: TaskService = Depends(get_task_detail_read_service)
 ):
     """Obtener una tarea específica"""
+    # The ETag names the project of the task, so the versions the client may hold are read before loading the task
+    versions = {}
+    for project_id, _ in requested_versions(request, PROJECT_TASKS):
+        versions[project_id] = service.get_project_version(project_id)
+
     task = service.get_task_by_id(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    # First request (or the task moved): a version read now could already include
+    # a write this task predates, send one that names the task but never matches
+    etag = make_etag(PROJECT_TASKS, task.project_id, versions.get(task.project_id, 0), item=task.id)
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
     return task
 
 
@@ -96,31 +166,42 @@ def delete_task(
 @router.get("/project/{project_id}", response_model=List[Task])
 def get_tasks_by_project(
     project_id: int,
+    request: Request,
+    response: Response,
+    page: PageRequest = Depends(page_request),
     current_user: User = Depends(get_current_user),
-    service: TaskService = Depends(get_task_service)
+    service: TaskService = Depends(get_project_tasks_read_service)
 ):
-    """Obtener todas las tareas de un proyecto"""
-    return service.get_tasks_by_project(project_id)
+    """Obtener las tareas de un proyecto (paginado)"""
+    etag = make_etag(PROJECT_TASKS, project_id, service.get_project_version(project_id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return paginate(response, service.get_tasks_by_project(project_id, page))
 
 
 @router.get("/user/{user_id}", response_model=List[Task])
 def get_tasks_by_user(
     user_id: int,
+    response: Response,
+    page: PageRequest = Depends(page_request),
     current_user: User = Depends(get_current_user),
-    service: TaskService = Depends(get_task_service)
+    service: TaskService = Depends(get_task_read_service)
 ):
-    """Obtener todas las tareas asignadas a un usuario"""
-    return service.get_tasks_by_user(user_id)
+    """Obtener las tareas asignadas a un usuario (paginado)"""
+    return paginate(response, service.get_tasks_by_user(user_id, page))
 
 
 @router.get("/{task_id}/subtasks", response_model=List[Task])
 def get_subtasks(
     task_id: int,
+    response: Response,
+    page: PageRequest = Depends(page_request),
     current_user: User = Depends(get_current_user),
-    service: TaskService = Depends(get_task_service)
+    service: TaskService = Depends(get_task_read_service)
 ):
-    """Obtener todas las subtareas de una tarea"""
-    return service.get_subtasks(task_id)
+    """Obtener las subtareas de una tarea (paginado)"""
+    return paginate(response, service.get_subtasks(task_id, page))
 
 
 @router.post("/{parent_task_id}/subtasks", response_model=Task)
@@ -138,3 +219,60 @@ def create_subtask(
             detail="No se puede crear subtarea. La tarea padre no permite subtareas o no existe"
         )
     return subtask
+
+
+@router.get("/{task_id}/tree", response_model=TaskNode)
+def get_task_tree(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=0, description="Niveles de subtareas a incluir (sin límite si se omite)"),
+    current_user: User = Depends(get_current_user),
+    service: TaskService = Depends(get_task_read_service)
+):
+    """Obtener una tarea con todas sus subtareas anidadas"""
+    tree = service.get_task_tree(task_id, max_depth)
+    if not tree:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return tree
+
+
+@router.get("/project/{project_id}/tree", response_model=List[TaskNode])
+def get_project_task_tree(
+    project_id: int,
+    request: Request,
+    response: Response,
+    max_depth: Optional[int] = Query(None, ge=0, description="Niveles de subtareas a incluir (sin límite si se omite)"),
+    current_user: User = Depends(get_current_user),
+    service: TaskService = Depends(get_project_tasks_read_service)
+):
+    """Obtener todas las tareas de un proyecto anidadas bajo sus tareas raíz"""
+    etag = make_etag(PROJECT_TASKS, project_id, service.get_project_version(project_id))
+    unchanged = not_modified(request, response, etag)
+    if unchanged:
+        return unchanged
+    return service.get_project_tree(project_id, max_depth)
+
+
+@router.delete("/{task_id}/tree")
+def delete_task_tree(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: TaskService = Depends(get_task_service)
+):
+    """Eliminar una tarea junto con todas sus subtareas"""
+    deleted = service.delete_task_tree(task_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return {"message": "Tareas eliminadas exitosamente", "deleted": deleted}
+
+
+@router.patch("/{task_id}/tree/complete")
+def complete_task_tree(
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    service: TaskService = Depends(get_task_service)
+):
+    """Marcar una tarea y todas sus subtareas como completadas"""
+    updated = service.complete_task_tree(task_id)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+    return {"message": "Tareas completadas exitosamente", "updated": updated}
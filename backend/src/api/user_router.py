@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
+from models.pagination import PageRequest
 from models.user import UserCreate, User
 from services.user_service import UserService
-from config.database import get_db
+from api.batch import batch_ids, batch_response
+from api.pagination import page_request, paginate
+from config.database import get_db, get_read_db
+from config.auth_dependency import get_current_user
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -13,6 +17,11 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:
     return UserService(db)
 
 
+def get_user_read_service(db: Session = Depends(get_read_db)) -> UserService:
+    """UserService on a read replica, for the GET routes"""
+    return UserService(db)
+
+
 """User endpoints (root accepts both with/without trailing slash).
 Redirects disabled at app level, so expose both to avoid 404.
 """
@@ -20,9 +29,17 @@ Redirects disabled at app level, so expose both to avoid 404.
 
 @router.get("/", response_model=List[User])
 @router.get("", response_model=List[User], include_in_schema=False)
-def get_users(service: UserService = Depends(get_user_service)):
-    """Listar todos los usuarios"""
-    return service.get_all_users()
+def get_users(
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    ids: Optional[List[int]] = Depends(batch_ids),
+    current_user: User = Depends(get_current_user),
+    service: UserService = Depends(get_user_read_service)
+):
+    """Listar los usuarios (paginado), o los de ?ids="""
+    if ids is not None:
+        return batch_response(response, ids, service.get_users_by_ids(ids))
+    return paginate(response, service.get_all_users(page))
 
 
 @router.post("/", response_model=User)
@@ -38,7 +55,8 @@ def create_user(
 @router.get("/{user_id}", response_model=User)
 def get_user(
     user_id: int,
-    service: UserService = Depends(get_user_service)
+    current_user: User = Depends(get_current_user),
+    service: UserService = Depends(get_user_read_service)
 ):
     """Obtener un usuario específico"""
     user = service.get_user_by_id(user_id)
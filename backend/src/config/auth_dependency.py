@@ -1,10 +1,12 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from config.database import get_db
+from config.database import AsyncSessionLocal, SessionLocal, get_async_read_db, get_read_db
 from config.jwt import verify_token
-from services.user_service import UserService
+from services.user_service import AsyncUserService, UserService
 from models.user import User
 
 # Security scheme for JWT Bearer token
@@ -12,14 +14,20 @@ security = HTTPBearer()
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> User:
     """
     Dependency to get the current authenticated user from JWT token
 
+    The user is served from the users entity cache (UserService.user_cache)
+    when possible, so most authenticated requests never touch the database
+    here, and an update or delete reaches every process through its
+    invalidation.
+
     Args:
         credentials: HTTP Authorization credentials containing the JWT token
-        db: Database session
+        db: Read session; a user missing there (e.g. just registered, not
+            replicated yet) is looked up again on the primary
 
     Returns:
         User object of the authenticated user
@@ -27,8 +35,42 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    token = credentials.credentials
+    user_id = _get_user_id(credentials.credentials)
+
+    user = UserService(db).get_user_by_id(user_id)
+    if user is None:
+        with SessionLocal() as primary:
+            user = UserService(primary).get_user_by_id(user_id)
+
+    if user is None:
+        raise _user_not_found()
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db)
+) -> User:
+    """Async variant of get_current_user for the async routers"""
+    user_id = _get_user_id(credentials.credentials)
+
+    user = await AsyncUserService(db).get_user_by_id(user_id)
+    if user is None:
+        async with AsyncSessionLocal() as primary:
+            user = await AsyncUserService(primary).get_user_by_id(user_id)
 
+    if user is None:
+        raise _user_not_found()
+    return user
+
+def user_id_from_token(token: str) -> Optional[int]:
+    """User id of a valid token, None otherwise (for connections without HTTP errors, i.e. WebSockets)"""
+    try:
+        return _get_user_id(token)
+    except HTTPException:
+        return None
+
+def _get_user_id(token: str) -> int:
+    """Verify the JWT and return the user ID it was issued for"""
     # Verify and decode token
     payload = verify_token(token)
     if payload is None:
@@ -47,15 +89,11 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from database
-    user_service = UserService(db)
-    user = user_service.get_user_by_id(int(user_id))
+    return int(user_id)
 
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    return user
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+from redis.exceptions import RedisError
+
+from config import metrics
+from config.database import DB_READ_YOUR_WRITES_WINDOW, record_current_write
+from config.events import change_event
+from config.redis_client import async_redis_client, redis_client
+
+# Deletes the lock only if we still own it (the lock may have expired and been
+# taken by another filler in the meantime).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class VersionCounter:
+    """
+    Per-scope version counters in Redis, bumped by writers after they commit.
+
+    A missing counter (never bumped, or lost with Redis' data) is seeded with
+    the current time in milliseconds rather than starting over at 0, so a
+    version handed out before the loss (e.g. inside an ETag a client kept) is
+    not handed out again for different data.
+
+    With ``event`` set, every bump also publishes that change event for the
+    scope (config.events), in the same round trip.
+
+    Every bump also sets the scope's write mark (written_key) for
+    DB_READ_YOUR_WRITES_WINDOW, and the author's (record_current_write),
+    before the increment and the event: reads stamped with the version (ETags,
+    VersionedCache fills) pass it to read_session and go to the primary while
+    replicas may be behind the new version, for every reader.
+    """
+
+    def __init__(self, namespace: str, event: Optional[str] = None):
+        self.namespace = namespace
+        self.event = event
+
+    def version_key(self, scope: Any) -> str:
+        return f"{self.namespace}:{scope}:version"
+
+    def written_key(self, scope: Any) -> str:
+        """Set for DB_READ_YOUR_WRITES_WINDOW after every bump of ``scope``"""
+        return f"{self.namespace}:{scope}:written"
+
+    def get_version(self, scope: Any) -> int:
+        """Current version of ``scope``"""
+        version = redis_client.get(self.version_key(scope))
+        return int(version) if version is not None else self.seed_version(scope)
+
+    def seed_version(self, scope: Any) -> int:
+        """Start the missing counter of ``scope``, returns its version"""
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(self.version_key(scope), _seed(), nx=True)
+        pipe.get(self.version_key(scope))
+        return int(pipe.execute()[1])
+
+    def bump(self, scope: Any) -> None:
+        """Move ``scope`` to a new version. Call after the write commits."""
+        self.bump_many([scope])
+
+    def bump_many(self, scopes: Iterable[Any]) -> None:
+        """bump() every scope in one round trip"""
+        scopes = list(scopes)
+        keys = [self.version_key(scope) for scope in scopes]
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            self._queue_bumps(pipe, scopes)
+            pipe.execute()
+        except RedisError as e:
+            metrics.increment("cache_errors", self.namespace)
+            print(f"Cache invalidation failed for {', '.join(keys)}: {e}")
+
+    def _queue_bumps(self, pipe, scopes: List[Any]) -> None:
+        """Queue the increments (and change events) of ``scopes`` on a sync or async pipeline"""
+        record_current_write(pipe)
+        for scope in scopes:
+            pipe.set(self.written_key(scope), 1, px=int(DB_READ_YOUR_WRITES_WINDOW * 1000))
+            pipe.set(self.version_key(scope), _seed(), nx=True)
+            pipe.incr(self.version_key(scope))
+            if self.event is not None:
+                pipe.publish(*change_event(self.event, scope))
+
+    async def get_version_async(self, scope: Any) -> int:
+        version = await async_redis_client.get(self.version_key(scope))
+        return int(version) if version is not None else await self.seed_version_async(scope)
+
+    async def seed_version_async(self, scope: Any) -> int:
+        pipe = async_redis_client.pipeline(transaction=False)
+        pipe.set(self.version_key(scope), _seed(), nx=True)
+        pipe.get(self.version_key(scope))
+        return int((await pipe.execute())[1])
+
+    async def bump_async(self, scope: Any) -> None:
+        await self.bump_many_async([scope])
+
+    async def bump_many_async(self, scopes: Iterable[Any]) -> None:
+        scopes = list(scopes)
+        keys = [self.version_key(scope) for scope in scopes]
+        try:
+            pipe = async_redis_client.pipeline(transaction=False)
+            self._queue_bumps(pipe, scopes)
+            await pipe.execute()
+        except RedisError as e:
+            metrics.increment("cache_errors", self.namespace)
+            print(f"Cache invalidation failed for {', '.join(keys)}: {e}")
+
+
+def _seed() -> int:
+    return int(time.time() * 1000)
+
+
+class VersionedCache(VersionCounter):
+    """
+    Redis cache partitioned by scope (e.g. a user id) and invalidated by version.
+
+    Entries are stored under ``<namespace>:<scope>:data[:<variant>]``, where
+    the optional variant distinguishes several entries of one scope (e.g. pages
+    of a list) that are invalidated together, and carry the version they were
+    loaded at. Writers call bump(), which increments the scope's version
+    counter; readers fetch the counter and the entry with one MGET and treat
+    an entry of an older version as a miss. Refills are single-flight: the
+    first caller to miss takes a short lock and runs the loader, concurrent
+    callers wait for that fill instead of querying the database themselves.
+
+    If Redis is unavailable every call falls through to the loader. The
+    ``*_async`` methods do the same over the asyncio client and share keys with
+    the sync ones, so both request paths see each other's invalidations.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        event: Optional[str] = None,
+        ttl: int = 300,
+        lock_ttl_ms: int = 5000,
+        wait_timeout: float = 2.0,
+        poll_interval: float = 0.02,
+    ):
+        super().__init__(namespace, event)
+        self.ttl = ttl
+        self.lock_ttl_ms = lock_ttl_ms
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def data_key(self, scope: Any, variant: str = "") -> str:
+        key = f"{self.namespace}:{scope}:data"
+        return f"{key}:{variant}" if variant else key
+
+    def lock_key(self, scope: Any, version: int, variant: str = "") -> str:
+        key = f"{self.namespace}:{scope}:v{version}"
+        return f"{key}:{variant}:lock" if variant else f"{key}:lock"
+
+    def get_or_load(self, scope: Any, loader: Callable[[], Any], variant: str = "") -> Any:
+        """
+        Return the cached value for ``scope``, filling it with ``loader`` on a miss
+
+        Args:
+            scope: Partition of the cache, e.g. the user id
+            loader: Callable returning a JSON serializable value
+            variant: Entry within the scope, e.g. the page requested
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        try:
+            version, cached = redis_client.mget(self.version_key(scope), self.data_key(scope, variant))
+            version = int(version) if version is not None else self.seed_version(scope)
+        except RedisError:
+            metrics.increment("cache_errors", self.namespace)
+            return loader()
+
+        value = _decode(cached, version)
+        if value is not _MISS:
+            metrics.increment("cache_hits", self.namespace)
+            return value
+
+        metrics.increment("cache_misses", self.namespace)
+        try:
+            return self._fill(scope, version, variant, loader)
+        except RedisError:
+            metrics.increment("cache_errors", self.namespace)
+            return loader()
+
+    def _fill(self, scope: Any, version: int, variant: str, loader: Callable[[], Any]) -> Any:
+        data_key = self.data_key(scope, variant)
+        lock_key = self.lock_key(scope, version, variant)
+        token = uuid.uuid4().hex
+
+        if redis_client.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+            try:
+                value = loader()
+            except BaseException:
+                redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                raise
+            # Store and unlock in one round trip
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.setex(data_key, self.ttl, _encode(value, version))
+            pipe.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            pipe.execute()
+            return value
+
+        # Someone else is already loading this version: wait for their result.
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            value = _decode(redis_client.get(data_key), version)
+            if value is not _MISS:
+                metrics.increment("cache_coalesced", self.namespace)
+                return value
+
+        metrics.increment("cache_fill_timeouts", self.namespace)
+        return loader()
+
+    async def get_or_load_async(self, scope: Any, loader: Callable[[], Awaitable[Any]], variant: str = "") -> Any:
+        """Async variant of get_or_load, ``loader`` is a coroutine function"""
+        try:
+            version, cached = await async_redis_client.mget(self.version_key(scope), self.data_key(scope, variant))
+            version = int(version) if version is not None else await self.seed_version_async(scope)
+        except RedisError:
+            metrics.increment("cache_errors", self.namespace)
+            return await loader()
+
+        value = _decode(cached, version)
+        if value is not _MISS:
+            metrics.increment("cache_hits", self.namespace)
+            return value
+
+        metrics.increment("cache_misses", self.namespace)
+        try:
+            return await self._fill_async(scope, version, variant, loader)
+        except RedisError:
+            metrics.increment("cache_errors", self.namespace)
+            return await loader()
+
+    async def _fill_async(self, scope: Any, version: int, variant: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        data_key = self.data_key(scope, variant)
+        lock_key = self.lock_key(scope, version, variant)
+        token = uuid.uuid4().hex
+
+        if await async_redis_client.set(lock_key, token, nx=True, px=self.lock_ttl_ms):
+            try:
+                value = await loader()
+            except BaseException:
+                await async_redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                raise
+            pipe = async_redis_client.pipeline(transaction=False)
+            pipe.setex(data_key, self.ttl, _encode(value, version))
+            pipe.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            await pipe.execute()
+            return value
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            value = _decode(await async_redis_client.get(data_key), version)
+            if value is not _MISS:
+                metrics.increment("cache_coalesced", self.namespace)
+                return value
+
+        metrics.increment("cache_fill_timeouts", self.namespace)
+        return await loader()
+
+
+_MISS = object()
+
+
+def _encode(value: Any, version: int) -> str:
+    return f"{version}:{json.dumps(value)}"
+
+
+def _decode(cached: Optional[str], version: int) -> Any:
+    """The cached value if it was loaded at ``version``, _MISS otherwise"""
+    if cached is None:
+        return _MISS
+    cached_version, _, payload = cached.partition(":")
+    return json.loads(payload) if cached_version == str(version) else _MISS
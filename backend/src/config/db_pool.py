@@ -0,0 +1,93 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolStats:
+    """Checkout wait time histogram and timeout counter for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(WAIT_BUCKETS) + 1)  # last bucket is +Inf
+        self._wait_count = 0
+        self._wait_sum = 0.0
+        self._timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self._wait_count += 1
+            self._wait_sum += seconds
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Current pool occupancy plus the accumulated wait statistics"""
+        with self._lock:
+            buckets = list(self._buckets)
+            wait_count = self._wait_count
+            wait_sum = self._wait_sum
+            timeouts = self._timeouts
+
+        # Cumulative counts, Prometheus style ("le" = less or equal)
+        histogram = {}
+        running = 0
+        for bound, count in zip(list(WAIT_BUCKETS) + ["+Inf"], buckets):
+            running += count
+            histogram[str(bound)] = running
+
+        stats: Dict[str, Any] = {
+            "pool": type(pool).__name__,
+            "checkout_wait_seconds": {"buckets": histogram, "count": wait_count, "sum": wait_sum},
+            "checkout_timeouts": timeouts,
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout and counts checkout timeouts into ``stats``"""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        if self.stats is None:
+            return super()._do_get()
+
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        finally:
+            self.stats.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool, keep reporting into the same stats
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
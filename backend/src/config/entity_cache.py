@@ -0,0 +1,292 @@
+"""Read-through cache of single entities (projects, tasks, users by id).
+
+Two tiers: a bounded LRU with a short TTL in each process (L1) in front of
+Redis (L2). Entries can carry tags, e.g. every task is tagged with its
+project, so a write that touches many rows (a subtree, a move) invalidates
+them all without knowing their ids.
+
+Invalidation deletes the L2 entries and publishes their ids on
+``cache:invalidate`` in the same Lua script; every uvicorn process receives it
+through its EventBroker subscription and evicts its L1 copies. The writer
+evicts its own copies right away. L1 is only used while the broker is
+connected, and is cleared when it reconnects, so a process never serves L1
+entries it could have missed the invalidation of. An L1 entry never outlives
+its L2 entry, whose tag membership is what invalidation goes through.
+
+After an invalidation the entity (or tag) is not cached again for
+ENTITY_CACHE_FILL_HOLD seconds: a read that started before the write
+committed, or that went to a lagging replica, cannot store the old row.
+"""
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterable, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from config import metrics
+from config.events import broker
+from config.redis_client import async_redis_client, redis_client
+from config.ttl_cache import TTLCache
+
+# Entity types cached, comma separated (projects, tasks, users); every process
+# of a deployment should use the same list, disabled types are not invalidated
+ENTITY_CACHE_TYPES = {name.strip() for name in os.getenv("ENTITY_CACHE_TYPES", "projects,tasks,users").split(",") if name.strip()}
+ENTITY_CACHE_TTL = int(os.getenv("ENTITY_CACHE_TTL", "300"))  # seconds in Redis
+ENTITY_CACHE_L1_TTL = float(os.getenv("ENTITY_CACHE_L1_TTL", "30"))  # seconds in process, at most the Redis TTL left
+ENTITY_CACHE_L1_SIZE = int(os.getenv("ENTITY_CACHE_L1_SIZE", "10000"))  # entries per type and process
+# Seconds an invalidated entity or tag is not cached again; keep it above the replica lag
+ENTITY_CACHE_FILL_HOLD = float(os.getenv("ENTITY_CACHE_FILL_HOLD", "5"))
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# KEYS[1]: entry, KEYS[2]: its hold marker, then (tag set, tag hold marker) pairs.
+# ARGV: payload, ttl ms, entity id. Stores nothing while a hold marker exists.
+_FILL_SCRIPT = """
+for i = 2, #KEYS, 2 do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        return 0
+    end
+end
+local ttl = tonumber(ARGV[2])
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ttl)
+for i = 3, #KEYS, 2 do
+    redis.call('SADD', KEYS[i], ARGV[3])
+    redis.call('PEXPIRE', KEYS[i], ttl)
+end
+return 1
+"""
+
+# ARGV: key prefix, hold ms, entity type, channel, number of ids, then the ids
+# and the tags. Deletes the entries (the tags' members too), sets the hold
+# markers and publishes the ids; returns them.
+_INVALIDATE_SCRIPT = """
+local prefix = ARGV[1]
+local hold = tonumber(ARGV[2])
+local id_count = tonumber(ARGV[5])
+local ids = {}
+for i = 6, #ARGV do
+    if i < 6 + id_count then
+        ids[#ids + 1] = ARGV[i]
+        redis.call('SET', prefix .. ARGV[i] .. ':hold', 1, 'PX', hold)
+    else
+        local tag = prefix .. 'tag:' .. ARGV[i]
+        for _, member in ipairs(redis.call('SMEMBERS', tag)) do
+            ids[#ids + 1] = member
+        end
+        redis.call('DEL', tag)
+        redis.call('SET', tag .. ':hold', 1, 'PX', hold)
+    end
+end
+for _, id in ipairs(ids) do
+    redis.call('DEL', prefix .. id)
+end
+if #ids > 0 then
+    redis.call('PUBLISH', ARGV[4], '{"type":"' .. ARGV[3] .. '","ids":[' .. table.concat(ids, ',') .. ']}')
+end
+return ids
+"""
+
+T = TypeVar("T", bound=BaseModel)
+
+_caches: Dict[str, "EntityCache"] = {}
+
+
+class EntityCache(Generic[T]):
+    """
+    Cache of one entity type, keyed by id
+
+    Args:
+        name: Entity type, as listed in ENTITY_CACHE_TYPES
+        model: Pydantic model the entities are stored as
+        tags: Tags of an entity, e.g. ``lambda task: [f"project:{task.project_id}"]``
+    """
+
+    def __init__(self, name: str, model: Type[T], tags: Callable[[T], Iterable[str]] = lambda entity: ()):
+        self.name = name
+        self.model = model
+        self.tags = tags
+        self.enabled = name in ENTITY_CACHE_TYPES
+        self.prefix = f"entity:{name}:"
+        self._local = TTLCache(maxsize=ENTITY_CACHE_L1_SIZE, ttl=ENTITY_CACHE_L1_TTL)
+        # Bumped on every local eviction: a fill that raced with one does not reach L1
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, entity_id: int, loader: Callable[[], Optional[T]]) -> Optional[T]:
+        """
+        The entity with ``entity_id``, from L1, L2 or ``loader`` (the database)
+
+        Misses (None) are not cached. Falls through to ``loader`` when Redis
+        is unavailable.
+        """
+        if not self.enabled:
+            return loader()
+        entity = self._local_get(entity_id)
+        if entity is not None:
+            return entity
+
+        generation = self._generation
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.get(self._key(entity_id))
+            pipe.pttl(self._key(entity_id))
+            cached, ttl_ms = pipe.execute()
+        except RedisError:
+            metrics.increment("entity_cache_errors", self.name)
+            return loader()
+        if cached is not None:
+            metrics.increment("entity_cache_hits", f"{self.name}:l2")
+            entity = self.model.model_validate_json(cached)
+            self._local_set(entity_id, entity, ttl_ms, generation)
+            return entity
+
+        metrics.increment("entity_cache_misses", self.name)
+        entity = loader()
+        if entity is not None:
+            try:
+                if redis_client.eval(_FILL_SCRIPT, *self._fill_args(entity_id, entity)):
+                    self._local_set(entity_id, entity, ENTITY_CACHE_TTL * 1000, generation)
+            except RedisError:
+                metrics.increment("entity_cache_errors", self.name)
+        return entity
+
+    async def get_async(self, entity_id: int, loader: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        """get() over the asyncio client, ``loader`` is a coroutine function"""
+        if not self.enabled:
+            return await loader()
+        entity = self._local_get(entity_id)
+        if entity is not None:
+            return entity
+
+        generation = self._generation
+        try:
+            pipe = async_redis_client.pipeline(transaction=False)
+            pipe.get(self._key(entity_id))
+            pipe.pttl(self._key(entity_id))
+            cached, ttl_ms = await pipe.execute()
+        except RedisError:
+            metrics.increment("entity_cache_errors", self.name)
+            return await loader()
+        if cached is not None:
+            metrics.increment("entity_cache_hits", f"{self.name}:l2")
+            entity = self.model.model_validate_json(cached)
+            self._local_set(entity_id, entity, ttl_ms, generation)
+            return entity
+
+        metrics.increment("entity_cache_misses", self.name)
+        entity = await loader()
+        if entity is not None:
+            try:
+                if await async_redis_client.eval(_FILL_SCRIPT, *self._fill_args(entity_id, entity)):
+                    self._local_set(entity_id, entity, ENTITY_CACHE_TTL * 1000, generation)
+            except RedisError:
+                metrics.increment("entity_cache_errors", self.name)
+        return entity
+
+    def invalidate(self, ids: Iterable[int] = (), tags: Iterable[str] = ()) -> None:
+        """Evict entities by id and by tag, in every process. Call after the write commits."""
+        args = self._invalidate_args(ids, tags)
+        if args is None:
+            return
+        try:
+            evicted = redis_client.eval(_INVALIDATE_SCRIPT, *args)
+        except RedisError as e:
+            metrics.increment("entity_cache_errors", self.name)
+            print(f"Entity cache invalidation failed for {self.name}: {e}")
+            evicted = []
+        self.evict(list(ids) + [int(entity_id) for entity_id in evicted])
+
+    async def invalidate_async(self, ids: Iterable[int] = (), tags: Iterable[str] = ()) -> None:
+        args = self._invalidate_args(ids, tags)
+        if args is None:
+            return
+        try:
+            evicted = await async_redis_client.eval(_INVALIDATE_SCRIPT, *args)
+        except RedisError as e:
+            metrics.increment("entity_cache_errors", self.name)
+            print(f"Entity cache invalidation failed for {self.name}: {e}")
+            evicted = []
+        self.evict(list(ids) + [int(entity_id) for entity_id in evicted])
+
+    def evict(self, ids: Optional[Iterable[int]] = None) -> None:
+        """Drop L1 copies of this process, all of them if ``ids`` is None"""
+        with self._generation_lock:
+            self._generation += 1
+        if ids is None:
+            self._local.clear()
+            return
+        for entity_id in ids:
+            self._local.delete(entity_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits per tier, misses and hit ratios of this process since it started"""
+        counters = metrics.snapshot()
+        l1 = counters.get("entity_cache_hits", {}).get(f"{self.name}:l1", 0)
+        l2 = counters.get("entity_cache_hits", {}).get(f"{self.name}:l2", 0)
+        misses = counters.get("entity_cache_misses", {}).get(self.name, 0)
+        return {
+            "enabled": self.enabled,
+            "l1_size": len(self._local),
+            "l1_hits": l1,
+            "l2_hits": l2,
+            "misses": misses,
+            "errors": counters.get("entity_cache_errors", {}).get(self.name, 0),
+            # Share of all lookups served by L1, and of those that reached Redis served by it
+            "l1_hit_ratio": round(l1 / (l1 + l2 + misses), 4) if l1 + l2 + misses else None,
+            "l2_hit_ratio": round(l2 / (l2 + misses), 4) if l2 + misses else None,
+        }
+
+    def _key(self, entity_id: int) -> str:
+        return f"{self.prefix}{entity_id}"
+
+    def _local_get(self, entity_id: int) -> Optional[T]:
+        if not broker.connected:
+            return None
+        entity = self._local.get(entity_id)
+        if entity is not None:
+            metrics.increment("entity_cache_hits", f"{self.name}:l1")
+        return entity
+
+    def _local_set(self, entity_id: int, entity: T, ttl_ms: int, generation: int) -> None:
+        # Only while invalidations arrive, and not past the Redis entry
+        if broker.connected and generation == self._generation and ttl_ms > 0:
+            self._local.set(entity_id, entity, ttl=min(ENTITY_CACHE_L1_TTL, ttl_ms / 1000))
+
+    def _fill_args(self, entity_id: int, entity: T) -> List[Any]:
+        keys = [self._key(entity_id), f"{self._key(entity_id)}:hold"]
+        for tag in self.tags(entity):
+            keys += [f"{self.prefix}tag:{tag}", f"{self.prefix}tag:{tag}:hold"]
+        return [len(keys), *keys, entity.model_dump_json(), ENTITY_CACHE_TTL * 1000, entity_id]
+
+    def _invalidate_args(self, ids: Iterable[int], tags: Iterable[str]) -> Optional[List[Any]]:
+        if not self.enabled:
+            return None
+        ids = sorted(set(ids))
+        tags = sorted(set(tags))
+        if not ids and not tags:
+            return None
+        hold_ms = int(ENTITY_CACHE_FILL_HOLD * 1000)
+        return [0, self.prefix, hold_ms, self.name, INVALIDATION_CHANNEL, len(ids), *ids, *tags]
+
+
+def _on_invalidation(message: Optional[str]) -> None:
+    if message is None:
+        # Messages may have been lost
+        for cache in _caches.values():
+            cache.evict()
+        return
+    data = json.loads(message)
+    cache = _caches.get(data["type"])
+    if cache is not None:
+        cache.evict(data["ids"])
+
+
+broker.on_message(INVALIDATION_CHANNEL, _on_invalidation)
+
+
+def entity_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """stats() of every entity cache"""
+    return {name: cache.stats() for name, cache in _caches.items()}
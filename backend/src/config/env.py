@@ -0,0 +1,6 @@
+import os
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment ("1", "true", "yes", "on")"""
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,242 @@
+"""Change notifications for GET /api/stream.
+
+Writers publish a small JSON message on Redis pub/sub when the version of a
+scope moves (see VersionCounter): ``events:user:<id>`` when the projects of a
+user change, ``events:project:<id>`` when the tasks of a project change. The
+message names what changed, never the data, so clients refetch, usually with
+the ETag they already have.
+
+Each process holds a single subscription (EventBroker) and fans messages out
+to its local streams. A stream costs a bounded queue of shared message strings
+and its generator; one whose client does not keep up drops messages and is
+sent a "resync" event instead, as it is after a Redis outage, telling the
+client to refetch everything it shows.
+"""
+import asyncio
+import json
+import os
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+from config.redis_client import async_pubsub_client
+
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))  # undelivered events per stream before a resync
+STREAM_HEARTBEAT_INTERVAL = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))  # seconds, keeps proxies from closing idle streams
+STREAM_MAX_PROJECTS = int(os.getenv("STREAM_MAX_PROJECTS", "50"))  # project subscriptions per stream
+
+# Always subscribed, so the broker's connection is never without a channel
+_CONTROL_CHANNEL = "events:broker"
+
+# (event name, JSON data), data is None for heartbeats
+Event = Tuple[str, Optional[str]]
+HEARTBEAT: Event = ("ping", None)
+RESYNC: Event = ("resync", "{}")
+
+
+def user_channel(user_id: int) -> str:
+    return f"events:user:{user_id}"
+
+
+def project_channel(project_id: int) -> str:
+    return f"events:project:{project_id}"
+
+
+# Event name -> channel of the scope it is published for
+_CHANNELS = {"projects": user_channel, "tasks": project_channel}
+_SCOPES = {"projects": "user_id", "tasks": "project_id"}
+
+
+def change_event(event: str, scope: int) -> Tuple[str, str]:
+    """(channel, message) announcing that the ``event`` data of ``scope`` changed"""
+    return _CHANNELS[event](scope), json.dumps({"type": event, _SCOPES[event]: scope})
+
+
+class Subscription:
+    """Inbox of one stream"""
+
+    __slots__ = ("channels", "queue", "lagging")
+
+    def __init__(self, channels: Iterable[str]):
+        self.channels = frozenset(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        self.lagging = False
+
+    def push(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    def resync(self) -> None:
+        self.lagging = True
+        # Wake the stream up if it is idle
+        if self.queue.empty():
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """One Redis subscription per process, shared by every local stream"""
+
+    def __init__(self):
+        self._listeners: Dict[str, Set[Subscription]] = {}
+        # Channels of in-process consumers (e.g. cache invalidations), subscribed for the broker's lifetime
+        self._handlers: Dict[str, Callable[[Optional[str]], None]] = {}
+        self._pubsub = None
+        # Serializes (un)subscribe commands on the shared connection
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.Task] = None
+        self._streams = 0
+
+    def start(self) -> None:
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+    async def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(channels)
+        self._streams += 1
+        new_channels = []
+        for channel in subscription.channels:
+            listeners = self._listeners.setdefault(channel, set())
+            if not listeners:
+                new_channels.append(channel)
+            listeners.add(subscription)
+        if new_channels:
+            await self._send("subscribe", new_channels)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        self._streams -= 1
+        unused = []
+        for channel in subscription.channels:
+            listeners = self._listeners.get(channel)
+            if listeners is None:
+                continue
+            listeners.discard(subscription)
+            if not listeners:
+                del self._listeners[channel]
+                unused.append(channel)
+        if unused:
+            await self._send("unsubscribe", unused)
+
+    def on_message(self, channel: str, handler: Callable[[Optional[str]], None]) -> None:
+        """
+        Call ``handler`` with every message published on ``channel``, from the event loop
+
+        Register before start(). The handler gets None whenever messages may
+        have been lost (after a reconnect) and while the broker is not
+        connected it is not called at all, see ``connected``.
+        """
+        self._handlers[channel] = handler
+
+    @property
+    def connected(self) -> bool:
+        return self._pubsub is not None
+
+    def stats(self) -> Dict[str, int]:
+        """Open streams (job waiters included) and subscribed channels of this process"""
+        return {"streams": self._streams, "channels": len(self._listeners), "connected": int(self._pubsub is not None)}
+
+    async def _send(self, command: str, channels) -> None:
+        async with self._lock:
+            if self._pubsub is None:
+                return  # the reader subscribes to every listened channel when it (re)connects
+            try:
+                await getattr(self._pubsub, command)(*channels)
+            except RedisError as e:
+                print(f"Event {command} failed for {', '.join(channels)}: {e}")
+
+    async def _read(self) -> None:
+        connected_before = False
+        while True:
+            pubsub = async_pubsub_client.pubsub()
+            try:
+                async with self._lock:
+                    await pubsub.subscribe(_CONTROL_CHANNEL, *self._handlers, *self._listeners)
+                    self._pubsub = pubsub
+                if connected_before:
+                    # Whatever was published while disconnected is lost
+                    self._resync_all()
+                connected_before = True
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=STREAM_HEARTBEAT_INTERVAL)
+                    if message is None:
+                        continue
+                    handler = self._handlers.get(message["channel"])
+                    if handler is not None:
+                        handler(message["data"])
+                    for subscription in tuple(self._listeners.get(message["channel"], ())):
+                        subscription.push(message["data"])
+            except RedisError as e:
+                print(f"Event subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                async with self._lock:
+                    self._pubsub = None
+                try:
+                    await pubsub.aclose()
+                except RedisError:
+                    pass
+
+    def _resync_all(self) -> None:
+        for handler in self._handlers.values():
+            handler(None)
+        for subscription in {s for listeners in self._listeners.values() for s in listeners}:
+            subscription.resync()
+
+
+broker = EventBroker()
+
+
+async def change_events(user_id: int, project_ids: Iterable[int]) -> AsyncIterator[Event]:
+    """
+    Changes of a user's projects and of the tasks of ``project_ids``, until the client goes away
+
+    Args:
+        user_id: Authenticated user, receives "projects" events
+        project_ids: Projects (already checked to be visible) to receive "tasks" events for
+
+    Returns:
+        An async iterator of (event, data), with a heartbeat every
+        STREAM_HEARTBEAT_INTERVAL seconds without events
+    """
+    project_ids = sorted(set(project_ids))
+    channels = [user_channel(user_id)] + [project_channel(project_id) for project_id in project_ids]
+    subscription = await broker.subscribe(channels)
+    try:
+        yield ("ready", json.dumps({"user_id": user_id, "project_ids": project_ids}))
+        while True:
+            try:
+                async with asyncio.timeout(STREAM_HEARTBEAT_INTERVAL):
+                    message = await subscription.queue.get()
+            except TimeoutError:
+                yield HEARTBEAT
+                continue
+            if subscription.lagging:
+                # Missed something: drop the backlog, the client refetches anyway
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.lagging = False
+                yield RESYNC
+            elif message is not None:
+                yield (json.loads(message)["type"], message)
+    finally:
+        await broker.unsubscribe(subscription)
+
+
+async def change_event_stream(user_id: int, project_ids: Iterable[int]) -> AsyncIterator[str]:
+    """change_events formatted as Server-Sent Events"""
+    # Closed with the stream, not whenever it is garbage collected, so the unsubscribe is immediate
+    async with aclosing(change_events(user_id, project_ids)) as changes:
+        async for event, data in changes:
+            yield ": ping\n\n" if data is None else f"event: {event}\ndata: {data}\n\n"
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import AsyncIterator, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from config.events import broker
+from config.redis_client import async_redis_client, redis_client
+from models.job import Job, JobStatus
+
+# Job state lives in a Redis hash per job, readable only by the user that
+# enqueued it. Every status change is also published on the job's channel so
+# waiters are woken up instead of polling. Waiters listen through the process'
+# shared subscription (config.events.broker), so they cost no Redis connection;
+# while it is down they poll the hash instead.
+JOB_STATUS_TTL = int(os.getenv("JOB_STATUS_TTL", "86400"))  # seconds
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))  # seconds between reads while pub/sub is down
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def job_channel(job_id: str) -> str:
+    return f"job:{job_id}:events"
+
+
+def set_job_status(pipe, job_id: str, status: JobStatus, user_id: Optional[int] = None, **fields) -> None:
+    """Queue a status change (and its notification) on ``pipe``, a sync or async pipeline"""
+    job = Job(id=job_id, status=status, **fields)
+    mapping = {key: value for key, value in job.model_dump(exclude={"id"}).items() if value is not None}
+    if user_id is not None:
+        mapping["user_id"] = user_id
+    pipe.hset(job_key(job_id), mapping=mapping)
+    pipe.expire(job_key(job_id), JOB_STATUS_TTL)
+    pipe.publish(job_channel(job_id), job.model_dump_json())
+
+
+def _to_job(job_id: str, data: Dict[str, str], user_id: int) -> Optional[Job]:
+    # Somebody else's job is reported as missing, like an unknown id
+    if not data or data.get("user_id") != str(user_id):
+        return None
+    return Job(id=job_id, status=data["status"], project_id=data.get("project_id"), error=data.get("error"))
+
+
+def get_job(job_id: str, user_id: int) -> Optional[Job]:
+    return _to_job(job_id, redis_client.hgetall(job_key(job_id)), user_id)
+
+
+async def get_job_async(job_id: str, user_id: int) -> Optional[Job]:
+    return _to_job(job_id, await async_redis_client.hgetall(job_key(job_id)), user_id)
+
+
+async def job_updates(job_id: str, user_id: int, timeout: float) -> AsyncIterator[Job]:
+    """
+    Yield the current state of a job and then every change until it finishes
+
+    Args:
+        job_id: Id returned when the job was enqueued
+        user_id: Owner of the job, anybody else gets nothing
+        timeout: Seconds to wait for changes before giving up
+
+    Returns:
+        An async iterator of Job states, empty if the job does not exist
+
+    Raises:
+        RedisError: The first read of the job failed
+    """
+    # Subscribe before reading so a change in between is not missed
+    subscription = await broker.subscribe([job_channel(job_id)])
+    try:
+        job = await get_job_async(job_id, user_id)
+        if job is None:
+            return
+        yield job
+
+        deadline = time.monotonic() + timeout
+        while not job.is_finished():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not broker.connected:
+                remaining = min(remaining, JOB_POLL_INTERVAL)
+            try:
+                async with asyncio.timeout(remaining):
+                    message = await subscription.queue.get()
+            except TimeoutError:
+                message = None
+            if message is not None and not subscription.lagging:
+                latest = Job.model_validate_json(message)
+            else:
+                # Poll, or messages were lost: the hash has the latest state
+                subscription.lagging = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                try:
+                    latest = await get_job_async(job_id, user_id)
+                except RedisError:
+                    continue
+                if latest is None or latest == job:
+                    continue
+            job = latest
+            yield job
+    finally:
+        await broker.unsubscribe(subscription)
+
+
+async def wait_for_job(job_id: str, user_id: int, timeout: float) -> Optional[Job]:
+    """Long-poll: the job once finished, or its current state after ``timeout`` seconds"""
+    job = None
+    async for job in job_updates(job_id, user_id, timeout):
+        pass
+    return job
+
+
+async def job_event_stream(job_id: str, user_id: int, timeout: float) -> AsyncIterator[str]:
+    """job_updates formatted as Server-Sent Events"""
+    async for job in job_updates(job_id, user_id, timeout):
+        yield f"event: status\ndata: {job.model_dump_json()}\n\n"
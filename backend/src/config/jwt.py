@@ -1,13 +1,21 @@
+import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import jwt
 from jwt.exceptions import InvalidTokenError
 
+from config.ttl_cache import TTLCache
+
 # Configuration - In production, use environment variables
 SECRET_KEY = "your-secret-key-change-this-in-production"  # TODO: Move to .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Decoded payloads of recently verified tokens, each kept until its "exp"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -34,14 +42,25 @@ def verify_token(token: str) -> Optional[dict]:
     """
     Verify and decode a JWT token
 
+    Valid tokens are memoized until they expire, so repeated requests with the
+    same token skip signature verification.
+
     Args:
         token: JWT token string to verify
 
     Returns:
         Decoded token payload if valid, None otherwise
     """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except InvalidTokenError:
         return None
+
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        _token_cache.set(token, payload, ttl=expires_in)
+    return payload
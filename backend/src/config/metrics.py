@@ -0,0 +1,25 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+# Process-local counters, keyed by (name, label). Cheap enough to bump on
+# every request; read through snapshot() by the /health endpoints.
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def increment(name: str, label: str = "", amount: int = 1) -> None:
+    """Increment the counter ``name`` for ``label``"""
+    with _lock:
+        _counters[(name, label)] += amount
+
+
+def snapshot() -> Dict[str, Dict[str, int]]:
+    """Return a copy of every counter grouped by name"""
+    with _lock:
+        items = list(_counters.items())
+
+    result: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for (name, label), value in items:
+        result[name][label] = value
+    return dict(result)
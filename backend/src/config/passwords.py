@@ -0,0 +1,122 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# Password hashing runs on a dedicated process pool: a KDF is CPU bound and
+# holds the GIL, in the request thread a login burst would stall every other
+# endpoint. At most PASSWORD_HASH_MAX_PENDING hashes may be queued or running
+# per process; past that callers get PasswordHasherBusy (HTTP 503) right away
+# instead of piling up threads waiting on the pool.
+PASSWORD_KDF = os.getenv("PASSWORD_KDF", "bcrypt")  # "bcrypt" or "argon2"
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "65536"))  # KiB
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+# Every scheme but the configured one is deprecated, so verify_password asks
+# for a rehash of legacy unsalted SHA-256 hashes (hex_sha256), of the other
+# KDF and of hashes made with a lower cost than the current one.
+_context = CryptContext(
+    schemes=[PASSWORD_KDF] + [scheme for scheme in ("bcrypt", "argon2", "hex_sha256") if scheme != PASSWORD_KDF],
+    default=PASSWORD_KDF,
+    deprecated=["auto"],
+    bcrypt__rounds=PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=PASSWORD_BCRYPT_ROUNDS,
+    argon2__time_cost=PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=PASSWORD_ARGON2_MEMORY_COST,
+)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many hashes pending, the caller should retry later"""
+
+
+def _hash(password: str) -> str:
+    return _context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return _context.verify_and_update(password, password_hash)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+
+def start_hasher() -> ProcessPoolExecutor:
+    """Start the worker processes (idempotent), so the first login does not pay for it"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+            for _ in range(PASSWORD_HASH_WORKERS):
+                _pool.submit(_hash, "warm-up")
+        return _pool
+
+
+def shutdown_hasher() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _submit(fn, *args) -> Future:
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        pool = start_hasher()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed): replace the whole pool once
+            _discard_pool(pool)
+            future = start_hasher().submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def hash_password(password: str) -> str:
+    return _submit(_hash, password).result()
+
+
+def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash
+
+    Returns:
+        (valid, new_hash): new_hash is set when the password is valid but the
+        stored hash is outdated and should be replaced by it
+    """
+    return _submit(_verify, password, password_hash).result()
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(_hash, password))
+
+
+async def verify_password_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_submit(_verify, password, password_hash))
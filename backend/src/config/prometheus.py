@@ -0,0 +1,185 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from anyio import to_thread
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import metrics
+
+# Prometheus metrics served by GET /metrics, per process (scrape every worker).
+# Request metrics are labelled by route template ("/api/tasks/{task_id}"),
+# never by raw path, so ids do not blow up the series count.
+REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements run by one HTTP request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time one HTTP request spent executing SQL statements", ["method", "route"]
+)
+DB_STATEMENT_SECONDS = Histogram("db_statement_duration_seconds", "SQL statement execution time")
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _RequestDB:
+    """SQL work of the current request, bumped by the engine events"""
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Copied into the threadpool (sync routes) and SQLAlchemy's greenlets (async
+# routes), both see the same _RequestDB object as the middleware
+_request_db: ContextVar[Optional[_RequestDB]] = ContextVar("request_db", default=None)
+
+
+class PrometheusMiddleware:
+    """Count and time every HTTP request, with the SQL statements and DB time it took"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request_db = _RequestDB()
+        token = _request_db.set(request_db)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUEST_DB_STATEMENTS.labels(method, route).observe(request_db.statements)
+            REQUEST_DB_SECONDS.labels(method, route).observe(request_db.seconds)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run through ``engine`` (for async engines, pass ``sync_engine``)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record_statement(conn)
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None and context.connection.info.get("statement_start"):
+        _record_statement(context.connection)
+
+
+def _record_statement(conn) -> None:
+    elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+    DB_STATEMENT_SECONDS.observe(elapsed)
+    request_db = _request_db.get()
+    if request_db is not None:
+        request_db.statements += 1
+        request_db.seconds += elapsed
+
+
+class _Scraped:
+    """Collector over metric families gathered for one scrape"""
+
+    def __init__(self, families: list):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+def render(pools: Dict[str, Dict[str, Any]], queue: Optional[Dict[str, Any]]) -> bytes:
+    """
+    Prometheus text exposition of every metric
+
+    Args:
+        pools: config.database.pool_stats()
+        queue: config.redis_utils.queue_stats(), None if Redis is unreachable
+
+    Must run on the event loop: the thread pool figures are the loop's.
+    """
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(_Scraped([*_counter_families(), *_pool_families(pools), *_threadpool_families(), *_queue_families(queue)]))
+    return generate_latest(REGISTRY) + generate_latest(registry)
+
+
+def _counter_families() -> Iterator[CounterMetricFamily]:
+    # config.metrics counters (cache hits/misses per namespace, enqueued jobs, ...)
+    for name, values in sorted(metrics.snapshot().items()):
+        family = CounterMetricFamily(name, f"{name} (config.metrics)", labels=["label"])
+        for label, value in sorted(values.items()):
+            family.add_metric([label], value)
+        yield family
+
+
+def _pool_families(pools: Dict[str, Dict[str, Any]]) -> Iterator:
+    connections = GaugeMetricFamily("db_pool_connections", "Connections of the pool by state", labels=["engine", "state"])
+    timeouts = CounterMetricFamily("db_pool_checkout_timeouts", "Checkouts that gave up waiting", labels=["engine"])
+    wait = HistogramMetricFamily("db_pool_checkout_wait_seconds", "Time waited for a free connection", labels=["engine"])
+    for name, stats in pools.items():
+        if "checkout_wait_seconds" not in stats:  # NullPool (PgBouncer mode)
+            continue
+        for state in ("size", "checked_out", "checked_in", "overflow"):
+            if state in stats:
+                connections.add_metric([name, state], stats[state])
+        timeouts.add_metric([name], stats["checkout_timeouts"])
+        histogram = stats["checkout_wait_seconds"]
+        wait.add_metric([name], list(histogram["buckets"].items()), histogram["sum"])
+    yield from (connections, timeouts, wait)
+
+
+def _threadpool_families() -> Iterator[GaugeMetricFamily]:
+    # Sync routes and dependencies run on anyio's default thread limiter
+    limiter = to_thread.current_default_thread_limiter()
+    threads = GaugeMetricFamily("threadpool_threads", "Worker threads of the sync route pool", labels=["state"])
+    threads.add_metric(["busy"], limiter.borrowed_tokens)
+    threads.add_metric(["limit"], limiter.total_tokens)
+    yield threads
+    yield GaugeMetricFamily(
+        "threadpool_tasks_waiting", "Calls waiting for a free worker thread", value=limiter.statistics().tasks_waiting
+    )
+
+
+def _queue_families(queue: Optional[Dict[str, Any]]) -> Iterator[GaugeMetricFamily]:
+    if queue is None:
+        return
+    jobs = GaugeMetricFamily("project_queue_jobs", "Project creation jobs by state", labels=["state"])
+    for state in ("depth", "in_flight", "dead"):
+        jobs.add_metric([state], queue[state])
+    yield jobs
+    yield GaugeMetricFamily("project_queue_consumers", "Live project workers", value=queue["consumers"])
+    throughput = GaugeMetricFamily(
+        "project_queue_jobs_per_second", "Jobs handled per second over the last minute, all workers", labels=["outcome"]
+    )
+    throughput.add_metric(["processed"], queue["processed_per_second"])
+    throughput.add_metric(["failed"], queue["failed_per_second"])
+    yield throughput
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Tuple
+
+from redis.exceptions import RedisError
+
+from config import metrics
+from config.env import env_bool
+from config.jwt import verify_token
+from config.redis_client import async_redis_client
+
+# Token buckets per client: every request takes a token from the bucket of its
+# IP (behind a proxy, run uvicorn with --proxy-headers and only the proxy's
+# address in --forwarded-allow-ips) and, when it carries a valid token, from the bucket
+# of the JWT "sub" too, so neither rotating tokens nor rotating IPs gets past
+# the limit. Each check is one atomic Lua script in Redis, so the limit holds
+# across uvicorn workers. If Redis errors or takes longer than
+# RATE_LIMIT_REDIS_TIMEOUT, the check falls back to per-process buckets (each
+# worker then allows the full limit) and Redis is retried after
+# RATE_LIMIT_REDIS_RETRY seconds.
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+# "<path prefix>=<requests>/<seconds>" rules, the longest matching prefix wins;
+# a path ending in "$" only matches itself. "default" applies to everything
+# else and 0 requests means no limit
+RATE_LIMITS = os.getenv(
+    "RATE_LIMITS",
+    "default=300/60,/api/auth/login=10/60,/api/auth/register=5/60,/api/tasks/bulk=20/60,/health$=10/10,/metrics=0/1",
+)
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.05"))  # seconds
+RATE_LIMIT_REDIS_RETRY = float(os.getenv("RATE_LIMIT_REDIS_RETRY", "5"))  # seconds
+RATE_LIMIT_LOCAL_SIZE = int(os.getenv("RATE_LIMIT_LOCAL_SIZE", "10000"))  # buckets kept per process
+
+# KEYS: buckets; ARGV: capacity, refill rate (tokens per second). Takes a
+# token from every bucket, or from none if one of them is empty. Returns
+# {allowed (0/1), milliseconds until every bucket has a token}. The clock is
+# Redis' own, so workers with skewed clocks still share one bucket.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local wait_ms = 0
+for i, key in ipairs(KEYS) do
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local ts = tonumber(bucket[2]) or now
+    tokens[i] = math.min(capacity, (tonumber(bucket[1]) or capacity) + math.max(0, now - ts) * rate)
+    if tokens[i] < 1 then
+        wait_ms = math.max(wait_ms, math.ceil((1 - tokens[i]) / rate * 1000))
+    end
+end
+local allowed = wait_ms == 0 and 1 or 0
+for i, key in ipairs(KEYS) do
+    local left = tokens[i] - allowed
+    redis.call('HSET', key, 'tokens', tostring(left), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - left) / rate * 1000) + 1000)
+end
+return {allowed, wait_ms}
+"""
+
+
+class RateLimit(NamedTuple):
+    prefix: str
+    capacity: int
+    per_seconds: float
+    exact: bool = False
+
+    @property
+    def rate(self) -> float:
+        """Tokens added back per second"""
+        return self.capacity / self.per_seconds
+
+
+def parse_rate_limits(value: str) -> Tuple[RateLimit, List[RateLimit]]:
+    """Parse RATE_LIMITS into the default rule and the path rules, exact paths first, then longest prefix first"""
+    default = RateLimit("default", 0, 1)
+    rules = []
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        prefix, limit = part.split("=")
+        requests, seconds = limit.split("/")
+        rule = RateLimit(prefix.removesuffix("$"), int(requests), float(seconds), prefix.endswith("$"))
+        if prefix == "default":
+            default = rule
+        else:
+            rules.append(rule)
+    return default, sorted(rules, key=lambda rule: (rule.exact, len(rule.prefix)), reverse=True)
+
+
+_default_rule, _rules = parse_rate_limits(RATE_LIMITS)
+_token_bucket = async_redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+_redis_retry_at = 0.0
+_local_buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+
+async def start_rate_limiter() -> None:
+    """Load the script and open a connection up front, so the first checks fit in the timeout"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    try:
+        await _token_bucket(keys=["ratelimit:warm-up"], args=[1, 1])
+    except (RedisError, OSError) as e:
+        print(f"Rate limiter: Redis unavailable ({e}), using per-process buckets for now")
+
+
+def rule_for(path: str) -> RateLimit:
+    for rule in _rules:
+        if path == rule.prefix if rule.exact else path.startswith(rule.prefix):
+            return rule
+    return _default_rule
+
+
+async def take_token(keys: List[str], rule: RateLimit) -> float:
+    """Take a token from each bucket in ``keys``, returns 0 if allowed or the seconds to wait otherwise"""
+    global _redis_retry_at
+    if time.monotonic() >= _redis_retry_at:
+        try:
+            allowed, wait_ms = await asyncio.wait_for(
+                _token_bucket(keys=keys, args=[rule.capacity, rule.rate]), RATE_LIMIT_REDIS_TIMEOUT
+            )
+            return 0 if allowed else wait_ms / 1000
+        except (RedisError, OSError, asyncio.TimeoutError):
+            metrics.increment("rate_limit_redis_errors")
+            _redis_retry_at = time.monotonic() + RATE_LIMIT_REDIS_RETRY
+    metrics.increment("rate_limit_local_checks")
+    return _take_local_token(keys, rule)
+
+
+def _take_local_token(keys: List[str], rule: RateLimit) -> float:
+    # Only touched from the event loop, no lock needed
+    now = time.monotonic()
+    buckets = []
+    for key in keys:
+        tokens, ts = _local_buckets.pop(key, (rule.capacity, now))
+        buckets.append(min(rule.capacity, tokens + (now - ts) * rule.rate))
+    wait = max((1 - tokens) / rule.rate for tokens in buckets) if min(buckets) < 1 else 0.0
+    for key, tokens in zip(keys, buckets):
+        _local_buckets[key] = (tokens if wait else tokens - 1, now)
+    while len(_local_buckets) > RATE_LIMIT_LOCAL_SIZE:
+        _local_buckets.popitem(last=False)
+    return wait
+
+
+def client_identities(scope) -> List[str]:
+    """``ip:<address>``, plus ``user:<sub>`` for a valid bearer token"""
+    client = scope.get("client")
+    identities = [f"ip:{client[0] if client else 'unknown'}"]
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            payload = verify_token(token) if scheme.lower() == "bearer" else None
+            if payload and payload.get("sub"):
+                identities.append(f"user:{payload['sub']}")
+            break
+    return identities
+
+
+class RateLimitMiddleware:
+    """Answer 429 with Retry-After once the client's bucket for the route is empty"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule = rule_for(scope["path"])
+        if rule.capacity > 0:
+            wait = await take_token([f"ratelimit:{rule.prefix}:{identity}" for identity in client_identities(scope)], rule)
+            if wait > 0:
+                metrics.increment("rate_limited", rule.prefix)
+                await _too_many_requests(send, wait)
+                return
+        await self.app(scope, receive, send)
+
+
+async def _too_many_requests(send, wait: float) -> None:
+    body = b'{"detail":"Too many requests, retry later"}'
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,8 +1,81 @@
+import os
+from typing import Any, Dict
+
 import redis
+import redis.asyncio
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# Connection pool, per client and per process. Callers queue for a free
+# connection up to REDIS_POOL_TIMEOUT, then get a ConnectionError (a RedisError,
+# which every cache path already treats as "Redis unavailable").
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "1"))  # seconds waiting for a free connection
+# Every command fails after REDIS_SOCKET_TIMEOUT instead of hanging a request on
+# a stuck server. Commands that block server-side (BLMOVE) need a client with a
+# longer timeout, see make_client.
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))  # seconds
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))  # seconds
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", "1"))  # on connection errors and timeouts, short backoff
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))  # seconds idle before a PING
+
+
+def _connection_options(**overrides) -> Dict[str, Any]:
+    options = dict(
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=True,
+    )
+    options.update(overrides)
+    return options
+
+
+def make_client(**overrides) -> redis.Redis:
+    """
+    Sync client with its own pool and the shared settings
+
+    Args:
+        overrides: Connection options to change, e.g. a socket_timeout above
+            the block timeout of BLMOVE
+
+    Returns:
+        A redis.Redis over a BlockingConnectionPool
+    """
+    pool = redis.BlockingConnectionPool.from_url(
+        REDIS_URL, retry=Retry(ExponentialBackoff(cap=0.1, base=0.01), REDIS_RETRIES), **_connection_options(**overrides)
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+def make_async_client(**overrides) -> redis.asyncio.Redis:
+    """make_client for the asyncio request path"""
+    pool = redis.asyncio.BlockingConnectionPool.from_url(
+        REDIS_URL, retry=AsyncRetry(ExponentialBackoff(cap=0.1, base=0.01), REDIS_RETRIES), **_connection_options(**overrides)
+    )
+    return redis.asyncio.Redis(connection_pool=pool)
+
+
+redis_client = make_client()
+
+# Same server for the async request path (API_MODE=async)
+async_redis_client = make_async_client()
+
+# The process' shared subscription (config.events.broker, which job waiters
+# and change streams listen through) holds its connection for good, so it gets
+# a pool of its own instead of taking one from the rest
+async_pubsub_client = make_async_client()
+
+
 
-redis_client = redis.Redis(
-    host="redis",
-    port=6379,
-    db=0,
-    decode_responses=True
-)
\ No newline at end of file
+async def close_clients() -> None:
+    """Disconnect the shared pools, on app shutdown"""
+    redis_client.connection_pool.disconnect()
+    await async_redis_client.connection_pool.disconnect()
+    await async_pubsub_client.connection_pool.disconnect()
@@ -1,11 +1,81 @@
 import json
-from config.redis_client import redis_client
+import time
+from typing import Any, Dict
+
+from config import metrics
+from config.jobs import new_job_id, set_job_status
+from config.redis_client import async_redis_client, redis_client
 
 QUEUE_NAME = "project_creation_queue"
+# Jobs that failed WORKER_MAX_ATTEMPTS times, kept for inspection
+DEAD_LETTER_QUEUE = f"{QUEUE_NAME}:dead"
+# Live consumers (sorted set: consumer id -> last heartbeat, unix seconds)
+CONSUMERS_KEY = f"{QUEUE_NAME}:consumers"
+# Jobs handled per second, one short-lived counter per second
+THROUGHPUT_WINDOW = 60
+
+def processing_key(consumer_id: str) -> str:
+    """In-flight jobs of one consumer, removed once acknowledged"""
+    return f"{QUEUE_NAME}:processing:{consumer_id}"
+
+def _throughput_key(name: str, second: int) -> str:
+    return f"{QUEUE_NAME}:{name}:{second}"
 
-def enqueue_project_task(project_data, user_id):
+def _project_task(job_id, project_data, user_id) -> str:
     task = {
+        "job_id": job_id,
         "user_id": user_id,
         "project_data": project_data.dict() if hasattr(project_data, "dict") else project_data
     }
-    redis_client.rpush(QUEUE_NAME, json.dumps(task))
\ No newline at end of file
+    return json.dumps(task)
+
+def enqueue_project_task(project_data, user_id) -> str:
+    """Queue a project creation, returns the id to follow it at /api/jobs/{id}"""
+    job_id = new_job_id()
+    pipe = redis_client.pipeline(transaction=True)
+    set_job_status(pipe, job_id, "queued", user_id=user_id)
+    pipe.rpush(QUEUE_NAME, _project_task(job_id, project_data, user_id))
+    pipe.execute()
+    metrics.increment("project_jobs_enqueued")
+    return job_id
+
+async def enqueue_project_task_async(project_data, user_id) -> str:
+    job_id = new_job_id()
+    pipe = async_redis_client.pipeline(transaction=True)
+    set_job_status(pipe, job_id, "queued", user_id=user_id)
+    pipe.rpush(QUEUE_NAME, _project_task(job_id, project_data, user_id))
+    await pipe.execute()
+    metrics.increment("project_jobs_enqueued")
+    return job_id
+
+def record_jobs(name: str, count: int) -> None:
+    """Add ``count`` to the current second's ``name`` counter (e.g. "processed")"""
+    key = _throughput_key(name, int(time.time()))
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.incrby(key, count)
+    pipe.expire(key, THROUGHPUT_WINDOW * 2)
+    pipe.execute()
+
+async def queue_stats() -> Dict[str, Any]:
+    """Backlog and throughput of the project creation queue, across every worker"""
+    now = int(time.time())
+    seconds = range(now - THROUGHPUT_WINDOW, now)
+    consumers = await async_redis_client.zrange(CONSUMERS_KEY, 0, -1)
+
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.llen(QUEUE_NAME)
+    pipe.llen(DEAD_LETTER_QUEUE)
+    for consumer_id in consumers:
+        pipe.llen(processing_key(consumer_id))
+    pipe.mget([_throughput_key("processed", second) for second in seconds])
+    pipe.mget([_throughput_key("failed", second) for second in seconds])
+    depth, dead, *in_flight, processed, failed = await pipe.execute()
+
+    return {
+        "depth": depth,
+        "in_flight": sum(in_flight),
+        "dead": dead,
+        "consumers": len(consumers),
+        "processed_per_second": sum(int(n or 0) for n in processed) / THROUGHPUT_WINDOW,
+        "failed_per_second": sum(int(n or 0) for n in failed) / THROUGHPUT_WINDOW,
+    }
@@ -0,0 +1,119 @@
+"""Boot sequence of the API process and the readiness it reports on GET /ready.
+
+The process answers GET /health (liveness) as soon as uvicorn is up. The
+database (wait with backoff, migrations only if the schema is behind) and the
+warm-up of the Postgres and Redis pools run in the background, and GET /ready
+answers 503 until they are done, so a load balancer only sends traffic to a
+replica that will not make its first requests wait on connection setup. With
+STARTUP_BACKGROUND=false the same sequence runs before uvicorn accepts
+requests, as it used to.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from config.database import DB_CONNECT_BACKOFF_MAX, init_db, warm_async_pool, warm_pool
+from config.env import env_bool
+from config.rate_limit import start_rate_limiter
+from config.redis_client import async_pubsub_client, async_redis_client, redis_client
+
+STARTUP_BACKGROUND = env_bool("STARTUP_BACKGROUND", True)
+STARTUP_REDIS_TIMEOUT = float(os.getenv("STARTUP_REDIS_TIMEOUT", "10"))  # seconds, then ready without a warm Redis
+
+# Steps in the order they run; /ready lists the ones already done
+STEPS = ("database", "pools", "redis")
+
+
+class Readiness:
+    """Runs the boot sequence once and remembers how far it got"""
+
+    def __init__(self):
+        self._started = time.monotonic()
+        self._done: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return len(self._done) == len(STEPS)
+
+    async def start(self, api_mode: str) -> None:
+        self._started = time.monotonic()
+        if STARTUP_BACKGROUND:
+            self._task = asyncio.create_task(self._prepare(api_mode))
+            self._task.add_done_callback(self._report_failure)
+        else:
+            await self._prepare(api_mode)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Ready flag plus the seconds after boot at which each step finished"""
+        return {
+            "ready": self.ready,
+            "uptime": round(time.monotonic() - self._started, 3),
+            "steps": {step: self._done.get(step) for step in STEPS},
+        }
+
+    async def _prepare(self, api_mode: str) -> None:
+        delay = 1.0
+        while True:
+            try:
+                # Blocking (psycopg2, and Alembic when it has to migrate): off the event loop
+                await asyncio.to_thread(init_db)
+                break
+            except Exception as e:
+                # Includes giving up after DB_CONNECT_TIMEOUT: keep trying, /ready stays 503
+                print(f"Database initialization failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, DB_CONNECT_BACKOFF_MAX)
+        self._mark("database")
+
+        try:
+            if api_mode == "async":
+                await warm_async_pool()
+            else:
+                await asyncio.to_thread(warm_pool)
+        except Exception as e:
+            # Warm-up only saves the first requests a connect; cold pools still work
+            print(f"Pool warm-up failed ({e}), ready with cold pools")
+        self._mark("pools")
+
+        try:
+            async with asyncio.timeout(STARTUP_REDIS_TIMEOUT):
+                await self._warm_redis(api_mode)
+        except (RedisError, OSError, TimeoutError) as e:
+            # Every Redis path already degrades without it, do not hold the replica back
+            print(f"Redis not reachable at startup ({e}), ready without it")
+        self._mark("redis")
+        print(f"Ready in {self._done['redis']:.2f}s")
+
+    @staticmethod
+    async def _warm_redis(api_mode: str) -> None:
+        await start_rate_limiter()
+        await async_pubsub_client.ping()
+        if api_mode == "async":
+            await async_redis_client.ping()
+        else:
+            await asyncio.to_thread(redis_client.ping)
+
+    @staticmethod
+    def _report_failure(task: asyncio.Task) -> None:
+        # Nothing awaits the background task, a crash would go unnoticed with /ready stuck at 503
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Startup failed, not ready: {task.exception()!r}")
+
+    def _mark(self, step: str) -> None:
+        self._done[step] = round(time.monotonic() - self._started, 3)
+
+
+readiness = Readiness()
@@ -1,24 +1,79 @@
+import os
 from datetime import datetime
 from typing import Any
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from redis.exceptions import RedisError
 from fastapi.middleware.cors import CORSMiddleware
 
-from config.database import init_db
-from api.project_router import router as project_router
-from api.user_router import router as user_router
-from api.task_router import router as task_router
-from api.auth_router import router as auth_router
+from config.database import ReadYourWritesMiddleware, async_engine, pool_stats
+from config.entity_cache import entity_cache_stats
+from config.events import broker
+from config.passwords import PasswordHasherBusy, shutdown_hasher, start_hasher
+from config.rate_limit import RateLimitMiddleware
+from config.redis_client import close_clients
+from config.startup import readiness
+from config import metrics, prometheus
+from config.redis_utils import queue_stats
+from api.batch import MISSING_IDS_HEADER
+from api.pagination import NEXT_CURSOR_HEADER
 from contextlib import asynccontextmanager
 
+# "sync": def routes on the anyio thread pool over psycopg2 (default)
+# "async": async def routes on the event loop over asyncpg
+API_MODE = os.getenv("API_MODE", "sync").lower()
+
+if API_MODE == "async":
+    from api.async_project_router import router as project_router
+    from api.async_user_router import router as user_router
+    from api.async_task_router import router as task_router
+    from api.async_auth_router import router as auth_router
+    from api.async_job_router import router as job_router
+    from api.async_search_router import router as search_router
+    from api.async_stream_router import router as stream_router
+elif API_MODE == "sync":
+    from api.project_router import router as project_router
+    from api.user_router import router as user_router
+    from api.task_router import router as task_router
+    from api.auth_router import router as auth_router
+    from api.job_router import router as job_router
+    from api.search_router import router as search_router
+    from api.stream_router import router as stream_router
+else:
+    raise ValueError(f"Unknown API_MODE {API_MODE!r}, expected 'sync' or 'async'")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
-    init_db()
+    """Start the background services; the database and the pools are prepared by config.startup"""
+    start_hasher()
+    broker.start()
+    await readiness.start(API_MODE)
     yield
+    await readiness.stop()
+    await broker.stop()
+    shutdown_hasher()
+    await async_engine.dispose()
+    await close_clients()
 
 app = FastAPI(title="Gestor de Proyectos API", lifespan=lifespan)
 app.router.redirect_slashes = False  # avoid 307 redirects
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    """Login/registration burst beyond PASSWORD_HASH_MAX_PENDING: shed load instead of queueing"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password checks in progress, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+# Innermost: marks a write once the route has committed it
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Added before CORS, so it runs inside CORS (429s carry CORS headers, preflights are not counted)
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,24 +81,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, MISSING_IDS_HEADER, "Location", "Retry-After", "ETag"],
 )
 
-# Include routers
-from repos import user_repository, task_repository, project_repository  # type: ignore Import to register all models
+# Outermost, so the latency covers CORS and error handling too
+app.add_middleware(prometheus.PrometheusMiddleware)
+
+# Include routers (their services import, and so register, every model)
 app.include_router(project_router)
 app.include_router(user_router)
 app.include_router(task_router)
 app.include_router(auth_router)
+app.include_router(job_router)
+app.include_router(search_router)
+app.include_router(stream_router)
 
 @app.get("/")
 def read_root() -> dict[str, Any]:
     return {
         "message": "Gestor de Proyectos API. en /docs tienen swagger para probar la api",
         "version": "1.0.0",
+        "mode": API_MODE,
         "endpoints": {
             "projects": "/api/projects",
             "users": "/api/users",
             "tasks": "/api/tasks",
+            "jobs": "/api/jobs/{id}",
+            "search": "/api/search?q=",
+            "stream": "/api/stream",
             "docs": "/docs",
             "redoc": "/redoc"
         }
@@ -52,8 +117,50 @@ def read_root() -> dict[str, Any]:
 @app.get("/health")
 @app.get("/api/health")
 async def health():
+    """Liveness: the process serves requests, whatever the state of its dependencies"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+@app.get("/api/ready")
+async def ready():
+    """Readiness: 200 once the database is migrated and the Postgres and Redis pools are warm, 503 before"""
+    state = readiness.snapshot()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@app.get("/health/cache")
+async def cache_health():
+    """Process-local cache counters (hits, misses, coalesced fills, errors)"""
+    return metrics.snapshot()
+
+@app.get("/health/cache/entities")
+async def entity_cache_health():
+    """Per entity type: L1 and L2 hits, misses and hit ratios of this process"""
+    return entity_cache_stats()
+
+@app.get("/health/pool")
+async def pool_health():
+    """Database connection pool occupancy, checkout wait histogram and timeouts"""
+    return pool_stats()
+
+@app.get("/health/queue")
+async def queue_health():
+    """Project creation backlog, in-flight and dead-lettered jobs and jobs/s across all workers"""
+    return await queue_stats()
+
+@app.get("/health/stream")
+async def stream_health():
+    """Change streams open in this process and the pub/sub channels they listen to"""
+    return broker.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: request latency per route, DB time per request, caches, pools and queue"""
+    try:
+        queue = await queue_stats()
+    except RedisError:
+        queue = None
+    return Response(prometheus.render(pool_stats(), queue), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000, proxy_headers=True, forwarded_allow_ips="*")
\ No newline at end of file
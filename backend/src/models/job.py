@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+class Job(BaseModel):
+    """Background project creation, as reported by GET /api/jobs/{id}"""
+    id: str
+    status: JobStatus
+    project_id: Optional[int] = None  # set once done
+    error: Optional[str] = None  # set once failed
+
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field
+from typing import AsyncIterable, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+from datetime import datetime
+
+# Keyset position: (created_at, id) of the last row of the previous page
+Cursor = Tuple[datetime, int]
+
+T = TypeVar("T")
+
+class PageRequest(BaseModel):
+    limit: int = 100
+    after: Optional[Cursor] = None
+    # Fetch rows as plain column dicts instead of domain models (FAST_JSON)
+    raw: bool = False
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[Cursor] = None
+    # Items are plain dicts, to be encoded as they are (not part of the dump)
+    raw: bool = Field(default=False, exclude=True)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[T], page: PageRequest, convert: Callable[[T], T] = lambda item: item) -> "Page[T]":
+        """
+        Build a page from up to ``page.limit + 1`` rows; the extra row only signals there is a next page
+
+        Raw pages keep the rows as they come, ``convert`` only applies to domain models.
+        """
+        items: List[T] = []
+        has_more = False
+        for row in rows:
+            if len(items) == page.limit:
+                has_more = True
+                break
+            items.append(row if page.raw else convert(row))
+
+        return cls._build(items, has_more, page.raw)
+
+    @classmethod
+    async def from_async_rows(cls, rows: AsyncIterable[T], page: PageRequest, convert: Callable[[T], T] = lambda item: item) -> "Page[T]":
+        items: List[T] = []
+        has_more = False
+        async for row in rows:
+            if len(items) == page.limit:
+                has_more = True
+                break
+            items.append(row if page.raw else convert(row))
+
+        return cls._build(items, has_more, page.raw)
+
+    @classmethod
+    def _build(cls, items: List[T], has_more: bool, raw: bool) -> "Page[T]":
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = (last["created_at"], last["id"]) if raw else (last.created_at, last.id)
+        if raw:
+            # Nothing to validate, skip the per-item pass
+            return cls.model_construct(items=items, next_cursor=next_cursor, raw=True)
+        return cls(items=items, next_cursor=next_cursor)
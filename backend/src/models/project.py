@@ -16,3 +16,9 @@ class Project(BaseModel):
 class ProjectCreate(BaseModel):
     nombre: str
     description: Optional[str] = None
+
+class ProjectStats(BaseModel):
+    project_id: int
+    total: int = 0
+    completed: int = 0
+    subtasks: int = 0
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional, Tuple
+
+# Keyset position in a ranking: (rank, kind, id) of the last hit of the previous page
+SearchCursor = Tuple[float, str, int]
+
+class SearchRequest(BaseModel):
+    q: str
+    limit: int = 20
+    after: Optional[SearchCursor] = None
+    # Match the last word as a prefix, for type-ahead
+    prefix: bool = True
+
+class SearchHit(BaseModel):
+    kind: Literal["project", "task"]
+    id: int
+    project_id: int
+    text: str  # task detalle or project nombre
+    headline: str  # matching fragment, matches wrapped in <mark></mark>
+    rank: float
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[SearchCursor] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class Task(BaseModel):
@@ -19,9 +19,23 @@ class Task(BaseModel):
         """Check if this task is a subtask"""
         return self.parent_task_id is not None
 
+class TaskNode(Task):
+    """A task with its subtasks nested, as returned by the tree endpoints"""
+    depth: int = 0
+    descendant_count: int = 0
+    children: List["TaskNode"] = Field(default_factory=list)
+
 class TaskCreate(BaseModel):
     detalle: str
     project_id: int
     user_id: Optional[int] = None
     parent_task_id: Optional[int] = None
 
+class TaskBulkItem(TaskCreate):
+    """Task of a bulk creation; items of the same batch reference each other by temp_id"""
+    temp_id: Optional[str] = None
+    parent_temp_id: Optional[str] = None
+
+class TaskBulkResult(BaseModel):
+    ids: List[int]  # created ids, in request order
+    temp_ids: Dict[str, int] = Field(default_factory=dict)
@@ -1,11 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
 class User(BaseModel):
     id: Optional[int] = None
     nombre: str
-    password_hash: str 
+    # Only set on users loaded to check a password; never serialized, so it
+    # reaches neither a response nor a cache
+    password_hash: Optional[str] = Field(default=None, exclude=True)
     created_at: Optional[datetime] = None
 
     def can_create_project(self) -> bool:
@@ -1,9 +1,12 @@
-from .user_repository import UserRepository
-from .project_repository import ProjectRepository
-from .task_repository import TaskRepository
+from .user_repository import UserRepository, AsyncUserRepository
+from .project_repository import ProjectRepository, AsyncProjectRepository
+from .task_repository import TaskRepository, AsyncTaskRepository
 
 __all__ = [
     "UserRepository",
     "ProjectRepository",
-    "TaskRepository"
+    "TaskRepository",
+    "AsyncUserRepository",
+    "AsyncProjectRepository",
+    "AsyncTaskRepository"
 ]
\ No newline at end of file
@@ -0,0 +1,51 @@
+from typing import AsyncIterator, Callable, Iterator
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.pagination import PageRequest
+
+# Rows fetched per round trip while streaming a page
+STREAM_BATCH_SIZE = 100
+STREAM_OPTIONS = {"yield_per": STREAM_BATCH_SIZE}
+
+
+def keyset_query(model, page: PageRequest, *criteria) -> Select:
+    """
+    Page of ``model`` rows ordered by (created_at, id)
+
+    Selects one row past ``page.limit`` so the caller can tell whether a next
+    page exists without a COUNT.
+    """
+    # Raw pages select the bare columns: no ORM identity map, no domain models.
+    # Generated columns (search vectors) are internal, like the deferred ORM
+    # attributes, and private ones (password hashes) are never sent.
+    columns = [
+        column for column in model.__table__.columns if column.computed is None and not column.info.get("private")
+    ]
+    stmt = (select(*columns) if page.raw else select(model)).where(*criteria)
+    if page.after is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*page.after))
+    return stmt.order_by(model.created_at, model.id).limit(page.limit + 1)
+
+
+def stream_page(db: Session, model, page: PageRequest, criteria, to_domain: Callable) -> Iterator:
+    """Stream a keyset page as domain models, or as column dicts when ``page.raw``"""
+    stmt = keyset_query(model, page, *criteria)
+    if page.raw:
+        for row in db.execute(stmt, execution_options=STREAM_OPTIONS):
+            yield row._asdict()
+    else:
+        for db_obj in db.scalars(stmt, execution_options=STREAM_OPTIONS):
+            yield to_domain(db_obj)
+
+
+async def stream_page_async(db: AsyncSession, model, page: PageRequest, criteria, to_domain: Callable) -> AsyncIterator:
+    stmt = keyset_query(model, page, *criteria)
+    if page.raw:
+        async for row in await db.stream(stmt, execution_options=STREAM_OPTIONS):
+            yield row._asdict()
+    else:
+        async for db_obj in await db.stream_scalars(stmt, execution_options=STREAM_OPTIONS):
+            yield to_domain(db_obj)
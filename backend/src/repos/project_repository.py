@@ -1,21 +1,40 @@
-from typing import Optional, List
-from sqlalchemy import String, DateTime, ForeignKey, Text
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import Computed, String, DateTime, ForeignKey, Index, Text, any_, delete, insert, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from datetime import datetime
 
 from config.database import Base
+from models.pagination import PageRequest
 from models.project import Project, ProjectCreate
+from repos.pagination import stream_page, stream_page_async
 
 class ProjectRepository:
 
     class _ProjectDB(Base):
         __tablename__ = "projects"
+        __table_args__ = (
+            Index("ix_projects_created_at", "created_at", "id"),
+            Index("ix_projects_user_id_created_at", "user_id", "created_at", "id"),
+            Index("ix_projects_search_vector", "search_vector", postgresql_using="gin"),
+        )
 
-        id: Mapped[int] = mapped_column(primary_key=True, index=True)
+        id: Mapped[int] = mapped_column(primary_key=True)
         nombre: Mapped[str] = mapped_column(String)
         description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
         user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
         created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+        # Full-text search (repos.search_repository), generated by Postgres and never loaded with the row
+        search_vector: Mapped[str] = mapped_column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('spanish', nombre), 'A') || "
+                "setweight(to_tsvector('spanish', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            deferred=True,
+        )
 
     def __init__(self, db_session: Session):
         self.db = db_session
@@ -24,9 +43,18 @@ class ProjectRepository:
         db_obj = self.db.query(self._ProjectDB).filter(self._ProjectDB.id == project_id).first()
         return self._to_domain(db_obj) if db_obj else None
 
-    def get_by_user_id(self, user_id: int) -> List[Project]:
-        db_objs = self.db.query(self._ProjectDB).filter(self._ProjectDB.user_id == user_id).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    def get_by_ids(self, project_ids: List[int], user_id: Optional[int] = None) -> List[Project]:
+        return [self._to_domain(db_obj) for db_obj in self.db.scalars(self.by_ids_query(project_ids, user_id))]
+
+    def get_by_user_id(self, user_id: int, page: PageRequest) -> Iterator[Project]:
+        return self.get_page(page, self._ProjectDB.user_id == user_id)
+
+    def get_owned_ids(self, user_id: int, project_ids: Iterable[int]) -> List[int]:
+        return list(self.db.scalars(self.owned_ids_query(user_id, project_ids)))
+
+    def get_page(self, page: PageRequest, *criteria) -> Iterator[Project]:
+        """Stream one keyset page of projects"""
+        return stream_page(self.db, self._ProjectDB, page, criteria, self._to_domain)
 
     def create(self, project_data: ProjectCreate, user_id: int) -> Project:
         db_obj = self._ProjectDB(
@@ -39,30 +67,41 @@ class ProjectRepository:
         self.db.refresh(db_obj)
         return self._to_domain(db_obj)
 
-    def update(self, project_id: int, project_data: ProjectCreate) -> Optional[Project]:
-        db_obj = self.db.query(self._ProjectDB).filter(self._ProjectDB.id == project_id).first()
-        if not db_obj:
-            return None
-
-        db_obj.nombre = project_data.nombre
-        db_obj.description = project_data.description
-
+    def create_many(self, projects: List[Tuple[ProjectCreate, int]]) -> List[Project]:
+        """Insert (project, owner id) pairs with one multi-row INSERT in one transaction"""
+        project = self._ProjectDB
+        created_at = datetime.now()
+        rows = [
+            {"nombre": data.nombre, "description": data.description, "user_id": user_id, "created_at": created_at}
+            for data, user_id in projects
+        ]
+        stmt = insert(project).returning(project, sort_by_parameter_order=True)
+        created = [self._to_domain(db_obj) for db_obj in self.db.scalars(stmt, rows)]
         self.db.commit()
-        self.db.refresh(db_obj)
-        return self._to_domain(db_obj)
+        return created
 
     def delete(self, project_id: int) -> bool:
-        db_obj = self.db.query(self._ProjectDB).filter(self._ProjectDB.id == project_id).first()
-        if not db_obj:
-            return False
-
-        self.db.delete(db_obj)
+        deleted = self.db.execute(self.delete_query(project_id)).first() is not None
         self.db.commit()
-        return True
+        return deleted
+
+    @classmethod
+    def by_ids_query(cls, project_ids: List[int], user_id: Optional[int] = None):
+        """The rows of ``project_ids`` (only those owned by ``user_id`` if given) in one query, in no particular order"""
+        project = cls._ProjectDB
+        stmt = select(project).where(project.id == any_(project_ids))
+        return stmt if user_id is None else stmt.where(project.user_id == user_id)
+
+    @classmethod
+    def owned_ids_query(cls, user_id: int, project_ids: Iterable[int]):
+        """Which of ``project_ids`` belong to ``user_id``"""
+        project = cls._ProjectDB
+        return select(project.id).where(project.id == any_(list(project_ids)), project.user_id == user_id)
 
-    def get_all(self) -> List[Project]:
-        db_objs = self.db.query(self._ProjectDB).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    @classmethod
+    def delete_query(cls, project_id: int):
+        project = cls._ProjectDB
+        return delete(project).where(project.id == project_id).returning(project.id)
 
     def _to_domain(self, db_obj: _ProjectDB) -> Project:
         return Project(
@@ -71,4 +110,47 @@ class ProjectRepository:
             description=db_obj.description,
             user_id=db_obj.user_id,
             created_at=db_obj.created_at
-        )
\ No newline at end of file
+        )
+
+
+class AsyncProjectRepository:
+    """ProjectRepository over an AsyncSession (API_MODE=async)"""
+
+    _ProjectDB = ProjectRepository._ProjectDB
+    _to_domain = ProjectRepository._to_domain
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_by_id(self, project_id: int) -> Optional[Project]:
+        db_obj = await self.db.get(self._ProjectDB, project_id)
+        return self._to_domain(db_obj) if db_obj else None
+
+    async def get_by_ids(self, project_ids: List[int], user_id: Optional[int] = None) -> List[Project]:
+        result = await self.db.scalars(ProjectRepository.by_ids_query(project_ids, user_id))
+        return [self._to_domain(db_obj) for db_obj in result]
+
+    async def get_owned_ids(self, user_id: int, project_ids: Iterable[int]) -> List[int]:
+        return list(await self.db.scalars(ProjectRepository.owned_ids_query(user_id, project_ids)))
+
+    def get_by_user_id(self, user_id: int, page: PageRequest) -> AsyncIterator[Project]:
+        return self.get_page(page, self._ProjectDB.user_id == user_id)
+
+    def get_page(self, page: PageRequest, *criteria) -> AsyncIterator[Project]:
+        return stream_page_async(self.db, self._ProjectDB, page, criteria, self._to_domain)
+
+    async def create(self, project_data: ProjectCreate, user_id: int) -> Project:
+        db_obj = self._ProjectDB(
+            nombre=project_data.nombre,
+            description=project_data.description,
+            user_id=user_id
+        )
+        self.db.add(db_obj)
+        await self.db.commit()
+        await self.db.refresh(db_obj)
+        return self._to_domain(db_obj)
+
+    async def delete(self, project_id: int) -> bool:
+        deleted = (await self.db.execute(ProjectRepository.delete_query(project_id))).first() is not None
+        await self.db.commit()
+        return deleted
@@ -0,0 +1,158 @@
+from typing import List, Sequence
+from sqlalchemy import ForeignKey, Integer, Select, Update, any_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, mapped_column, Mapped
+
+from config.database import Base
+from models.project import ProjectStats
+from repos.project_repository import ProjectRepository
+from repos.task_repository import TaskRepository
+
+class ProjectStatsRepository:
+    """
+    Task counters per project, read-only from the application: they are kept
+    by triggers on tasks (migrations/versions/0003) and only corrected here
+    by reconcile().
+    """
+
+    class _ProjectTaskStatsDB(Base):
+        __tablename__ = "project_task_stats"
+
+        project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+        total: Mapped[int] = mapped_column(Integer, server_default="0")
+        completed: Mapped[int] = mapped_column(Integer, server_default="0")
+        subtasks: Mapped[int] = mapped_column(Integer, server_default="0")
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def get_by_project_id(self, project_id: int) -> ProjectStats:
+        db_obj = self.db.get(self._ProjectTaskStatsDB, project_id)
+        # No row: the project never had a task
+        return self._to_domain(db_obj) if db_obj else ProjectStats(project_id=project_id)
+
+    def get_by_user_id(self, user_id: int) -> List[ProjectStats]:
+        return [ProjectStats(**row._asdict()) for row in self.db.execute(self.user_stats_query(user_id))]
+
+    def reconcile(self, project_ids: Sequence[int]) -> List[int]:
+        """
+        Recompute the counters of ``project_ids`` from their tasks
+
+        Returns:
+            The ids of the projects whose counters were off
+        """
+        stats = self._ProjectTaskStatsDB
+        project = ProjectRepository._ProjectDB
+        # A row for every project, including those without tasks, so all of them can be locked
+        self.db.execute(
+            pg_insert(stats)
+            .from_select(["project_id"], select(project.id).where(project.id == any_(list(project_ids))))
+            .on_conflict_do_nothing()
+        )
+        self.db.commit()
+
+        # Writers to these projects wait on the locked rows until the counters
+        # are fixed, so no delta lands between counting and overwriting
+        self.db.execute(
+            select(stats.project_id)
+            .where(stats.project_id == any_(list(project_ids)))
+            .order_by(stats.project_id)
+            .with_for_update()
+        )
+        fixed = list(self.db.scalars(self.reconcile_query(project_ids)))
+        self.db.commit()
+        return fixed
+
+    def project_ids_after(self, after_id: int, limit: int) -> List[int]:
+        """Next ``limit`` project ids above ``after_id``, to reconcile in batches"""
+        project = ProjectRepository._ProjectDB
+        return list(self.db.scalars(select(project.id).where(project.id > after_id).order_by(project.id).limit(limit)))
+
+    @classmethod
+    def user_stats_query(cls, user_id: int) -> Select:
+        """Counters of every project of a user, in the order the projects are listed"""
+        stats = cls._ProjectTaskStatsDB
+        project = ProjectRepository._ProjectDB
+        return (
+            select(
+                project.id.label("project_id"),
+                func.coalesce(stats.total, 0).label("total"),
+                func.coalesce(stats.completed, 0).label("completed"),
+                func.coalesce(stats.subtasks, 0).label("subtasks"),
+            )
+            .outerjoin(stats, stats.project_id == project.id)
+            .where(project.user_id == user_id)
+            .order_by(project.created_at, project.id)
+        )
+
+    @classmethod
+    def reconcile_query(cls, project_ids: Sequence[int]) -> Update:
+        """UPDATE the counters of ``project_ids`` that differ from a fresh count, RETURNING their project ids"""
+        stats = cls._ProjectTaskStatsDB
+        task = TaskRepository._TaskDB
+        # Counted per project straight from the tasks index, then completed
+        # with zeros for the projects that have no tasks left
+        counts = (
+            select(
+                task.project_id,
+                func.count().label("total"),
+                func.count().filter(task.completed).label("completed"),
+                func.count().filter(task.parent_task_id.is_not(None)).label("subtasks"),
+            )
+            .where(task.project_id == any_(list(project_ids)))
+            .group_by(task.project_id)
+            .subquery()
+        )
+        counted = aliased(stats)
+        actual = (
+            select(
+                counted.project_id,
+                func.coalesce(counts.c.total, 0).label("total"),
+                func.coalesce(counts.c.completed, 0).label("completed"),
+                func.coalesce(counts.c.subtasks, 0).label("subtasks"),
+            )
+            .outerjoin(counts, counts.c.project_id == counted.project_id)
+            .where(counted.project_id == any_(list(project_ids)))
+            .subquery()
+        )
+        return (
+            update(stats)
+            .where(
+                stats.project_id == any_(list(project_ids)),
+                stats.project_id == actual.c.project_id,
+                or_(
+                    stats.total != actual.c.total,
+                    stats.completed != actual.c.completed,
+                    stats.subtasks != actual.c.subtasks,
+                ),
+            )
+            .values(total=actual.c.total, completed=actual.c.completed, subtasks=actual.c.subtasks)
+            .returning(stats.project_id)
+        )
+
+    def _to_domain(self, db_obj: _ProjectTaskStatsDB) -> ProjectStats:
+        return ProjectStats(
+            project_id=db_obj.project_id,
+            total=db_obj.total,
+            completed=db_obj.completed,
+            subtasks=db_obj.subtasks
+        )
+
+
+class AsyncProjectStatsRepository:
+    """ProjectStatsRepository over an AsyncSession (API_MODE=async), reads only"""
+
+    _ProjectTaskStatsDB = ProjectStatsRepository._ProjectTaskStatsDB
+    _to_domain = ProjectStatsRepository._to_domain
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_by_project_id(self, project_id: int) -> ProjectStats:
+        db_obj = await self.db.get(self._ProjectTaskStatsDB, project_id)
+        return self._to_domain(db_obj) if db_obj else ProjectStats(project_id=project_id)
+
+    async def get_by_user_id(self, user_id: int) -> List[ProjectStats]:
+        result = await self.db.execute(ProjectStatsRepository.user_stats_query(user_id))
+        return [ProjectStats(**row._asdict()) for row in result]
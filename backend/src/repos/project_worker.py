@@ -1,32 +1,256 @@
+"""
+Project creation worker: ``python -m repos.project_worker`` (from src/)
+
+Each process runs WORKER_CONCURRENCY consumer threads. A consumer moves up to
+WORKER_BATCH_SIZE jobs per round trip from the queue into its own processing
+list (BLMOVE + pipelined LMOVE), inserts the whole batch in one transaction and
+then acknowledges it by removing it from the processing list. A job is therefore
+never lost between pop and insert: if the process dies, the reaper of any
+surviving worker pushes the orphaned processing list back onto the queue.
+Delivery is at-least-once, a crash between commit and ack creates the batch twice.
+
+Failing jobs are retried up to WORKER_MAX_ATTEMPTS times and then moved to the
+dead-letter list. Job status (see config.jobs) is updated and published on
+every transition, so clients waiting on /api/jobs/{id} are notified. SIGTERM / SIGINT stop the consumers after their current batch.
+Each process also reconciles the per-project task counters periodically, see
+repos.task_stats_reconciler.
+Run more processes (or containers) to scale out; queue depth and throughput are
+reported by GET /health/queue.
+"""
 import json
+import os
+import signal
+import socket
+import threading
 import time
-from redis import Redis
+import uuid
+from typing import Iterable, List, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from config.database import SessionLocal, record_write
+from config.jobs import set_job_status
+from config.redis_client import REDIS_SOCKET_TIMEOUT, make_client, redis_client
+from config.redis_utils import CONSUMERS_KEY, DEAD_LETTER_QUEUE, QUEUE_NAME, processing_key, record_jobs
+from models.project import ProjectCreate
 from repos.project_repository import ProjectRepository
+from repos.task_stats_reconciler import TASK_STATS_RECONCILE_INTERVAL, StatsReconciler
 from services.project_service import ProjectService
 
-redis_client = Redis(host="redis", port=6379, decode_responses=True)
-project_repo = ProjectRepository()
-project_service = ProjectService()
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))  # consumer threads per process
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "100"))  # jobs per round trip and transaction
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "5"))
+WORKER_BLOCK_TIMEOUT = float(os.getenv("WORKER_BLOCK_TIMEOUT", "1"))  # seconds, also bounds shutdown time
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))
+# Consumers silent for longer than this are presumed dead and get reaped
+WORKER_STALE_AFTER = float(os.getenv("WORKER_STALE_AFTER", "60"))
+
+# BLMOVE holds its connection for up to WORKER_BLOCK_TIMEOUT, longer than the
+# shared client's socket timeout allows: one connection per consumer
+blocking_redis_client = make_client(
+    socket_timeout=WORKER_BLOCK_TIMEOUT + REDIS_SOCKET_TIMEOUT, max_connections=WORKER_CONCURRENCY
+)
+
+# (raw queue entry, decoded payload)
+Job = Tuple[str, dict]
+
+
+class ProjectConsumer(threading.Thread):
+    """One consumer: fetch a batch, insert it, acknowledge it, repeat"""
+
+    def __init__(self, consumer_id: str, stop_event: threading.Event):
+        super().__init__(name=consumer_id, daemon=True)
+        self.consumer_id = consumer_id
+        self.processing = processing_key(consumer_id)
+        self.stop_event = stop_event
+
+    def run(self):
+        db = SessionLocal()
+        project_repo = ProjectRepository(db)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    batch = self.fetch_batch()
+                    if batch:
+                        self.process(project_repo, batch)
+                except Exception as e:
+                    # Whatever was fetched stays in the processing list and is
+                    # requeued on shutdown or by the reaper, keep consuming
+                    print(f"[{self.consumer_id}] Error processing batch: {e}")
+                    db.rollback()
+                    self.stop_event.wait(1)
+        finally:
+            db.close()
+
+    def fetch_batch(self) -> List[str]:
+        """Move up to WORKER_BATCH_SIZE jobs into the processing list"""
+        first = blocking_redis_client.blmove(QUEUE_NAME, self.processing, WORKER_BLOCK_TIMEOUT, "LEFT", "RIGHT")
+        if first is None:
+            return []
+
+        pipe = redis_client.pipeline(transaction=False)
+        for _ in range(WORKER_BATCH_SIZE - 1):
+            pipe.lmove(QUEUE_NAME, self.processing, "LEFT", "RIGHT")
+        return [first] + [raw for raw in pipe.execute() if raw is not None]
+
+    def process(self, project_repo: ProjectRepository, batch: List[str]) -> None:
+        jobs: List[Job] = []
+        failed: List[Tuple[Job, str]] = []
+        for raw in batch:
+            try:
+                payload = json.loads(raw)
+                ProjectCreate(**payload["project_data"])
+                int(payload["user_id"])
+            except (ValueError, KeyError, TypeError) as e:
+                # Malformed jobs will never succeed, send them straight to the dead-letter list
+                failed.append(((raw, {"raw": raw, "attempts": WORKER_MAX_ATTEMPTS - 1}), str(e)))
+                continue
+            jobs.append((raw, payload))
+
+        self.mark_running(jobs)
+        done: List[Tuple[Job, int]] = []
+        if jobs:
+            try:
+                done = list(zip(jobs, self.insert(project_repo, jobs)))
+            except SQLAlchemyError:
+                project_repo.db.rollback()
+                # Insert one by one so a single bad job does not fail its whole batch
+                for job in jobs:
+                    try:
+                        done.append((job, self.insert(project_repo, [job])[0]))
+                    except SQLAlchemyError as e:
+                        project_repo.db.rollback()
+                        failed.append((job, str(e)))
+
+        # Before ack, so whoever is woken up by the "done" event sees the new project,
+        # and the owners' marks before the "projects" event: they read from the primary
+        # until replicas have the new projects
+        owners = {payload["user_id"] for (_, payload), _ in done}
+        if owners:
+            self.record_writes(owners)
+        for user_id in owners:
+            ProjectService.invalidate_user_cache(user_id)
+        self.ack(batch, done, failed)
+        if done:
+            record_jobs("processed", len(done))
+        if failed:
+            record_jobs("failed", len(failed))
+            print(f"[{self.consumer_id}] {len(failed)} of {len(batch)} jobs failed")
+
+    @staticmethod
+    def insert(project_repo: ProjectRepository, jobs: List[Job]) -> List[int]:
+        """Create the projects of ``jobs``, returns their ids in the same order"""
+        projects = project_repo.create_many([
+            (ProjectCreate(**payload["project_data"]), payload["user_id"]) for _, payload in jobs
+        ])
+        return [project.id for project in projects]
+
+    @staticmethod
+    def record_writes(user_ids: Iterable[int]) -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            record_write(pipe, user_id)
+        try:
+            pipe.execute()
+        except RedisError as e:
+            print(f"Could not record writes of users {', '.join(map(str, user_ids))}: {e}")
+
+    @staticmethod
+    def mark_running(jobs: List[Job]) -> None:
+        pipe = redis_client.pipeline(transaction=False)
+        for _, payload in jobs:
+            if payload.get("job_id"):
+                set_job_status(pipe, payload["job_id"], "running")
+        pipe.execute()
+
+    def ack(self, batch: List[str], done: List[Tuple[Job, int]], failed: List[Tuple[Job, str]]) -> None:
+        """
+        Remove the batch from the processing list, requeueing or dead-lettering
+        the failed jobs and publishing every job's new status, atomically
+        """
+        pipe = redis_client.pipeline(transaction=True)
+        for (_, payload), project_id in done:
+            if payload.get("job_id"):
+                set_job_status(pipe, payload["job_id"], "done", project_id=project_id)
+        for (_, payload), error in failed:
+            payload["attempts"] = payload.get("attempts", 0) + 1
+            if payload["attempts"] >= WORKER_MAX_ATTEMPTS:
+                payload["error"] = error
+                pipe.rpush(DEAD_LETTER_QUEUE, json.dumps(payload))
+                if payload.get("job_id"):
+                    set_job_status(pipe, payload["job_id"], "failed", error="No se pudo crear el proyecto")
+            else:
+                pipe.rpush(QUEUE_NAME, json.dumps(payload))
+                if payload.get("job_id"):
+                    set_job_status(pipe, payload["job_id"], "queued")
+        for raw in batch:
+            pipe.lrem(self.processing, 1, raw)
+        pipe.execute()
+
+
+def requeue_processing(consumer_id: str) -> int:
+    """Push the in-flight jobs of a consumer back to the head of the queue"""
+    requeued = 0
+    while redis_client.lmove(processing_key(consumer_id), QUEUE_NAME, "RIGHT", "LEFT") is not None:
+        requeued += 1
+    return requeued
+
+
+def reap_stale_consumers() -> int:
+    """Requeue the jobs of consumers whose heartbeat is older than WORKER_STALE_AFTER"""
+    requeued = 0
+    cutoff = time.time() - WORKER_STALE_AFTER
+    for consumer_id in redis_client.zrangebyscore(CONSUMERS_KEY, "-inf", cutoff):
+        requeued += requeue_processing(consumer_id)
+        redis_client.zrem(CONSUMERS_KEY, consumer_id)
+    return requeued
+
+
+def supervise(consumer_ids: List[str], stop_event: threading.Event) -> None:
+    """Heartbeat for this process's consumers and reaper for everybody else's"""
+    while not stop_event.is_set():
+        try:
+            now = time.time()
+            redis_client.zadd(CONSUMERS_KEY, {consumer_id: now for consumer_id in consumer_ids})
+            requeued = reap_stale_consumers()
+            if requeued:
+                print(f"Requeued {requeued} jobs from stale consumers")
+        except RedisError as e:
+            print(f"Heartbeat failed: {e}")
+        stop_event.wait(WORKER_HEARTBEAT_INTERVAL)
+
+
+def main() -> None:
+    stop_event = threading.Event()
+
+    def shutdown(signum, frame):
+        print(f"Received signal {signum}, finishing in-flight batches...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
 
-QUEUE_NAME = "project_creation_queue"
+    prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    consumer_ids = [f"{prefix}:{n}" for n in range(WORKER_CONCURRENCY)]
+    redis_client.zadd(CONSUMERS_KEY, {consumer_id: time.time() for consumer_id in consumer_ids})
+    consumers = [ProjectConsumer(consumer_id, stop_event) for consumer_id in consumer_ids]
+    for consumer in consumers:
+        consumer.start()
+    if TASK_STATS_RECONCILE_INTERVAL > 0:
+        StatsReconciler(stop_event).start()
+    print(f"Worker listening for project creation tasks ({WORKER_CONCURRENCY} consumers)...")
 
-print("Worker listening for project creation tasks...")
+    supervise(consumer_ids, stop_event)
 
-while True:
-    task = redis_client.blpop(QUEUE_NAME, timeout=0)  # espera bloqueante
-    _, data = task
-    payload = json.loads(data)
-    
-    user_id = payload["user_id"]
-    project_data = payload["project_data"]
+    for consumer in consumers:
+        consumer.join()
+    # Nothing should be left in flight, but never strand a job
+    for consumer_id in consumer_ids:
+        requeue_processing(consumer_id)
+    redis_client.zrem(CONSUMERS_KEY, *consumer_ids)
+    print("Worker stopped.")
 
-    print(f"Creating project for user {user_id}...")
 
-    try:
-        project_repo.create(project_data, user_id)
-        project_service.delete_cache()
-        print("Project created successfully.")
-    except Exception as e:
-        print(f"Error creating project: {e}")
-    
-    time.sleep(0.1)
+if __name__ == "__main__":
+    main()
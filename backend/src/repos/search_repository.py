@@ -0,0 +1,88 @@
+from typing import List, Optional
+from sqlalchemy import REAL, Select, and_, cast, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.search import SearchCursor, SearchHit
+from repos.project_repository import ProjectRepository
+from repos.task_repository import TaskRepository
+
+# Text search configuration of the generated search_vector columns (migrations/versions/0004)
+SEARCH_CONFIG = "spanish"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=20, MinWords=8"
+
+class SearchRepository:
+    """
+    Ranked full-text search over the projects of a user and their tasks
+
+    Matches come from the GIN indexes on the search_vector columns and are
+    ordered by ts_rank, then kind and id so the order is total and pages can
+    continue from a (rank, kind, id) cursor. Headlines are only computed for
+    the rows of the page.
+    """
+
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def search(self, user_id: int, tsquery: str, limit: int, after: Optional[SearchCursor] = None) -> List[SearchHit]:
+        """Up to ``limit`` hits for ``tsquery`` (to_tsquery syntax) in the projects of ``user_id``"""
+        return [SearchHit(**row._asdict()) for row in self.db.execute(self.search_query(user_id, tsquery, limit, after))]
+
+    @classmethod
+    def search_query(cls, user_id: int, tsquery: str, limit: int, after: Optional[SearchCursor] = None) -> Select:
+        project = ProjectRepository._ProjectDB
+        task = TaskRepository._TaskDB
+        query = func.to_tsquery(SEARCH_CONFIG, tsquery)
+
+        projects = select(
+            literal("project").label("kind"),
+            project.id,
+            project.id.label("project_id"),
+            func.ts_rank(project.search_vector, query).label("rank"),
+        ).where(project.user_id == user_id, project.search_vector.bool_op("@@")(query))
+        tasks = (
+            select(literal("task"), task.id, task.project_id, func.ts_rank(task.search_vector, query))
+            .join(project, project.id == task.project_id)
+            .where(project.user_id == user_id, task.search_vector.bool_op("@@")(query))
+        )
+        hits = union_all(projects, tasks).subquery("hits")
+
+        ranked = select(hits)
+        if after is not None:
+            rank, kind, hit_id = after
+            # ts_rank is a real: psycopg2 reads it as its shortest decimal, back to real it is exact again
+            rank = cast(rank, REAL)
+            ranked = ranked.where(or_(
+                hits.c.rank < rank,
+                and_(hits.c.rank == rank, tuple_(hits.c.kind, hits.c.id) > tuple_(kind, hit_id)),
+            ))
+        page = ranked.order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id).limit(limit).subquery("page")
+
+        # Text of the page's rows only, from the task or the project the hit points to
+        text = func.coalesce(task.detalle, project.nombre)
+        searched = func.coalesce(task.detalle, project.nombre + " " + func.coalesce(project.description, ""))
+        return (
+            select(
+                page.c.kind,
+                page.c.id,
+                page.c.project_id,
+                text.label("text"),
+                func.ts_headline(SEARCH_CONFIG, searched, query, HEADLINE_OPTIONS).label("headline"),
+                page.c.rank,
+            )
+            .select_from(page)
+            .outerjoin(task, and_(page.c.kind == "task", task.id == page.c.id))
+            .outerjoin(project, and_(page.c.kind == "project", project.id == page.c.id))
+            .order_by(page.c.rank.desc(), page.c.kind, page.c.id)
+        )
+
+
+class AsyncSearchRepository:
+    """SearchRepository over an AsyncSession (API_MODE=async)"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def search(self, user_id: int, tsquery: str, limit: int, after: Optional[SearchCursor] = None) -> List[SearchHit]:
+        result = await self.db.execute(SearchRepository.search_query(user_id, tsquery, limit, after))
+        return [SearchHit(**row._asdict()) for row in result]
@@ -1,23 +1,57 @@
-from typing import Optional, List
-from sqlalchemy import DateTime, ForeignKey, Boolean, Text
+import io
+import os
+import asyncpg
+import psycopg2
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import Computed, DateTime, ForeignKey, Boolean, Index, Text, Select, all_, any_, delete, func, insert, literal_column, select, text, update
+from sqlalchemy.dialects.postgresql import TSVECTOR, array
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from datetime import datetime
 
 from config.database import Base
-from models.task import Task, TaskCreate
+from models.pagination import PageRequest
+from models.task import Task, TaskBulkItem, TaskCreate, TaskNode
+from repos.pagination import stream_page, stream_page_async
+from repos.project_repository import ProjectRepository
 
 class TaskRepository:
 
     class _TaskDB(Base):
         __tablename__ = "tasks"
+        # Every listing is keyset paginated on (created_at, id), so the filter
+        # columns lead and the sort key follows. See migrations/versions.
+        __table_args__ = (
+            Index("ix_tasks_created_at", "created_at", "id"),
+            Index("ix_tasks_project_id_created_at", "project_id", "created_at", "id"),
+            Index("ix_tasks_project_id_completed", "project_id", "completed", "created_at", "id"),
+            Index("ix_tasks_user_id_created_at", "user_id", "created_at", "id"),
+            Index("ix_tasks_parent_task_id_created_at", "parent_task_id", "created_at", "id"),
+            # Roots of the project tree
+            Index("ix_tasks_project_id_roots", "project_id", postgresql_where=text("parent_task_id IS NULL")),
+            # Pending tasks of a user
+            Index("ix_tasks_user_id_pending", "user_id", "created_at", "id", postgresql_where=text("NOT completed")),
+            Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        )
 
-        id: Mapped[int] = mapped_column(primary_key=True, index=True)
+        id: Mapped[int] = mapped_column(primary_key=True)
         detalle: Mapped[str] = mapped_column(Text)
         project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"))
         user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
         parent_task_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tasks.id"), nullable=True)
         completed: Mapped[bool] = mapped_column(Boolean, default=False)
-        created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
+        created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+        # Full-text search (repos.search_repository), generated by Postgres and never loaded with the row
+        search_vector: Mapped[str] = mapped_column(
+            TSVECTOR, Computed("to_tsvector('spanish', detalle)", persisted=True), deferred=True
+        )
+
+    # Bulk creations of at least this many tasks are loaded with COPY
+    BULK_COPY_THRESHOLD = int(os.getenv("TASK_BULK_COPY_THRESHOLD", "1000"))
+    # Largest batch accepted by a single bulk creation
+    BULK_MAX_ITEMS = int(os.getenv("TASK_BULK_MAX_ITEMS", "10000"))
+    BULK_COLUMNS = ("id", "detalle", "project_id", "user_id", "parent_task_id", "completed", "created_at")
 
     def __init__(self, db_session: Session):
         self.db = db_session
@@ -26,17 +60,22 @@ class TaskRepository:
         db_obj = self.db.query(self._TaskDB).filter(self._TaskDB.id == task_id).first()
         return self._to_domain(db_obj) if db_obj else None
 
-    def get_by_project_id(self, project_id: int) -> List[Task]:
-        db_objs = self.db.query(self._TaskDB).filter(self._TaskDB.project_id == project_id).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    def get_by_ids(self, task_ids: List[int], **filters) -> List[Task]:
+        """The tasks of ``task_ids`` that match ``filters`` (see filter_criteria), in no particular order"""
+        return [self._to_domain(db_obj) for db_obj in self.db.scalars(self.by_ids_query(task_ids, **filters))]
+
+    def get_by_project_id(self, project_id: int, page: PageRequest) -> Iterator[Task]:
+        return self.get_page(page, project_id=project_id)
+
+    def get_by_user_id(self, user_id: int, page: PageRequest) -> Iterator[Task]:
+        return self.get_page(page, user_id=user_id)
 
-    def get_by_user_id(self, user_id: int) -> List[Task]:
-        db_objs = self.db.query(self._TaskDB).filter(self._TaskDB.user_id == user_id).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    def get_subtasks(self, parent_task_id: int, page: PageRequest) -> Iterator[Task]:
+        return self.get_page(page, parent_task_id=parent_task_id)
 
-    def get_subtasks(self, parent_task_id: int) -> List[Task]:
-        db_objs = self.db.query(self._TaskDB).filter(self._TaskDB.parent_task_id == parent_task_id).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    def get_page(self, page: PageRequest, **filters) -> Iterator[Task]:
+        """Stream one keyset page of tasks matching ``filters`` (see filter_criteria)"""
+        return stream_page(self.db, self._TaskDB, page, self.filter_criteria(**filters), self._to_domain)
 
     def create(self, task_data: TaskCreate) -> Task:
         db_obj = self._TaskDB(
@@ -50,42 +89,297 @@ class TaskRepository:
         self.db.refresh(db_obj)
         return self._to_domain(db_obj)
 
-    def update(self, task_id: int, task_data: TaskCreate) -> Optional[Task]:
-        db_obj = self.db.query(self._TaskDB).filter(self._TaskDB.id == task_id).first()
-        if not db_obj:
-            return None
+    def create_many(self, items: List[TaskBulkItem]) -> List[int]:
+        """
+        Insert a batch of tasks in one transaction, returns their ids in input order
+
+        Small batches run one multi-row INSERT ... RETURNING per nesting level
+        (parents first, so children can point at their new ids). Large batches
+        reserve all ids from the sequence up front and load every row with COPY.
+        """
+        levels = self.bulk_levels(items)
+        if len(items) >= self.BULK_COPY_THRESHOLD:
+            ids = self._copy_many(items, levels)
+        else:
+            ids = self._insert_many(items, levels)
+        self.db.commit()
+        return ids
+
+    def _insert_many(self, items: List[TaskBulkItem], levels: List[List[int]]) -> List[int]:
+        task = self._TaskDB
+        stmt = insert(task).returning(task.id, sort_by_parameter_order=True)
+        temp_index = self.bulk_temp_index(items)
+        created_at = datetime.now()
+        ids: List[int] = [0] * len(items)
+        for level in levels:
+            rows = [self.bulk_row(items[i], ids, temp_index, created_at) for i in level]
+            for i, new_id in zip(level, self.db.execute(stmt, rows).scalars()):
+                ids[i] = new_id
+        return ids
+
+    def _copy_many(self, items: List[TaskBulkItem], levels: List[List[int]]) -> List[int]:
+        ids = sorted(self.db.execute(self.reserve_ids_query(), {"n": len(items)}).scalars())
+        temp_index = self.bulk_temp_index(items)
+        created_at = datetime.now()
 
-        db_obj.detalle = task_data.detalle
-        db_obj.project_id = task_data.project_id
-        db_obj.user_id = task_data.user_id
-        db_obj.parent_task_id = task_data.parent_task_id
+        buffer = io.StringIO()
+        for level in levels:
+            for i in level:
+                row = self.bulk_row(items[i], ids, temp_index, created_at)
+                row["id"] = ids[i]
+                buffer.write("\t".join(_copy_text(row[column]) for column in self.BULK_COLUMNS) + "\n")
+        buffer.seek(0)
 
+        copy_sql = f"COPY tasks ({', '.join(self.BULK_COLUMNS)}) FROM STDIN"
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(copy_sql, buffer)
+        except psycopg2.IntegrityError as e:
+            # COPY goes straight to the driver, surface it like any other insert
+            raise IntegrityError(copy_sql, None, e) from e
+        finally:
+            cursor.close()
+        return ids
+
+    @staticmethod
+    def bulk_temp_index(items: List[TaskBulkItem]) -> Dict[str, int]:
+        return {item.temp_id: i for i, item in enumerate(items) if item.temp_id is not None}
+
+    @classmethod
+    def bulk_levels(cls, items: List[TaskBulkItem]) -> List[List[int]]:
+        """
+        Group item indexes by nesting depth within the batch
+
+        Raises:
+            ValueError: On duplicated or unknown temp ids, cycles, or items with
+                both parent_temp_id and parent_task_id
+        """
+        temp_index: Dict[str, int] = {}
+        for i, item in enumerate(items):
+            if item.temp_id is not None:
+                if item.temp_id in temp_index:
+                    raise ValueError(f"temp_id duplicado: {item.temp_id}")
+                temp_index[item.temp_id] = i
+
+        depths: List[Optional[int]] = [None] * len(items)
+        for start in range(len(items)):
+            # Walk up until a root or an item whose depth is already known
+            chain: List[int] = []
+            on_chain = set()
+            i = start
+            while i is not None and depths[i] is None:
+                if i in on_chain:
+                    raise ValueError(f"Ciclo en parent_temp_id: {items[i].temp_id}")
+                chain.append(i)
+                on_chain.add(i)
+                item = items[i]
+                if item.parent_temp_id is None:
+                    i = None
+                elif item.parent_task_id is not None:
+                    raise ValueError("parent_temp_id y parent_task_id son excluyentes")
+                elif item.parent_temp_id not in temp_index:
+                    raise ValueError(f"parent_temp_id desconocido: {item.parent_temp_id}")
+                else:
+                    i = temp_index[item.parent_temp_id]
+            depth = -1 if i is None else depths[i]
+            for j in reversed(chain):
+                depth += 1
+                depths[j] = depth
+
+        levels: List[List[int]] = [[] for _ in range(max(depths, default=-1) + 1)]
+        for i, depth in enumerate(depths):
+            levels[depth].append(i)
+        return levels
+
+    @staticmethod
+    def bulk_row(item: TaskBulkItem, ids: List[int], temp_index: Dict[str, int], created_at: datetime) -> dict:
+        parent_task_id = ids[temp_index[item.parent_temp_id]] if item.parent_temp_id is not None else item.parent_task_id
+        return {
+            "detalle": item.detalle,
+            "project_id": item.project_id,
+            "user_id": item.user_id,
+            "parent_task_id": parent_task_id,
+            "completed": False,
+            "created_at": created_at,
+        }
+
+    @staticmethod
+    def reserve_ids_query():
+        return text("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, :n)")
+
+    def update(self, task_id: int, task_data: TaskCreate) -> Optional[Tuple[Task, int]]:
+        """Update a task, returns it with the project it was in before (the update can move it)"""
+        row = self.db.execute(self.move_query(task_id, self.update_values(task_data))).first()
+        updated = (self._to_domain(row[0]), row.previous_project_id) if row else None
         self.db.commit()
-        self.db.refresh(db_obj)
-        return self._to_domain(db_obj)
+        return updated
 
     def mark_completed(self, task_id: int) -> Optional[Task]:
-        db_obj = self.db.query(self._TaskDB).filter(self._TaskDB.id == task_id).first()
-        if not db_obj:
-            return None
+        db_obj = self.db.scalars(self.update_query(task_id, {"completed": True})).first()
+        # Read before commit: expire_on_commit would reload the row
+        task = self._to_domain(db_obj) if db_obj else None
+        self.db.commit()
+        return task
 
-        db_obj.completed = True
+    def delete(self, task_id: int) -> Optional[int]:
+        """Delete a task, returns the project it belonged to (None if it did not exist)"""
+        project_id = self.db.execute(self.delete_query(task_id)).scalar()
         self.db.commit()
-        self.db.refresh(db_obj)
-        return self._to_domain(db_obj)
+        return project_id
 
-    def delete(self, task_id: int) -> bool:
-        db_obj = self.db.query(self._TaskDB).filter(self._TaskDB.id == task_id).first()
-        if not db_obj:
-            return False
+    @staticmethod
+    def update_values(task_data: TaskCreate) -> dict:
+        return {
+            "detalle": task_data.detalle,
+            "project_id": task_data.project_id,
+            "user_id": task_data.user_id,
+            "parent_task_id": task_data.parent_task_id,
+        }
+
+    @classmethod
+    def update_query(cls, task_id: int, values: dict):
+        """UPDATE ... RETURNING the whole row, one round trip instead of SELECT + UPDATE + refresh"""
+        task = cls._TaskDB
+        return update(task).where(task.id == task_id).values(**values).returning(task)
+
+    @classmethod
+    def move_query(cls, task_id: int, values: dict):
+        """update_query that also returns the project the task was in before, as previous_project_id"""
+        task = cls._TaskDB
+        # Locked first, so a concurrent move cannot slip in between reading and updating
+        previous = select(task.id, task.project_id).where(task.id == task_id).with_for_update().cte("previous")
+        return (
+            update(task).where(task.id == previous.c.id).values(**values)
+            .returning(task, previous.c.project_id.label("previous_project_id"))
+        )
+
+    @classmethod
+    def delete_query(cls, task_id: int):
+        task = cls._TaskDB
+        return delete(task).where(task.id == task_id).returning(task.project_id)
+
+    def get_tree(self, task_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        """Task ``task_id`` and its descendants, flat in depth-first order"""
+        rows = self.db.execute(self.tree_query(self._TaskDB.id == task_id, max_depth))
+        return [self._to_node(row) for row in rows]
 
-        self.db.delete(db_obj)
+    def get_project_tree(self, project_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        """Every root task of a project with its descendants, flat in depth-first order"""
+        roots = (self._TaskDB.project_id == project_id) & self._TaskDB.parent_task_id.is_(None)
+        rows = self.db.execute(self.tree_query(roots, max_depth))
+        return [self._to_node(row) for row in rows]
+
+    def delete_subtree(self, task_id: int) -> List[int]:
+        """Delete a task and all its descendants in one statement, returns the project of each deleted task"""
+        task = self._TaskDB
+        stmt = delete(task).where(task.id.in_(self.subtree_ids(task_id))).returning(task.project_id)
+        project_ids = list(self.db.execute(stmt).scalars())
+        self.db.commit()
+        return project_ids
+
+    def complete_subtree(self, task_id: int) -> List[int]:
+        """Mark a task and all its descendants completed in one statement, returns the project of each one"""
+        task = self._TaskDB
+        stmt = update(task).where(task.id.in_(self.subtree_ids(task_id))).values(completed=True).returning(task.project_id)
+        project_ids = list(self.db.execute(stmt).scalars())
         self.db.commit()
-        return True
+        return project_ids
+
+    @classmethod
+    def tree_query(cls, roots, max_depth: Optional[int] = None) -> Select:
+        """
+        Recursive CTE walking parent_task_id down from the tasks matching ``roots``
+
+        Rows carry their depth (roots are 0) and the number of tasks below them,
+        and are ordered depth-first by the id path from their root. Cycles in
+        parent_task_id are cut. ``max_depth`` limits the rows returned, not the
+        walk: descendant counts always cover the whole subtree, so a node cut
+        by the limit still tells it has subtasks.
+        """
+        task = cls._TaskDB
+        columns = [task.id, task.detalle, task.project_id, task.user_id, task.parent_task_id, task.completed, task.created_at]
+
+        tree = select(
+            *columns, literal_column("0").label("depth"), array([task.id]).label("path")
+        ).where(roots).cte("tree", recursive=True)
+        tree = tree.union_all(
+            select(*columns, tree.c.depth + literal_column("1"), func.array_append(tree.c.path, task.id))
+            .where(task.parent_task_id == tree.c.id, task.id != all_(tree.c.path))
+        )
+
+        # Every node is on the path of each of its descendants, and on its own
+        ancestor = func.unnest(tree.c.path).label("id")
+        counts = select(ancestor, (func.count() - 1).label("descendant_count")).group_by(ancestor).subquery("counts")
+        stmt = (
+            select(tree, counts.c.descendant_count)
+            .join(counts, counts.c.id == tree.c.id)
+            .order_by(tree.c.path)
+        )
+        return stmt if max_depth is None else stmt.where(tree.c.depth <= max_depth)
+
+    @classmethod
+    def subtree_ids(cls, task_id: int) -> Select:
+        """Recursive CTE selecting the id of ``task_id`` and of all its descendants"""
+        task = cls._TaskDB
+        subtree = select(task.id).where(task.id == task_id).cte("subtree", recursive=True)
+        # UNION (not UNION ALL) so a cycle in parent_task_id terminates
+        subtree = subtree.union(select(task.id).where(task.parent_task_id == subtree.c.id))
+        return select(subtree.c.id)
 
-    def get_all(self) -> List[Task]:
-        db_objs = self.db.query(self._TaskDB).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    @classmethod
+    def by_ids_query(cls, task_ids: List[int], **filters) -> Select:
+        """The rows of ``task_ids`` in one query (id = ANY(:ids))"""
+        task = cls._TaskDB
+        return select(task).where(task.id == any_(task_ids), *cls.filter_criteria(**filters))
+
+    @classmethod
+    def filter_criteria(
+        cls,
+        visible_to: Optional[int] = None,
+        project_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        parent_task_id: Optional[int] = None,
+        completed: Optional[bool] = None
+    ) -> list:
+        """
+        WHERE clauses for task listings, None means "don't filter"
+
+        Args:
+            visible_to: Only tasks of projects owned by this user or assigned to them
+            project_id: Only tasks of this project
+            user_id: Only tasks assigned to this user
+            parent_task_id: Only direct subtasks of this task
+            completed: Only completed (True) or pending (False) tasks
+        """
+        task = cls._TaskDB
+        criteria = []
+        if visible_to is not None:
+            owned_projects = select(ProjectRepository._ProjectDB.id).where(
+                ProjectRepository._ProjectDB.user_id == visible_to
+            )
+            criteria.append(task.project_id.in_(owned_projects) | (task.user_id == visible_to))
+        if project_id is not None:
+            criteria.append(task.project_id == project_id)
+        if user_id is not None:
+            criteria.append(task.user_id == user_id)
+        if parent_task_id is not None:
+            criteria.append(task.parent_task_id == parent_task_id)
+        if completed is not None:
+            criteria.append(task.completed == completed)
+        return criteria
+
+    def _to_node(self, row) -> TaskNode:
+        return TaskNode(
+            id=row.id,
+            detalle=row.detalle,
+            project_id=row.project_id,
+            user_id=row.user_id,
+            parent_task_id=row.parent_task_id,
+            completed=row.completed,
+            created_at=row.created_at,
+            depth=row.depth,
+            descendant_count=row.descendant_count
+        )
 
     def _to_domain(self, db_obj: _TaskDB) -> Task:
         return Task(
@@ -96,4 +390,151 @@ class TaskRepository:
             parent_task_id=db_obj.parent_task_id,
             completed=db_obj.completed,
             created_at=db_obj.created_at
-        )
\ No newline at end of file
+        )
+
+
+class AsyncTaskRepository:
+    """TaskRepository over an AsyncSession (API_MODE=async)"""
+
+    _TaskDB = TaskRepository._TaskDB
+    _to_domain = TaskRepository._to_domain
+    _to_node = TaskRepository._to_node
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_by_id(self, task_id: int) -> Optional[Task]:
+        db_obj = await self.db.get(self._TaskDB, task_id)
+        return self._to_domain(db_obj) if db_obj else None
+
+    async def get_by_ids(self, task_ids: List[int], **filters) -> List[Task]:
+        result = await self.db.scalars(TaskRepository.by_ids_query(task_ids, **filters))
+        return [self._to_domain(db_obj) for db_obj in result]
+
+    async def get_tree(self, task_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        result = await self.db.execute(TaskRepository.tree_query(self._TaskDB.id == task_id, max_depth))
+        return [self._to_node(row) for row in result]
+
+    async def get_project_tree(self, project_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        roots = (self._TaskDB.project_id == project_id) & self._TaskDB.parent_task_id.is_(None)
+        result = await self.db.execute(TaskRepository.tree_query(roots, max_depth))
+        return [self._to_node(row) for row in result]
+
+    async def delete_subtree(self, task_id: int) -> List[int]:
+        task = self._TaskDB
+        stmt = delete(task).where(task.id.in_(TaskRepository.subtree_ids(task_id))).returning(task.project_id)
+        project_ids = list((await self.db.execute(stmt)).scalars())
+        await self.db.commit()
+        return project_ids
+
+    async def complete_subtree(self, task_id: int) -> List[int]:
+        task = self._TaskDB
+        stmt = update(task).where(task.id.in_(TaskRepository.subtree_ids(task_id))).values(completed=True).returning(task.project_id)
+        project_ids = list((await self.db.execute(stmt)).scalars())
+        await self.db.commit()
+        return project_ids
+
+    def get_by_project_id(self, project_id: int, page: PageRequest) -> AsyncIterator[Task]:
+        return self.get_page(page, project_id=project_id)
+
+    def get_by_user_id(self, user_id: int, page: PageRequest) -> AsyncIterator[Task]:
+        return self.get_page(page, user_id=user_id)
+
+    def get_subtasks(self, parent_task_id: int, page: PageRequest) -> AsyncIterator[Task]:
+        return self.get_page(page, parent_task_id=parent_task_id)
+
+    def get_page(self, page: PageRequest, **filters) -> AsyncIterator[Task]:
+        return stream_page_async(self.db, self._TaskDB, page, TaskRepository.filter_criteria(**filters), self._to_domain)
+
+    async def create(self, task_data: TaskCreate) -> Task:
+        db_obj = self._TaskDB(
+            detalle=task_data.detalle,
+            project_id=task_data.project_id,
+            user_id=task_data.user_id,
+            parent_task_id=task_data.parent_task_id
+        )
+        self.db.add(db_obj)
+        await self.db.commit()
+        await self.db.refresh(db_obj)
+        return self._to_domain(db_obj)
+
+    async def create_many(self, items: List[TaskBulkItem]) -> List[int]:
+        """Async create_many; large batches use asyncpg's binary COPY"""
+        levels = TaskRepository.bulk_levels(items)
+        if len(items) >= TaskRepository.BULK_COPY_THRESHOLD:
+            ids = await self._copy_many(items, levels)
+        else:
+            ids = await self._insert_many(items, levels)
+        await self.db.commit()
+        return ids
+
+    async def _insert_many(self, items: List[TaskBulkItem], levels: List[List[int]]) -> List[int]:
+        task = self._TaskDB
+        stmt = insert(task).returning(task.id, sort_by_parameter_order=True)
+        temp_index = TaskRepository.bulk_temp_index(items)
+        created_at = datetime.now()
+        ids: List[int] = [0] * len(items)
+        for level in levels:
+            rows = [TaskRepository.bulk_row(items[i], ids, temp_index, created_at) for i in level]
+            result = await self.db.execute(stmt, rows)
+            for i, new_id in zip(level, result.scalars()):
+                ids[i] = new_id
+        return ids
+
+    async def _copy_many(self, items: List[TaskBulkItem], levels: List[List[int]]) -> List[int]:
+        result = await self.db.execute(TaskRepository.reserve_ids_query(), {"n": len(items)})
+        ids = sorted(result.scalars())
+        temp_index = TaskRepository.bulk_temp_index(items)
+        created_at = datetime.now()
+
+        records = []
+        for level in levels:
+            for i in level:
+                row = TaskRepository.bulk_row(items[i], ids, temp_index, created_at)
+                row["id"] = ids[i]
+                records.append(tuple(row[column] for column in TaskRepository.BULK_COLUMNS))
+
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        try:
+            await raw_connection.driver_connection.copy_records_to_table(
+                "tasks", records=records, columns=list(TaskRepository.BULK_COLUMNS)
+            )
+        except asyncpg.IntegrityConstraintViolationError as e:
+            raise IntegrityError("COPY tasks", None, e) from e
+        return ids
+
+    async def update(self, task_id: int, task_data: TaskCreate) -> Optional[Tuple[Task, int]]:
+        result = await self.db.execute(TaskRepository.move_query(task_id, TaskRepository.update_values(task_data)))
+        row = result.first()
+        updated = (self._to_domain(row[0]), row.previous_project_id) if row else None
+        await self.db.commit()
+        return updated
+
+    async def mark_completed(self, task_id: int) -> Optional[Task]:
+        db_obj = (await self.db.scalars(TaskRepository.update_query(task_id, {"completed": True}))).first()
+        task = self._to_domain(db_obj) if db_obj else None
+        await self.db.commit()
+        return task
+
+    async def delete(self, task_id: int) -> Optional[int]:
+        project_id = (await self.db.execute(TaskRepository.delete_query(task_id))).scalar()
+        await self.db.commit()
+        return project_id
+
+
+def _copy_text(value) -> str:
+    """Render a value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
@@ -0,0 +1,91 @@
+"""
+Task counter reconciliation: ``python -m repos.task_stats_reconciler`` (from src/)
+
+The per-project counters in project_task_stats are maintained by triggers and
+should never drift; this job recounts them anyway, in batches of
+TASK_STATS_RECONCILE_BATCH projects, and corrects and reports any that are
+off. Run it once from the command line, or let every project worker run it
+every TASK_STATS_RECONCILE_INTERVAL seconds (see StatsReconciler). A Postgres
+advisory lock makes sure only one process reconciles at a time.
+"""
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from config.database import SessionLocal, engine
+from repos.project_stats_repository import ProjectStatsRepository
+from services.task_service import TaskService
+
+TASK_STATS_RECONCILE_INTERVAL = float(os.getenv("TASK_STATS_RECONCILE_INTERVAL", "3600"))  # seconds, 0 disables
+TASK_STATS_RECONCILE_BATCH = int(os.getenv("TASK_STATS_RECONCILE_BATCH", "100"))  # projects locked at a time
+RECONCILE_LOCK_KEY = 7240332  # arbitrary, next to MIGRATION_LOCK_KEY
+
+
+def reconcile_task_stats(stop_event: Optional[threading.Event] = None) -> int:
+    """
+    Recount the tasks of every project and fix the counters that are off
+
+    Args:
+        stop_event: Stops between batches when set
+
+    Returns:
+        How many projects had wrong counters, -1 if another process is
+        already reconciling
+    """
+    with engine.connect() as lock_connection:
+        if not lock_connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": RECONCILE_LOCK_KEY}).scalar():
+            return -1
+        lock_connection.commit()
+        db = SessionLocal()
+        try:
+            stats_repo = ProjectStatsRepository(db)
+            fixed = 0
+            after_id = 0
+            while stop_event is None or not stop_event.is_set():
+                project_ids = stats_repo.project_ids_after(after_id, TASK_STATS_RECONCILE_BATCH)
+                db.commit()
+                if not project_ids:
+                    break
+                drifted = stats_repo.reconcile(project_ids)
+                if drifted:
+                    print(f"Fixed task counters of projects {drifted}")
+                    # Stats responses are tagged with the project's task version
+                    TaskService.bump_projects(*drifted)
+                fixed += len(drifted)
+                after_id = project_ids[-1]
+            return fixed
+        finally:
+            db.close()
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RECONCILE_LOCK_KEY})
+            lock_connection.commit()
+
+
+class StatsReconciler(threading.Thread):
+    """Runs reconcile_task_stats every TASK_STATS_RECONCILE_INTERVAL seconds until stopped"""
+
+    def __init__(self, stop_event: threading.Event):
+        super().__init__(name="stats-reconciler", daemon=True)
+        self.stop_event = stop_event
+
+    def run(self):
+        while not self.stop_event.wait(TASK_STATS_RECONCILE_INTERVAL):
+            try:
+                reconcile_task_stats(self.stop_event)
+            except SQLAlchemyError as e:
+                # Counters are only recounted, never lost: try again next round
+                print(f"Task counter reconciliation failed: {e}")
+
+
+def main() -> None:
+    fixed = reconcile_task_stats()
+    if fixed < 0:
+        print("Another process is reconciling the task counters, nothing done.")
+    else:
+        print(f"Task counters reconciled, {fixed} projects corrected.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,29 @@
-from typing import Optional, List
-from sqlalchemy import String, DateTime
+from typing import AsyncIterator, Iterator, List, Optional
+from sqlalchemy import String, DateTime, Index, any_, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, mapped_column, Mapped
 from datetime import datetime
 
 from config.database import Base
+from config.passwords import hash_password, hash_password_async
+from models.pagination import PageRequest
 from models.user import User, UserCreate
+from repos.pagination import stream_page, stream_page_async
 
 class UserRepository:
 
     class _UserDB(Base):
         __tablename__ = "users"
 
-        id: Mapped[int] = mapped_column(primary_key=True, index=True)
+        __table_args__ = (
+            Index("ix_users_created_at", "created_at", "id"),
+        )
+
+        id: Mapped[int] = mapped_column(primary_key=True)
         nombre: Mapped[str] = mapped_column(String, unique=True, index=True)
-        password_hash: Mapped[str] = mapped_column(String)
-        created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
+        # Private: never selected for raw (FAST_JSON) pages, which skip the response model
+        password_hash: Mapped[str] = mapped_column(String, info={"private": True})
+        created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
     def __init__(self, db_session: Session):
         self.db = db_session
@@ -23,17 +32,17 @@ class UserRepository:
         db_obj = self.db.query(self._UserDB).filter(self._UserDB.id == user_id).first()
         return self._to_domain(db_obj) if db_obj else None
 
+    def get_by_ids(self, user_ids: List[int]) -> List[User]:
+        return [self._to_domain(db_obj) for db_obj in self.db.scalars(self.by_ids_query(user_ids))]
+
     def get_by_nombre(self, nombre: str) -> Optional[User]:
         db_obj = self.db.query(self._UserDB).filter(self._UserDB.nombre == nombre).first()
         return self._to_domain(db_obj) if db_obj else None
 
     def create(self, user_data: UserCreate) -> User:
-        import hashlib
-        password_hash = hashlib.sha256(user_data.password.encode()).hexdigest()
-
         db_obj = self._UserDB(
             nombre=user_data.nombre,
-            password_hash=password_hash
+            password_hash=hash_password(user_data.password)
         )
         self.db.add(db_obj)
         self.db.commit()
@@ -41,31 +50,44 @@ class UserRepository:
         return self._to_domain(db_obj)
 
     def update(self, user_id: int, user_data: UserCreate) -> Optional[User]:
-        db_obj = self.db.query(self._UserDB).filter(self._UserDB.id == user_id).first()
-        if not db_obj:
-            return None
-
-        db_obj.nombre = user_data.nombre
+        values = {"nombre": user_data.nombre}
         if user_data.password:
-            import hashlib
-            db_obj.password_hash = hashlib.sha256(user_data.password.encode()).hexdigest()
+            values["password_hash"] = hash_password(user_data.password)
+        db_obj = self.db.scalars(self.update_query(user_id, values)).first()
+        # Read before commit: expire_on_commit would reload the row
+        user = self._to_domain(db_obj) if db_obj else None
+        self.db.commit()
+        return user
 
+    def set_password_hash(self, user_id: int, password_hash: str) -> None:
+        self.db.execute(update(self._UserDB).where(self._UserDB.id == user_id).values(password_hash=password_hash))
         self.db.commit()
-        self.db.refresh(db_obj)
-        return self._to_domain(db_obj)
 
     def delete(self, user_id: int) -> bool:
-        db_obj = self.db.query(self._UserDB).filter(self._UserDB.id == user_id).first()
-        if not db_obj:
-            return False
-
-        self.db.delete(db_obj)
+        deleted = self.db.execute(self.delete_query(user_id)).first() is not None
         self.db.commit()
-        return True
+        return deleted
+
+    @classmethod
+    def by_ids_query(cls, user_ids: List[int]):
+        """The rows of ``user_ids`` in one query (id = ANY(:ids)), in no particular order"""
+        user = cls._UserDB
+        return select(user).where(user.id == any_(user_ids))
+
+    @classmethod
+    def update_query(cls, user_id: int, values: dict):
+        """UPDATE ... RETURNING the whole row, one round trip instead of SELECT + UPDATE + refresh"""
+        user = cls._UserDB
+        return update(user).where(user.id == user_id).values(**values).returning(user)
 
-    def get_all(self) -> List[User]:
-        db_objs = self.db.query(self._UserDB).all()
-        return [self._to_domain(db_obj) for db_obj in db_objs]
+    @classmethod
+    def delete_query(cls, user_id: int):
+        user = cls._UserDB
+        return delete(user).where(user.id == user_id).returning(user.id)
+
+    def get_page(self, page: PageRequest) -> Iterator[User]:
+        """Stream one keyset page of users"""
+        return stream_page(self.db, self._UserDB, page, (), self._to_domain)
 
     def _to_domain(self, db_obj: _UserDB) -> User:
         return User(
@@ -73,4 +95,57 @@ class UserRepository:
             nombre=db_obj.nombre,
             password_hash=db_obj.password_hash,
             created_at=db_obj.created_at
-        )
\ No newline at end of file
+        )
+
+
+class AsyncUserRepository:
+    """UserRepository over an AsyncSession (API_MODE=async)"""
+
+    _UserDB = UserRepository._UserDB
+    _to_domain = UserRepository._to_domain
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        db_obj = await self.db.get(self._UserDB, user_id)
+        return self._to_domain(db_obj) if db_obj else None
+
+    async def get_by_ids(self, user_ids: List[int]) -> List[User]:
+        return [self._to_domain(db_obj) for db_obj in await self.db.scalars(UserRepository.by_ids_query(user_ids))]
+
+    async def get_by_nombre(self, nombre: str) -> Optional[User]:
+        result = await self.db.execute(select(self._UserDB).where(self._UserDB.nombre == nombre))
+        db_obj = result.scalars().first()
+        return self._to_domain(db_obj) if db_obj else None
+
+    async def create(self, user_data: UserCreate) -> User:
+        db_obj = self._UserDB(
+            nombre=user_data.nombre,
+            password_hash=await hash_password_async(user_data.password)
+        )
+        self.db.add(db_obj)
+        await self.db.commit()
+        await self.db.refresh(db_obj)
+        return self._to_domain(db_obj)
+
+    async def update(self, user_id: int, user_data: UserCreate) -> Optional[User]:
+        values = {"nombre": user_data.nombre}
+        if user_data.password:
+            values["password_hash"] = await hash_password_async(user_data.password)
+        db_obj = (await self.db.scalars(UserRepository.update_query(user_id, values))).first()
+        user = self._to_domain(db_obj) if db_obj else None
+        await self.db.commit()
+        return user
+
+    async def set_password_hash(self, user_id: int, password_hash: str) -> None:
+        await self.db.execute(update(self._UserDB).where(self._UserDB.id == user_id).values(password_hash=password_hash))
+        await self.db.commit()
+
+    async def delete(self, user_id: int) -> bool:
+        deleted = (await self.db.execute(UserRepository.delete_query(user_id))).first() is not None
+        await self.db.commit()
+        return deleted
+
+    def get_page(self, page: PageRequest) -> AsyncIterator[User]:
+        return stream_page_async(self.db, self._UserDB, page, (), self._to_domain)
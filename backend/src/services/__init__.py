@@ -1,9 +1,12 @@
-from .user_service import UserService
-from .project_service import ProjectService
-from .task_service import TaskService
+from .user_service import UserService, AsyncUserService
+from .project_service import ProjectService, AsyncProjectService
+from .task_service import TaskService, AsyncTaskService
 
 __all__ = [
     "UserService",
     "ProjectService",
-    "TaskService"
+    "TaskService",
+    "AsyncUserService",
+    "AsyncProjectService",
+    "AsyncTaskService"
 ]
\ No newline at end of file
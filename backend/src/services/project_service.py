@@ -1,66 +1,123 @@
 from typing import List, Optional
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import json
-from config.redis_client import redis_client
-from config.redis_utils import enqueue_project_task
+from config.cache import VersionedCache
+from config.entity_cache import EntityCache
+from config.redis_utils import enqueue_project_task, enqueue_project_task_async
 
-from models.project import Project, ProjectCreate
-from repos.project_repository import ProjectRepository
+from models.job import Job
+from models.pagination import Page, PageRequest
+from models.project import Project, ProjectCreate, ProjectStats
+from repos.project_repository import AsyncProjectRepository, ProjectRepository
+from repos.project_stats_repository import AsyncProjectStatsRepository, ProjectStatsRepository
+from services.task_service import AsyncTaskService, TaskService
 
 class ProjectService:
-    CACHE_KEY = "projects:all"
     CACHE_TTL = 300 #5 min
-    
+    # One entry per user and page, all pages of a user invalidated by bumping its version
+    project_list_cache = VersionedCache("projects:user", event="projects", ttl=CACHE_TTL)
+    # Single projects by id, read by the ownership checks of most routes
+    project_cache = EntityCache("projects", Project)
+
     def __init__(self, db_session: Session):
         self.project_repo = ProjectRepository(db_session)
-        
-    def delete_cache(self):
-        redis_client.delete(self.CACHE_KEY)
+        self.stats_repo = ProjectStatsRepository(db_session)
+
+    @classmethod
+    def invalidate_user_cache(cls, user_id: int) -> None:
+        """Drop the cached project list of a user (after the write has committed)"""
+        cls.project_list_cache.bump(user_id)
 
-    def get_all_projects(self) -> List[Project]:
-        """Get all projects"""
-        projects = self.project_repo.get_all()
-        return [self._to_response(project) for project in projects]
+    @classmethod
+    def get_user_version(cls, user_id: int) -> Optional[int]:
+        """Version of the projects of a user (bumped with the list cache), None if Redis is unavailable"""
+        try:
+            return cls.project_list_cache.get_version(user_id)
+        except RedisError:
+            return None
+
+    def get_all_projects(self, page: PageRequest) -> Page[Project]:
+        """Get a page of all projects"""
+        projects = self.project_repo.get_page(page)
+        return Page.from_rows(projects, page, self._to_response)
 
     def get_project_by_id(self, project_id: int) -> Optional[Project]:
         """Get project by ID"""
-        project = self.project_repo.get_by_id(project_id)
-        return self._to_response(project) if project else None
+        def load() -> Optional[Project]:
+            project = self.project_repo.get_by_id(project_id)
+            return self._to_response(project) if project else None
+
+        return self.project_cache.get(project_id, load)
+
+    def get_projects_by_ids(self, user_id: int, project_ids: List[int]) -> List[Project]:
+        """Get the projects of ``project_ids`` owned by the user with one query, in that order"""
+        found = {project.id: project for project in self.project_repo.get_by_ids(project_ids, user_id)}
+        return [self._to_response(found[project_id]) for project_id in project_ids if project_id in found]
+
+    def get_owned_project_ids(self, user_id: int, project_ids: List[int]) -> List[int]:
+        """The ids among ``project_ids`` of projects owned by the user"""
+        return self.project_repo.get_owned_ids(user_id, project_ids)
+
+    @staticmethod
+    def get_stats_version(project_id: int) -> Optional[int]:
+        """The counters change with the tasks, so they share the project's task version"""
+        return TaskService.get_project_version(project_id)
 
+    @staticmethod
+    def stats_written_key(project_id: int) -> str:
+        """Write mark of the version get_stats_version reads (see VersionCounter.written_key)"""
+        return TaskService.project_versions.written_key(project_id)
 
-    def create_project(self, project_data: ProjectCreate, user_id: int):
-        enqueue_project_task(project_data, user_id)
-        return {"message": "Project creation enqueued."}
+    def get_project_stats(self, project_id: int) -> ProjectStats:
+        """Task counters of a project, kept up to date by the database"""
+        return self.stats_repo.get_by_project_id(project_id)
 
+    def get_user_project_stats(self, user_id: int) -> List[ProjectStats]:
+        """Task counters of every project of a user"""
+        return self.stats_repo.get_by_user_id(user_id)
 
-    # def create_project(self, project_data: ProjectCreate, user_id: int) -> Project:
-    #     """Create a new project"""
-    #     project = self.project_repo.create(project_data, user_id)
-    #     self.delete_cache()
-    #     return self._to_response(project)
+    def create_project(self, project_data: ProjectCreate, user_id: int) -> Job:
+        """Queue the creation of a project, its progress is tracked as a job"""
+        job_id = enqueue_project_task(project_data, user_id)
+        return Job(id=job_id, status="queued")
 
     def delete_project(self, project_id: int) -> bool:
         """Delete a project"""
         project = self.project_repo.get_by_id(project_id)
-        self.delete_cache()
-        if project and project.can_be_deleted():
-            return self.project_repo.delete(project_id)
-        return False
+        if not project or not project.can_be_deleted():
+            return False
 
-    def get_projects_by_user(self, user_id: int) -> List[Project]:
-        """Get all projects for a specific user"""
-        cached_projects = redis_client.get(self.CACHE_KEY)
-        if cached_projects:
-            print("Cache hit")
-            return json.loads(cached_projects)
+        deleted = self.project_repo.delete(project_id)
+        if deleted:
+            # Evicted before the version moves, like the tasks in TaskService.bump_projects
+            self.project_cache.invalidate(ids=[project_id])
+            self.invalidate_user_cache(project.user_id)
+            TaskService.bump_projects(project_id)
+        return deleted
 
-        print("Cache miss")
-        projects = self.project_repo.get_by_user_id(user_id)
-        response = [self._to_response(p) for p in projects]
+    def get_projects_by_user(self, user_id: int, page: PageRequest) -> Page[Project]:
+        """Get a page of the projects of a specific user"""
+        def load() -> dict:
+            projects = self.project_repo.get_by_user_id(user_id, page)
+            return Page.from_rows(projects, page, self._to_response).model_dump(mode="json")
 
-        redis_client.setex(self.CACHE_KEY, self.CACHE_TTL, json.dumps(response))
+        cached_page = self.project_list_cache.get_or_load(user_id, load, variant=self.page_cache_variant(page))
+        return self.from_cache(cached_page, page)
 
-        return response
+    @staticmethod
+    def from_cache(cached_page: dict, page: PageRequest) -> Page[Project]:
+        # The cached JSON serves both paths, raw pages only parse back the cursor
+        if page.raw:
+            return Page(**cached_page, raw=True)
+        return Page[Project].model_validate(cached_page)
+
+    @staticmethod
+    def page_cache_variant(page: PageRequest) -> str:
+        if page.after is None:
+            return str(page.limit)
+        created_at, project_id = page.after
+        return f"{page.limit}:{created_at.isoformat()}:{project_id}"
 
     def _to_response(self, project: Project) -> Project:
         """Convert domain model to response model"""
@@ -70,4 +127,95 @@ class ProjectService:
             description=project.description,
             user_id=project.user_id,
             created_at=project.created_at
-        )
\ No newline at end of file
+        )
+
+
+class AsyncProjectService:
+    """ProjectService for the async request path, sharing its list cache"""
+
+    project_list_cache = ProjectService.project_list_cache
+    project_cache = ProjectService.project_cache
+    stats_written_key = ProjectService.stats_written_key
+    _to_response = ProjectService._to_response
+
+    def __init__(self, db_session: AsyncSession):
+        self.project_repo = AsyncProjectRepository(db_session)
+        self.stats_repo = AsyncProjectStatsRepository(db_session)
+
+    @classmethod
+    async def invalidate_user_cache(cls, user_id: int) -> None:
+        """Drop the cached project list of a user (after the write has committed)"""
+        await cls.project_list_cache.bump_async(user_id)
+
+    @classmethod
+    async def get_user_version(cls, user_id: int) -> Optional[int]:
+        """Version of the projects of a user (bumped with the list cache), None if Redis is unavailable"""
+        try:
+            return await cls.project_list_cache.get_version_async(user_id)
+        except RedisError:
+            return None
+
+    async def get_all_projects(self, page: PageRequest) -> Page[Project]:
+        """Get a page of all projects"""
+        projects = self.project_repo.get_page(page)
+        return await Page.from_async_rows(projects, page, self._to_response)
+
+    async def get_project_by_id(self, project_id: int) -> Optional[Project]:
+        """Get project by ID"""
+        async def load() -> Optional[Project]:
+            project = await self.project_repo.get_by_id(project_id)
+            return self._to_response(project) if project else None
+
+        return await self.project_cache.get_async(project_id, load)
+
+    async def get_projects_by_ids(self, user_id: int, project_ids: List[int]) -> List[Project]:
+        """Get the projects of ``project_ids`` owned by the user with one query, in that order"""
+        found = {project.id: project for project in await self.project_repo.get_by_ids(project_ids, user_id)}
+        return [self._to_response(found[project_id]) for project_id in project_ids if project_id in found]
+
+    async def get_owned_project_ids(self, user_id: int, project_ids: List[int]) -> List[int]:
+        """The ids among ``project_ids`` of projects owned by the user"""
+        return await self.project_repo.get_owned_ids(user_id, project_ids)
+
+    @staticmethod
+    async def get_stats_version(project_id: int) -> Optional[int]:
+        """The counters change with the tasks, so they share the project's task version"""
+        return await AsyncTaskService.get_project_version(project_id)
+
+    async def get_project_stats(self, project_id: int) -> ProjectStats:
+        """Task counters of a project, kept up to date by the database"""
+        return await self.stats_repo.get_by_project_id(project_id)
+
+    async def get_user_project_stats(self, user_id: int) -> List[ProjectStats]:
+        """Task counters of every project of a user"""
+        return await self.stats_repo.get_by_user_id(user_id)
+
+    async def create_project(self, project_data: ProjectCreate, user_id: int) -> Job:
+        """Queue the creation of a project, its progress is tracked as a job"""
+        job_id = await enqueue_project_task_async(project_data, user_id)
+        return Job(id=job_id, status="queued")
+
+    async def delete_project(self, project_id: int) -> bool:
+        """Delete a project"""
+        project = await self.project_repo.get_by_id(project_id)
+        if not project or not project.can_be_deleted():
+            return False
+
+        deleted = await self.project_repo.delete(project_id)
+        if deleted:
+            await self.project_cache.invalidate_async(ids=[project_id])
+            await self.invalidate_user_cache(project.user_id)
+            await AsyncTaskService.bump_projects(project_id)
+        return deleted
+
+    async def get_projects_by_user(self, user_id: int, page: PageRequest) -> Page[Project]:
+        """Get a page of the projects of a specific user"""
+        async def load() -> dict:
+            projects = self.project_repo.get_by_user_id(user_id, page)
+            page_result = await Page.from_async_rows(projects, page, self._to_response)
+            return page_result.model_dump(mode="json")
+
+        cached_page = await self.project_list_cache.get_or_load_async(
+            user_id, load, variant=ProjectService.page_cache_variant(page)
+        )
+        return ProjectService.from_cache(cached_page, page)
@@ -0,0 +1,62 @@
+import re
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.search import SearchHit, SearchPage, SearchRequest
+from repos.search_repository import AsyncSearchRepository, SearchRepository
+
+class SearchService:
+    # Words of a query beyond this are ignored
+    MAX_TERMS = 8
+    # Shorter last words are matched whole: a one letter prefix matches half the index
+    MIN_PREFIX_LENGTH = 2
+
+    def __init__(self, db_session: Session):
+        self.search_repo = SearchRepository(db_session)
+
+    def search(self, user_id: int, request: SearchRequest) -> SearchPage:
+        """Ranked page of the projects and tasks of a user matching the query"""
+        tsquery = self.to_tsquery(request.q, request.prefix)
+        if tsquery is None:
+            return SearchPage(items=[])
+        hits = self.search_repo.search(user_id, tsquery, request.limit + 1, request.after)
+        return self.to_page(hits, request.limit)
+
+    @classmethod
+    def to_tsquery(cls, q: str, prefix: bool = True) -> Optional[str]:
+        """
+        Turn free text into to_tsquery syntax: every word must match, the last one as a prefix
+
+        Only word characters are kept, so user input can never be a
+        to_tsquery syntax error. None if there is no word to search for.
+        """
+        terms = re.findall(r"\w+", q.lower())[:cls.MAX_TERMS]
+        if not terms:
+            return None
+        if prefix and len(terms[-1]) >= cls.MIN_PREFIX_LENGTH:
+            terms[-1] += ":*"
+        return " & ".join(terms)
+
+    @staticmethod
+    def to_page(hits: List[SearchHit], limit: int) -> SearchPage:
+        """Build a page from up to ``limit + 1`` hits; the extra one only signals there is a next page"""
+        if len(hits) <= limit:
+            return SearchPage(items=hits)
+        last = hits[limit - 1]
+        return SearchPage(items=hits[:limit], next_cursor=(last.rank, last.kind, last.id))
+
+
+class AsyncSearchService:
+    """SearchService for the async request path"""
+
+    def __init__(self, db_session: AsyncSession):
+        self.search_repo = AsyncSearchRepository(db_session)
+
+    async def search(self, user_id: int, request: SearchRequest) -> SearchPage:
+        """Ranked page of the projects and tasks of a user matching the query"""
+        tsquery = SearchService.to_tsquery(request.q, request.prefix)
+        if tsquery is None:
+            return SearchPage(items=[])
+        hits = await self.search_repo.search(user_id, tsquery, request.limit + 1, request.after)
+        return SearchService.to_page(hits, request.limit)
@@ -1,56 +1,144 @@
 from typing import List, Optional
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.task import Task, TaskCreate
-from repos.task_repository import TaskRepository
+from config.cache import VersionCounter
+from config.entity_cache import EntityCache
+from models.pagination import Page, PageRequest
+from models.task import Task, TaskBulkItem, TaskBulkResult, TaskCreate, TaskNode
+from repos.task_repository import AsyncTaskRepository, TaskRepository
 
 class TaskService:
+    # Bumped after every write to the tasks of a project: the ETags of its listings, its /api/stream events
+    project_versions = VersionCounter("tasks:project", event="tasks")
+    # Single tasks by id, tagged with their project: every write that bumps a project evicts its tasks
+    task_cache = EntityCache("tasks", Task, tags=lambda task: [f"project:{task.project_id}"])
+
     def __init__(self, db_session: Session):
         self.task_repo = TaskRepository(db_session)
 
-    def get_all_tasks(self) -> List[Task]:
-        """Get all tasks"""
-        tasks = self.task_repo.get_all()
-        return [self._to_response(task) for task in tasks]
+    @classmethod
+    def get_project_version(cls, project_id: int) -> Optional[int]:
+        """Version of the tasks of a project, None if Redis is unavailable"""
+        try:
+            return cls.project_versions.get_version(project_id)
+        except RedisError:
+            return None
+
+    @classmethod
+    def bump_projects(cls, *project_ids: int) -> None:
+        """Move the tasks of these projects to a new version (after the write has committed)"""
+        # Evict first: a reader that sees the new version must not find the old task cached
+        cls.task_cache.invalidate(tags=[f"project:{project_id}" for project_id in project_ids])
+        cls.project_versions.bump_many(set(project_ids))
+
+    def get_all_tasks(
+        self,
+        current_user_id: int,
+        page: PageRequest,
+        completed: Optional[bool] = None,
+        project_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> Page[Task]:
+        """Get a page of the tasks visible to a user (own projects or assigned), optionally filtered"""
+        tasks = self.task_repo.get_page(
+            page, visible_to=current_user_id, completed=completed, project_id=project_id, user_id=user_id
+        )
+        return Page.from_rows(tasks, page, self._to_response)
 
     def get_task_by_id(self, task_id: int) -> Optional[Task]:
         """Get task by ID"""
-        task = self.task_repo.get_by_id(task_id)
-        return self._to_response(task) if task else None
+        def load() -> Optional[Task]:
+            task = self.task_repo.get_by_id(task_id)
+            return self._to_response(task) if task else None
+
+        return self.task_cache.get(task_id, load)
+
+    def get_tasks_by_ids(self, current_user_id: int, task_ids: List[int]) -> List[Task]:
+        """Get the tasks of ``task_ids`` visible to a user with one query, in that order"""
+        found = {task.id: task for task in self.task_repo.get_by_ids(task_ids, visible_to=current_user_id)}
+        return [self._to_response(found[task_id]) for task_id in task_ids if task_id in found]
 
     def create_task(self, task_data: TaskCreate) -> Task:
         """Create a new task"""
         task = self.task_repo.create(task_data)
+        self.bump_projects(task.project_id)
         return self._to_response(task)
 
+    def create_tasks_bulk(self, items: List[TaskBulkItem]) -> TaskBulkResult:
+        """Create a batch of tasks (and subtasks linked by temp_id) in one transaction"""
+        if len(items) > TaskRepository.BULK_MAX_ITEMS:
+            raise ValueError(f"Máximo {TaskRepository.BULK_MAX_ITEMS} tareas por lote")
+        try:
+            ids = self.task_repo.create_many(items)
+        except IntegrityError:
+            self.task_repo.db.rollback()
+            raise ValueError("Alguna tarea referencia un proyecto, usuario o tarea padre inexistente")
+        self.bump_projects(*(item.project_id for item in items))
+        return _bulk_result(items, ids)
+
     def update_task(self, task_id: int, task_data: TaskCreate) -> Optional[Task]:
         """Update an existing task"""
-        task = self.task_repo.update(task_id, task_data)
-        return self._to_response(task) if task else None
+        updated = self.task_repo.update(task_id, task_data)
+        if not updated:
+            return None
+        task, previous_project_id = updated
+        self.bump_projects(task.project_id, previous_project_id)
+        return self._to_response(task)
 
     def mark_task_completed(self, task_id: int) -> Optional[Task]:
         """Mark a task as completed"""
         task = self.task_repo.mark_completed(task_id)
-        return self._to_response(task) if task else None
+        if not task:
+            return None
+        self.bump_projects(task.project_id)
+        return self._to_response(task)
 
     def delete_task(self, task_id: int) -> bool:
         """Delete a task"""
-        return self.task_repo.delete(task_id)
+        project_id = self.task_repo.delete(task_id)
+        if project_id is None:
+            return False
+        self.bump_projects(project_id)
+        return True
+
+    def get_tasks_by_project(self, project_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the tasks of a specific project"""
+        tasks = self.task_repo.get_by_project_id(project_id, page)
+        return Page.from_rows(tasks, page, self._to_response)
+
+    def get_tasks_by_user(self, user_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the tasks assigned to a specific user"""
+        tasks = self.task_repo.get_by_user_id(user_id, page)
+        return Page.from_rows(tasks, page, self._to_response)
+
+    def get_subtasks(self, parent_task_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the subtasks of a parent task"""
+        tasks = self.task_repo.get_subtasks(parent_task_id, page)
+        return Page.from_rows(tasks, page, self._to_response)
+
+    def get_task_tree(self, task_id: int, max_depth: Optional[int] = None) -> Optional[TaskNode]:
+        """Get a task with all its subtasks nested (one query)"""
+        roots = _nest(self.task_repo.get_tree(task_id, max_depth))
+        return roots[0] if roots else None
 
-    def get_tasks_by_project(self, project_id: int) -> List[Task]:
-        """Get all tasks for a specific project"""
-        tasks = self.task_repo.get_by_project_id(project_id)
-        return [self._to_response(task) for task in tasks]
+    def get_project_tree(self, project_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        """Get every task of a project nested under its root tasks (one query)"""
+        return _nest(self.task_repo.get_project_tree(project_id, max_depth))
 
-    def get_tasks_by_user(self, user_id: int) -> List[Task]:
-        """Get all tasks assigned to a specific user"""
-        tasks = self.task_repo.get_by_user_id(user_id)
-        return [self._to_response(task) for task in tasks]
+    def delete_task_tree(self, task_id: int) -> int:
+        """Delete a task and all its subtasks, returns how many tasks were deleted"""
+        project_ids = self.task_repo.delete_subtree(task_id)
+        self.bump_projects(*project_ids)
+        return len(project_ids)
 
-    def get_subtasks(self, parent_task_id: int) -> List[Task]:
-        """Get all subtasks of a parent task"""
-        tasks = self.task_repo.get_subtasks(parent_task_id)
-        return [self._to_response(task) for task in tasks]
+    def complete_task_tree(self, task_id: int) -> int:
+        """Mark a task and all its subtasks as completed, returns how many tasks were updated"""
+        project_ids = self.task_repo.complete_subtree(task_id)
+        self.bump_projects(*project_ids)
+        return len(project_ids)
 
     def create_subtask(self, parent_task_id: int, task_data: TaskCreate) -> Optional[Task]:
         """Create a subtask for an existing task"""
@@ -62,6 +150,7 @@ class TaskService:
         # Set the parent task ID
         task_data.parent_task_id = parent_task_id
         task = self.task_repo.create(task_data)
+        self.bump_projects(task.project_id)
         return self._to_response(task)
 
     def _to_response(self, task: Task) -> Task:
@@ -74,4 +163,165 @@ class TaskService:
             parent_task_id=task.parent_task_id,
             created_at=task.created_at,
             completed=task.completed
-        )
\ No newline at end of file
+        )
+
+
+class AsyncTaskService:
+    """TaskService for the async request path, sharing its version counters"""
+
+    project_versions = TaskService.project_versions
+    task_cache = TaskService.task_cache
+    _to_response = TaskService._to_response
+
+    def __init__(self, db_session: AsyncSession):
+        self.task_repo = AsyncTaskRepository(db_session)
+
+    @classmethod
+    async def get_project_version(cls, project_id: int) -> Optional[int]:
+        """Version of the tasks of a project, None if Redis is unavailable"""
+        try:
+            return await cls.project_versions.get_version_async(project_id)
+        except RedisError:
+            return None
+
+    @classmethod
+    async def bump_projects(cls, *project_ids: int) -> None:
+        """Move the tasks of these projects to a new version (after the write has committed)"""
+        await cls.task_cache.invalidate_async(tags=[f"project:{project_id}" for project_id in project_ids])
+        await cls.project_versions.bump_many_async(set(project_ids))
+
+    async def get_all_tasks(
+        self,
+        current_user_id: int,
+        page: PageRequest,
+        completed: Optional[bool] = None,
+        project_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> Page[Task]:
+        """Get a page of the tasks visible to a user (own projects or assigned), optionally filtered"""
+        tasks = self.task_repo.get_page(
+            page, visible_to=current_user_id, completed=completed, project_id=project_id, user_id=user_id
+        )
+        return await Page.from_async_rows(tasks, page, self._to_response)
+
+    async def get_task_by_id(self, task_id: int) -> Optional[Task]:
+        """Get task by ID"""
+        async def load() -> Optional[Task]:
+            task = await self.task_repo.get_by_id(task_id)
+            return self._to_response(task) if task else None
+
+        return await self.task_cache.get_async(task_id, load)
+
+    async def get_tasks_by_ids(self, current_user_id: int, task_ids: List[int]) -> List[Task]:
+        """Get the tasks of ``task_ids`` visible to a user with one query, in that order"""
+        found = {task.id: task for task in await self.task_repo.get_by_ids(task_ids, visible_to=current_user_id)}
+        return [self._to_response(found[task_id]) for task_id in task_ids if task_id in found]
+
+    async def create_task(self, task_data: TaskCreate) -> Task:
+        """Create a new task"""
+        task = await self.task_repo.create(task_data)
+        await self.bump_projects(task.project_id)
+        return self._to_response(task)
+
+    async def create_tasks_bulk(self, items: List[TaskBulkItem]) -> TaskBulkResult:
+        """Create a batch of tasks (and subtasks linked by temp_id) in one transaction"""
+        if len(items) > TaskRepository.BULK_MAX_ITEMS:
+            raise ValueError(f"Máximo {TaskRepository.BULK_MAX_ITEMS} tareas por lote")
+        try:
+            ids = await self.task_repo.create_many(items)
+        except IntegrityError:
+            await self.task_repo.db.rollback()
+            raise ValueError("Alguna tarea referencia un proyecto, usuario o tarea padre inexistente")
+        await self.bump_projects(*(item.project_id for item in items))
+        return _bulk_result(items, ids)
+
+    async def update_task(self, task_id: int, task_data: TaskCreate) -> Optional[Task]:
+        """Update an existing task"""
+        updated = await self.task_repo.update(task_id, task_data)
+        if not updated:
+            return None
+        task, previous_project_id = updated
+        await self.bump_projects(task.project_id, previous_project_id)
+        return self._to_response(task)
+
+    async def mark_task_completed(self, task_id: int) -> Optional[Task]:
+        """Mark a task as completed"""
+        task = await self.task_repo.mark_completed(task_id)
+        if not task:
+            return None
+        await self.bump_projects(task.project_id)
+        return self._to_response(task)
+
+    async def delete_task(self, task_id: int) -> bool:
+        """Delete a task"""
+        project_id = await self.task_repo.delete(task_id)
+        if project_id is None:
+            return False
+        await self.bump_projects(project_id)
+        return True
+
+    async def get_tasks_by_project(self, project_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the tasks of a specific project"""
+        tasks = self.task_repo.get_by_project_id(project_id, page)
+        return await Page.from_async_rows(tasks, page, self._to_response)
+
+    async def get_tasks_by_user(self, user_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the tasks assigned to a specific user"""
+        tasks = self.task_repo.get_by_user_id(user_id, page)
+        return await Page.from_async_rows(tasks, page, self._to_response)
+
+    async def get_subtasks(self, parent_task_id: int, page: PageRequest) -> Page[Task]:
+        """Get a page of the subtasks of a parent task"""
+        tasks = self.task_repo.get_subtasks(parent_task_id, page)
+        return await Page.from_async_rows(tasks, page, self._to_response)
+
+    async def get_task_tree(self, task_id: int, max_depth: Optional[int] = None) -> Optional[TaskNode]:
+        """Get a task with all its subtasks nested (one query)"""
+        roots = _nest(await self.task_repo.get_tree(task_id, max_depth))
+        return roots[0] if roots else None
+
+    async def get_project_tree(self, project_id: int, max_depth: Optional[int] = None) -> List[TaskNode]:
+        """Get every task of a project nested under its root tasks (one query)"""
+        return _nest(await self.task_repo.get_project_tree(project_id, max_depth))
+
+    async def delete_task_tree(self, task_id: int) -> int:
+        """Delete a task and all its subtasks, returns how many tasks were deleted"""
+        project_ids = await self.task_repo.delete_subtree(task_id)
+        await self.bump_projects(*project_ids)
+        return len(project_ids)
+
+    async def complete_task_tree(self, task_id: int) -> int:
+        """Mark a task and all its subtasks as completed, returns how many tasks were updated"""
+        project_ids = await self.task_repo.complete_subtree(task_id)
+        await self.bump_projects(*project_ids)
+        return len(project_ids)
+
+    async def create_subtask(self, parent_task_id: int, task_data: TaskCreate) -> Optional[Task]:
+        """Create a subtask for an existing task"""
+        parent_task = await self.task_repo.get_by_id(parent_task_id)
+        if not parent_task or not parent_task.can_have_subtasks():
+            return None
+
+        task_data.parent_task_id = parent_task_id
+        task = await self.task_repo.create(task_data)
+        await self.bump_projects(task.project_id)
+        return self._to_response(task)
+
+
+def _bulk_result(items: List[TaskBulkItem], ids: List[int]) -> TaskBulkResult:
+    temp_ids = {item.temp_id: new_id for item, new_id in zip(items, ids) if item.temp_id is not None}
+    return TaskBulkResult(ids=ids, temp_ids=temp_ids)
+
+
+def _nest(nodes: List[TaskNode]) -> List[TaskNode]:
+    """Link depth-first ordered nodes into trees and return the roots"""
+    by_id = {}
+    roots = []
+    for node in nodes:
+        parent = by_id.get(node.parent_task_id) if node.depth > 0 else None
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+        by_id[node.id] = node
+    return roots
@@ -1,28 +1,54 @@
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from config.entity_cache import EntityCache
+from config.passwords import verify_password, verify_password_async
+from models.pagination import Page, PageRequest
 from models.user import User, UserCreate
-from repos.user_repository import UserRepository
+from repos.user_repository import AsyncUserRepository, UserRepository
 
 class UserService:
+    user_cache = EntityCache("users", User)
+
     def __init__(self, db_session: Session):
         self.user_repo = UserRepository(db_session)
 
-    def get_all_users(self) -> List[User]:
-        """Get all users"""
-        users = self.user_repo.get_all()
-        return [self._to_response(user) for user in users]
+    def get_all_users(self, page: PageRequest) -> Page[User]:
+        """Get a page of all users"""
+        users = self.user_repo.get_page(page)
+        return Page.from_rows(users, page, self._to_response)
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        user = self.user_repo.get_by_id(user_id)
-        return self._to_response(user) if user else None
+        def load() -> Optional[User]:
+            user = self.user_repo.get_by_id(user_id)
+            return self._to_response(user) if user else None
+
+        return self.user_cache.get(user_id, load)
+
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Get the users of ``user_ids`` with one query, in that order, skipping the missing ones"""
+        found = {user.id: user for user in self.user_repo.get_by_ids(user_ids)}
+        return [self._to_response(found[user_id]) for user_id in user_ids if user_id in found]
 
     def get_user_by_nombre(self, nombre: str) -> Optional[User]:
         """Get user by nombre (username)"""
         user = self.user_repo.get_by_nombre(nombre)
         return self._to_response(user) if user else None
 
+    def authenticate(self, nombre: str, password: str) -> Optional[User]:
+        """User matching the credentials, upgrading its password hash if outdated (e.g. legacy SHA-256)"""
+        user = self.user_repo.get_by_nombre(nombre)
+        if not user or not user.password_hash:
+            return None
+        valid, new_hash = verify_password(password, user.password_hash)
+        if not valid:
+            return None
+        if new_hash:
+            self.user_repo.set_password_hash(user.id, new_hash)
+        return self._to_response(user)
+
     def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
         user = self.user_repo.create(user_data)
@@ -31,17 +57,81 @@ class UserService:
     def update_user(self, user_id: int, user_data: UserCreate) -> Optional[User]:
         """Update an existing user"""
         user = self.user_repo.update(user_id, user_data)
+        self.user_cache.invalidate(ids=[user_id])
         return self._to_response(user) if user else None
 
     def delete_user(self, user_id: int) -> bool:
         """Delete a user"""
-        return self.user_repo.delete(user_id)
+        deleted = self.user_repo.delete(user_id)
+        self.user_cache.invalidate(ids=[user_id])
+        return deleted
 
     def _to_response(self, user: User) -> User:
-        """Convert domain model to response model"""
+        """Convert domain model to response model, without the password hash (it is also what user_cache stores)"""
         return User(
             id=user.id,
             nombre=user.nombre,
-            created_at=user.created_at,
-            password_hash=user.password_hash
-        )
\ No newline at end of file
+            created_at=user.created_at
+        )
+
+
+class AsyncUserService:
+    """UserService for the async request path"""
+
+    user_cache = UserService.user_cache
+    _to_response = UserService._to_response
+
+    def __init__(self, db_session: AsyncSession):
+        self.user_repo = AsyncUserRepository(db_session)
+
+    async def get_all_users(self, page: PageRequest) -> Page[User]:
+        """Get a page of all users"""
+        users = self.user_repo.get_page(page)
+        return await Page.from_async_rows(users, page, self._to_response)
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        async def load() -> Optional[User]:
+            user = await self.user_repo.get_by_id(user_id)
+            return self._to_response(user) if user else None
+
+        return await self.user_cache.get_async(user_id, load)
+
+    async def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Get the users of ``user_ids`` with one query, in that order, skipping the missing ones"""
+        found = {user.id: user for user in await self.user_repo.get_by_ids(user_ids)}
+        return [self._to_response(found[user_id]) for user_id in user_ids if user_id in found]
+
+    async def get_user_by_nombre(self, nombre: str) -> Optional[User]:
+        """Get user by nombre (username)"""
+        user = await self.user_repo.get_by_nombre(nombre)
+        return self._to_response(user) if user else None
+
+    async def authenticate(self, nombre: str, password: str) -> Optional[User]:
+        """User matching the credentials, upgrading its password hash if outdated (e.g. legacy SHA-256)"""
+        user = await self.user_repo.get_by_nombre(nombre)
+        if not user or not user.password_hash:
+            return None
+        valid, new_hash = await verify_password_async(password, user.password_hash)
+        if not valid:
+            return None
+        if new_hash:
+            await self.user_repo.set_password_hash(user.id, new_hash)
+        return self._to_response(user)
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        """Create a new user"""
+        user = await self.user_repo.create(user_data)
+        return self._to_response(user)
+
+    async def update_user(self, user_id: int, user_data: UserCreate) -> Optional[User]:
+        """Update an existing user"""
+        user = await self.user_repo.update(user_id, user_data)
+        await self.user_cache.invalidate_async(ids=[user_id])
+        return self._to_response(user) if user else None
+
+    async def delete_user(self, user_id: int) -> bool:
+        """Delete a user"""
+        deleted = await self.user_repo.delete(user_id)
+        await self.user_cache.invalidate_async(ids=[user_id])
+        return deleted
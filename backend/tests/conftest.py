@@ -0,0 +1,98 @@
+"""Shared test setup.
+
+The app modules bind the Redis clients of config.redis_client at import, so
+they are swapped for fakeredis clients on one in-process server here, before
+any test imports the app. Tests that need Postgres take the ``database``
+fixture, skipped when DATABASE_URL is not set.
+"""
+import os
+
+# Cheap hashes; the worker processes inherit the environment
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4")
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+
+import config.redis_client  # noqa: E402
+
+redis_server = fakeredis.FakeServer()
+
+
+def _fake_client(**overrides):
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+
+def _fake_async_client(**overrides):
+    return fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+
+
+config.redis_client.make_client = _fake_client
+config.redis_client.make_async_client = _fake_async_client
+config.redis_client.redis_client = _fake_client()
+config.redis_client.async_redis_client = _fake_async_client()
+config.redis_client.async_pubsub_client = _fake_async_client()
+
+
+@pytest.fixture(autouse=True)
+def redis_data():
+    """Every test starts with an empty, reachable Redis"""
+    redis_server.connected = True
+    config.redis_client.redis_client.flushall()
+    yield redis_server
+    redis_server.connected = True
+
+
+@pytest.fixture
+def redis_down(redis_data):
+    """Every Redis command fails with a ConnectionError"""
+    redis_data.connected = False
+    yield
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The migrated primary engine, for tests that need a disposable Postgres"""
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL not set")
+    from config.database import engine, run_migrations
+
+    run_migrations()
+    return engine
+
+
+@pytest.fixture
+def project(database):
+    """(user_id, project_id) of a fresh user owning one project, deleted with its tasks afterwards"""
+    from sqlalchemy import text
+
+    with database.begin() as connection:
+        user_id = connection.execute(text(
+            "INSERT INTO users (nombre, password_hash, created_at) VALUES ('test_' || gen_random_uuid(), 'x', now()) RETURNING id"
+        )).scalar_one()
+        project_id = connection.execute(text(
+            "INSERT INTO projects (nombre, user_id, created_at) VALUES ('test', :user_id, now()) RETURNING id"
+        ), {"user_id": user_id}).scalar_one()
+    yield user_id, project_id
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM tasks WHERE project_id IN (SELECT id FROM projects WHERE user_id = :id)"), {"id": user_id})
+        connection.execute(text("DELETE FROM projects WHERE user_id = :id"), {"id": user_id})
+        connection.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+
+@pytest.fixture
+def run_async(database):
+    """asyncio.run for tests on the async engine: its pooled connections are bound to the loop, close them with it"""
+    import asyncio
+
+    from config.database import async_engine
+
+    def run(coroutine):
+        async def main():
+            try:
+                return await coroutine
+            finally:
+                await async_engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,37 @@
+"""API_MODE=async serves the same API as the sync routers, over the async repositories"""
+import uuid
+
+import pytest
+
+ROUTERS = ["auth_router", "job_router", "project_router", "search_router", "stream_router", "task_router", "user_router"]
+
+
+def _routes(module_name):
+    module = __import__(f"api.{module_name}", fromlist=["router"])
+    return {(route.path, method, getattr(route, "status_code", None))
+            for route in module.router.routes for method in getattr(route, "methods", None) or {"WS"}}
+
+
+@pytest.mark.parametrize("name", ROUTERS)
+def test_async_router_matches_the_sync_one(name):
+    assert _routes(f"async_{name}") == _routes(name)
+
+
+def test_async_repository_reads_what_the_sync_one_wrote(database, run_async):
+    from config.database import AsyncSessionLocal, SessionLocal
+    from models.user import UserCreate
+    from repos.user_repository import AsyncUserRepository, UserRepository
+
+    with SessionLocal() as db:
+        user = UserRepository(db).create(UserCreate(nombre=f"async_{uuid.uuid4().hex}", password="secret"))
+
+    async def read():
+        async with AsyncSessionLocal() as db:
+            repository = AsyncUserRepository(db)
+            return (await repository.get_by_id(user.id), await repository.get_by_nombre(user.nombre),
+                    await repository.delete(user.id), await repository.get_by_id(user.id))
+
+    by_id, by_nombre, deleted, after = run_async(read())
+
+    assert by_id == user and by_nombre == user
+    assert deleted and after is None
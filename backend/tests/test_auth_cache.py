@@ -0,0 +1,93 @@
+"""Token and principal lookups of the auth dependency (config/jwt.py, config/ttl_cache.py, config/auth_dependency.py)"""
+import contextlib
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from config import auth_dependency, jwt
+from config.ttl_cache import TTLCache
+
+
+def test_ttl_cache_evicts_the_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_ttl_cache_of_size_zero_stores_nothing():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_valid_tokens_are_memoized(monkeypatch):
+    token = jwt.create_access_token({"sub": "7"})
+    assert jwt.verify_token(token)["sub"] == "7"
+
+    monkeypatch.setattr(jwt.jwt, "decode", lambda *args, **kwargs: pytest.fail("decoded again"))
+    assert jwt.verify_token(token)["sub"] == "7"
+
+
+def test_invalid_and_expired_tokens_are_rejected():
+    expired = jwt.create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-1))
+
+    assert jwt.verify_token(expired) is None
+    assert jwt.verify_token("not-a-token") is None
+
+
+class FakeUserService:
+    users = {}
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_user_by_id(self, user_id):
+        return self.users.get((self.db, user_id))
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    monkeypatch.setattr(auth_dependency, "UserService", FakeUserService)
+    monkeypatch.setattr(auth_dependency, "SessionLocal", lambda: contextlib.nullcontext("primary"))
+    FakeUserService.users = {}
+    return FakeUserService.users
+
+
+def _credentials(user_id):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=jwt.create_access_token({"sub": str(user_id)}))
+
+
+def test_current_user_comes_from_the_read_session(sessions):
+    sessions[("replica", 7)] = "user 7"
+
+    assert auth_dependency.get_current_user(_credentials(7), "replica") == "user 7"
+
+
+def test_user_missing_on_the_replica_is_looked_up_on_the_primary(sessions):
+    sessions[("primary", 7)] = "user 7"
+
+    assert auth_dependency.get_current_user(_credentials(7), "replica") == "user 7"
+
+
+def test_unknown_user_and_bad_token_are_401(sessions):
+    with pytest.raises(HTTPException) as missing:
+        auth_dependency.get_current_user(_credentials(7), "replica")
+    with pytest.raises(HTTPException) as invalid:
+        auth_dependency.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials="x"), "replica")
+
+    assert missing.value.status_code == invalid.value.status_code == 401
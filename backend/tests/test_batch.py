@@ -0,0 +1,154 @@
+"""Batch lookups: ?ids= parsing and limits, request order and X-Missing-Ids (api/batch.py)"""
+import importlib
+
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from api.batch import MAX_BATCH_IDS, MAX_ID, MISSING_IDS_HEADER, batch_ids, batch_response
+from models.task import Task
+from models.user import User
+
+
+def test_ids_keep_request_order_once_each():
+    assert batch_ids(None) is None
+    assert batch_ids("3, 1,3,,2,") == [3, 1, 2]
+    assert batch_ids("") == []
+
+
+@pytest.mark.parametrize("ids", ["1,x", "1.5", f"{MAX_ID + 1}", f"-{MAX_ID + 1}"])
+def test_malformed_ids_are_a_400(ids):
+    with pytest.raises(HTTPException) as error:
+        batch_ids(ids)
+
+    assert (error.value.status_code, error.value.detail) == (400, "Lista de ids inválida")
+
+
+def test_too_many_ids_are_a_400():
+    assert len(batch_ids(",".join(map(str, range(MAX_BATCH_IDS))))) == MAX_BATCH_IDS
+
+    with pytest.raises(HTTPException) as error:
+        batch_ids(",".join(map(str, range(MAX_BATCH_IDS + 1))))
+
+    assert error.value.status_code == 400
+
+
+def _task(task_id):
+    return Task(id=task_id, detalle=f"task {task_id}", project_id=1)
+
+
+def test_missing_ids_are_listed_in_request_order():
+    response = Response()
+
+    items = batch_response(response, [5, 2, 9, 1], [_task(2), _task(1)])
+
+    assert [item.id for item in items] == [2, 1]
+    assert response.headers[MISSING_IDS_HEADER] == "5,9"
+
+
+def test_nothing_missing_means_no_header():
+    response = Response()
+
+    batch_response(response, [1], [_task(1)])
+
+    assert MISSING_IDS_HEADER not in response.headers
+
+
+class FakeTaskService:
+    def __init__(self):
+        self.tasks = {1: _task(1), 2: _task(2)}
+
+    def get_tasks_by_ids(self, user_id, task_ids):
+        return [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+
+    def get_all_tasks(self, *args, **kwargs):
+        pytest.fail("a batch lookup is not a listing")
+
+
+class AsyncFakeTaskService(FakeTaskService):
+    async def get_tasks_by_ids(self, user_id, task_ids):
+        return super().get_tasks_by_ids(user_id, task_ids)
+
+
+@pytest.fixture(params=["task_router", "async_task_router"])
+def client(request):
+    router = importlib.import_module(f"api.{request.param}")
+    service = FakeTaskService() if request.param == "task_router" else AsyncFakeTaskService()
+    app = FastAPI()
+    app.include_router(router.router)
+    app.dependency_overrides[router.get_current_user] = lambda: User(id=7, nombre="ana")
+    app.dependency_overrides[router.get_task_read_service] = lambda: service
+    return TestClient(app)
+
+
+def test_route_answers_in_request_order(client):
+    response = client.get("/api/tasks", params={"ids": "2,8,1", "limit": 1})
+
+    assert [task["id"] for task in response.json()] == [2, 1]
+    assert response.headers[MISSING_IDS_HEADER] == "8"
+
+
+def test_route_rejects_bad_ids(client):
+    assert client.get("/api/tasks", params={"ids": "1;2"}).status_code == 400
+
+
+@pytest.fixture
+def stranger_project(database):
+    """Project id of another user, with one task"""
+    with database.begin() as connection:
+        user_id = connection.execute(text(
+            "INSERT INTO users (nombre, password_hash, created_at) VALUES ('test_' || gen_random_uuid(), 'x', now()) RETURNING id"
+        )).scalar_one()
+        project_id = connection.execute(text(
+            "INSERT INTO projects (nombre, user_id, created_at) VALUES ('ajeno', :id, now()) RETURNING id"
+        ), {"id": user_id}).scalar_one()
+    yield project_id
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM tasks WHERE project_id = :id"), {"id": project_id})
+        connection.execute(text("DELETE FROM projects WHERE user_id = :id"), {"id": user_id})
+        connection.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+
+def _insert_task(database, project_id, user_id=None):
+    with database.begin() as connection:
+        return connection.execute(text(
+            "INSERT INTO tasks (detalle, project_id, user_id, completed, created_at) "
+            "VALUES ('t', :project_id, :user_id, false, now()) RETURNING id"
+        ), {"project_id": project_id, "user_id": user_id}).scalar_one()
+
+
+def test_batches_only_return_what_the_user_can_see(project, stranger_project, database):
+    from config.database import SessionLocal
+    from services.project_service import ProjectService
+    from services.task_service import TaskService
+
+    user_id, project_id = project
+    own = _insert_task(database, project_id)
+    hidden = _insert_task(database, stranger_project)
+    assigned = _insert_task(database, stranger_project, user_id=user_id)
+
+    with SessionLocal() as db:
+        tasks = TaskService(db).get_tasks_by_ids(user_id, [assigned, hidden, own])
+        projects = ProjectService(db).get_projects_by_ids(user_id, [stranger_project, project_id])
+
+    assert [task.id for task in tasks] == [assigned, own]
+    assert [project.id for project in projects] == [project_id]
+
+
+def test_async_batches_match_sync(project, stranger_project, database, run_async):
+    from config.database import AsyncSessionLocal, SessionLocal
+    from services.task_service import AsyncTaskService, TaskService
+
+    user_id, project_id = project
+    ids = [_insert_task(database, stranger_project), _insert_task(database, project_id), _insert_task(database, project_id)]
+
+    async def get():
+        async with AsyncSessionLocal() as db:
+            return await AsyncTaskService(db).get_tasks_by_ids(user_id, ids[::-1])
+
+    with SessionLocal() as db:
+        expected = TaskService(db).get_tasks_by_ids(user_id, ids[::-1])
+
+    assert [task.id for task in expected] == ids[:0:-1]
+    assert run_async(get()) == expected
@@ -0,0 +1,168 @@
+"""VersionCounter and VersionedCache: seeded counters, batched bumps, single-flight fills, bump invalidation (config/cache.py)"""
+import asyncio
+import json
+import threading
+
+import config.cache
+from config import metrics
+from config.cache import VersionCounter, VersionedCache
+from config.database import DB_READ_YOUR_WRITES_WINDOW
+
+
+class Loader:
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return self.value
+
+
+def test_miss_fills_then_hits():
+    cache = VersionedCache("test")
+    loader = Loader({"items": [1, 2]})
+
+    assert cache.get_or_load(7, loader) == {"items": [1, 2]}
+    assert cache.get_or_load(7, loader) == {"items": [1, 2]}
+    assert loader.calls == 1
+
+
+def test_bump_invalidates_every_variant_of_the_scope():
+    cache = VersionedCache("test")
+    first, second, other = Loader("a"), Loader("b"), Loader("c")
+    cache.get_or_load(7, first, variant="page1")
+    cache.get_or_load(7, second, variant="page2")
+    cache.get_or_load(8, other)
+    version = cache.get_version(7)
+
+    cache.bump(7)
+
+    assert cache.get_version(7) == version + 1
+    cache.get_or_load(7, first, variant="page1")
+    cache.get_or_load(7, second, variant="page2")
+    cache.get_or_load(8, other)
+    assert (first.calls, second.calls, other.calls) == (2, 2, 1)
+
+
+def test_missing_counter_is_seeded_not_restarted():
+    cache = VersionedCache("test")
+
+    assert cache.get_version(7) > 1_000_000_000_000
+
+
+def test_concurrent_misses_share_one_fill():
+    cache = VersionedCache("test", poll_interval=0.005)
+    loader = Loader([1], delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(7, loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[1]] * 5
+    assert loader.calls == 1
+
+
+def test_failed_fill_releases_the_lock():
+    cache = VersionedCache("test", wait_timeout=0.1)
+
+    def broken():
+        raise RuntimeError("db down")
+
+    try:
+        cache.get_or_load(7, broken)
+    except RuntimeError:
+        pass
+    loader = Loader("ok")
+
+    assert cache.get_or_load(7, loader) == "ok"
+    assert loader.calls == 1
+
+
+def test_redis_down_falls_through_to_the_loader(redis_down):
+    cache = VersionedCache("test")
+    loader = Loader("fresh")
+
+    assert cache.get_or_load(7, loader) == "fresh"
+    assert cache.get_or_load(7, loader) == "fresh"
+    assert loader.calls == 2
+    cache.bump(7)  # logged, not raised
+
+
+def test_async_path_shares_entries_and_invalidations():
+    cache = VersionedCache("test")
+    loader = Loader("sync")
+    cache.get_or_load(7, loader)
+
+    async def async_loader():
+        return "async"
+
+    assert asyncio.run(cache.get_or_load_async(7, async_loader)) == "sync"
+    asyncio.run(cache.bump_async(7))
+    assert asyncio.run(cache.get_or_load_async(7, async_loader)) == "async"
+    assert cache.get_or_load(7, loader) == "async"
+
+
+def test_bump_many_moves_each_scope_once_in_one_round_trip(monkeypatch):
+    counter = VersionCounter("test")
+    before = {scope: counter.get_version(scope) for scope in (1, 2)}
+    pipelines = []
+    pipeline = config.cache.redis_client.pipeline
+    monkeypatch.setattr(config.cache.redis_client, "pipeline", lambda **kw: pipelines.append(kw) or pipeline(**kw))
+
+    counter.bump_many([1, 2, 3])
+
+    assert len(pipelines) == 1
+    assert [counter.get_version(scope) for scope in (1, 2)] == [before[1] + 1, before[2] + 1]
+    assert counter.get_version(3) > 1_000_000_000_000
+
+
+def test_bump_marks_the_scope_written_for_the_window():
+    counter = VersionCounter("test")
+
+    counter.bump(7)
+
+    ttl = config.cache.redis_client.pttl(counter.written_key(7))
+    assert 0 < ttl <= DB_READ_YOUR_WRITES_WINDOW * 1000
+    assert config.cache.redis_client.exists(counter.written_key(8)) == 0
+
+
+def test_bump_publishes_the_change_event():
+    counter = VersionCounter("test", event="tasks")
+    pubsub = config.cache.redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe("events:project:7")
+    pubsub.get_message(timeout=0.05)  # the subscribe confirmation
+
+    asyncio.run(counter.bump_many_async([7, 8]))
+
+    message = pubsub.get_message(timeout=1)
+    assert json.loads(message["data"]) == {"type": "tasks", "project_id": 7}
+    assert pubsub.get_message(timeout=0.05) is None
+    pubsub.close()
+
+
+def test_failed_bump_is_counted_not_raised(redis_down):
+    before = metrics.snapshot().get("cache_errors", {}).get("test", 0)
+
+    VersionCounter("test").bump_many([1, 2])
+    asyncio.run(VersionCounter("test").bump_async(1))
+
+    assert metrics.snapshot()["cache_errors"]["test"] == before + 2
+
+
+def test_hit_is_one_round_trip(monkeypatch):
+    cache = VersionedCache("test")
+    cache.get_or_load(7, Loader("a"))
+    commands = []
+    execute = config.cache.redis_client.execute_command
+    monkeypatch.setattr(
+        config.cache.redis_client, "execute_command", lambda *args, **kw: commands.append(args[0]) or execute(*args, **kw)
+    )
+
+    assert cache.get_or_load(7, Loader("b")) == "a"
+    assert commands == ["MGET"]
@@ -0,0 +1,62 @@
+"""Pool checkout instrumentation (config/db_pool.py), on a SQLite file database"""
+import pytest
+from sqlalchemy import create_engine, exc
+
+from config.db_pool import WAIT_BUCKETS, InstrumentedQueuePool, PoolStats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    engine.pool.stats = PoolStats()
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_are_timed_into_a_cumulative_histogram(engine):
+    for _ in range(3):
+        engine.connect().close()
+
+    stats = engine.pool.stats.snapshot(engine.pool)
+
+    assert stats["pool"] == "InstrumentedQueuePool"
+    wait = stats["checkout_wait_seconds"]
+    assert wait["count"] == 3
+    assert wait["buckets"]["+Inf"] == 3
+    assert list(wait["buckets"]) == [str(bound) for bound in WAIT_BUCKETS] + ["+Inf"]
+    counts = list(wait["buckets"].values())
+    assert counts == sorted(counts)
+    assert (stats["size"], stats["checked_out"], stats["checked_in"]) == (1, 0, 1)
+
+
+def test_checkout_timeouts_are_counted(engine):
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = engine.pool.stats.snapshot(engine.pool)
+    held.close()
+
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["checkout_wait_seconds"]["sum"] >= 0.05
+
+
+def test_dispose_keeps_reporting_into_the_same_stats(engine):
+    stats = engine.pool.stats
+    engine.connect().close()
+
+    engine.dispose()
+    engine.connect().close()
+
+    assert engine.pool.stats is stats
+    assert stats.snapshot(engine.pool)["checkout_wait_seconds"]["count"] == 2
+
+
+def test_pool_stats_reports_both_engines():
+    from config.database import pool_stats
+
+    stats = pool_stats()
+
+    assert stats["sync"]["pool"] == "InstrumentedQueuePool"
+    assert stats["async"]["pool"] == "InstrumentedAsyncAdaptedQueuePool"
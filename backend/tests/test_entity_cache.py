@@ -0,0 +1,240 @@
+"""EntityCache: two-tier fills, invalidation by id and tag, fill holds and the L1 guards (config/entity_cache.py)"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from config import entity_cache
+from config.entity_cache import INVALIDATION_CHANNEL, EntityCache, _on_invalidation
+from config.redis_client import redis_client
+
+
+class Item(BaseModel):
+    id: int
+    project_id: int
+
+
+class Loader:
+    """Loaders of the items of ``projects`` ({item id: project id}), counting the loads"""
+
+    def __init__(self, projects=None):
+        self.items = {item_id: Item(id=item_id, project_id=project_id) for item_id, project_id in (projects or {}).items()}
+        self.calls = 0
+
+    def __call__(self, item_id):
+        def load():
+            self.calls += 1
+            return self.items.get(item_id)
+        return load
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Stand-in for the process' broker: only its connection state matters here"""
+    broker = SimpleNamespace(connected=True)
+    monkeypatch.setattr(entity_cache, "broker", broker)
+    return broker
+
+
+@pytest.fixture
+def cache(events, monkeypatch):
+    monkeypatch.setattr(entity_cache, "ENTITY_CACHE_TYPES", {"test"})
+    cache = EntityCache("test", Item, tags=lambda item: [f"project:{item.project_id}"])
+    yield cache
+    entity_cache._caches.pop("test", None)
+
+
+def test_miss_fills_both_tiers(cache):
+    load = Loader({1: 10})
+    l1_hits = cache.stats()["l1_hits"]
+
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+
+    assert load.calls == 1
+    assert cache.stats()["l1_hits"] == l1_hits + 1
+    assert json.loads(redis_client.get("entity:test:1")) == {"id": 1, "project_id": 10}
+    assert redis_client.smembers("entity:test:tag:project:10") == {"1"}
+
+
+def test_other_processes_fill_l1_from_redis(cache):
+    load = Loader({1: 10})
+    cache.get(1, load(1))
+    cache.evict()  # as if in a process that never read it
+
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+    assert load.calls == 1
+    assert cache.stats()["l1_size"] == 1
+
+
+def test_misses_are_not_cached(cache):
+    load = Loader()
+
+    assert cache.get(1, load(1)) is None
+    assert cache.get(1, load(1)) is None
+    assert load.calls == 2
+
+
+def test_l1_is_bypassed_while_the_broker_is_down(cache, events):
+    load = Loader({1: 10})
+    events.connected = False
+
+    cache.get(1, load(1))
+    cache.get(1, load(1))
+
+    assert load.calls == 1
+    assert cache.stats()["l1_size"] == 0
+    events.connected = True
+    cache.get(1, load(1))
+    assert cache.stats()["l1_size"] == 1
+
+
+def test_invalidate_evicts_both_tiers_and_announces_it(cache):
+    load = Loader({1: 10})
+    cache.get(1, load(1))
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(INVALIDATION_CHANNEL)
+    pubsub.get_message(timeout=0.05)  # the subscribe confirmation
+
+    cache.invalidate(ids=[1])
+
+    assert redis_client.exists("entity:test:1") == 0
+    assert cache.stats()["l1_size"] == 0
+    assert json.loads(pubsub.get_message(timeout=1)["data"]) == {"type": "test", "ids": [1]}
+    pubsub.close()
+
+
+def test_invalidated_entity_is_not_refilled_during_the_hold(cache, monkeypatch):
+    monkeypatch.setattr(entity_cache, "ENTITY_CACHE_FILL_HOLD", 0.1)
+    load = Loader({1: 10})
+    cache.get(1, load(1))
+
+    cache.invalidate(ids=[1])
+    cache.get(1, load(1))
+    cache.get(1, load(1))
+    assert load.calls == 3
+    assert redis_client.exists("entity:test:1") == 0
+
+    time.sleep(0.15)
+    cache.get(1, load(1))
+    cache.get(1, load(1))
+    assert load.calls == 4
+
+
+def test_tags_invalidate_entities_the_writer_does_not_know(cache):
+    load = Loader({1: 10, 2: 10, 3: 11})
+    for item_id in (1, 2, 3):
+        cache.get(item_id, load(item_id))
+
+    cache.invalidate(tags=["project:10"])
+
+    for item_id in (1, 2, 3):
+        cache.get(item_id, load(item_id))
+    # 1 and 2 reloaded (and held back from the cache), 3 still cached
+    assert load.calls == 5
+    assert redis_client.exists("entity:test:1", "entity:test:2", "entity:test:3") == 1
+
+
+def test_read_racing_a_write_stores_nothing(cache):
+    load = Loader({1: 10})
+
+    def stale_read():
+        # The write commits and invalidates while this read is in flight
+        entity = load(1)()
+        cache.invalidate(ids=[1])
+        return entity
+
+    cache.get(1, stale_read)
+
+    assert redis_client.exists("entity:test:1") == 0
+    assert cache.stats()["l1_size"] == 0
+
+
+def test_local_eviction_during_a_read_keeps_it_out_of_l1(cache, monkeypatch):
+    load = Loader({1: 10})
+    cache.get(1, load(1))
+    cache.evict()
+    pipeline = entity_cache.redis_client.pipeline
+
+    def racing_pipeline(**kwargs):
+        pipe = pipeline(**kwargs)
+        execute = pipe.execute
+
+        def execute_then_evict():
+            # Another process' invalidation is received right after the L2 read
+            result = execute()
+            cache.evict([1])
+            return result
+
+        pipe.execute = execute_then_evict
+        return pipe
+
+    monkeypatch.setattr(entity_cache.redis_client, "pipeline", racing_pipeline)
+
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+    assert cache.stats()["l1_size"] == 0
+
+
+def test_invalidation_messages_evict_local_copies(cache):
+    load = Loader({1: 10, 2: 10})
+    cache.get(1, load(1))
+    cache.get(2, load(2))
+
+    _on_invalidation(json.dumps({"type": "test", "ids": [1]}))
+    assert cache.stats()["l1_size"] == 1
+    _on_invalidation(json.dumps({"type": "other", "ids": [2]}))
+    assert cache.stats()["l1_size"] == 1
+    # Lost messages (broker reconnected)
+    _on_invalidation(None)
+    assert cache.stats()["l1_size"] == 0
+
+
+def test_redis_down_falls_through_to_the_loader(cache, redis_down, events):
+    events.connected = False
+    load = Loader({1: 10})
+
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+    assert cache.get(1, load(1)) == Item(id=1, project_id=10)
+    cache.invalidate(ids=[1])  # logged, not raised
+
+    assert load.calls == 2
+    assert cache.stats()["errors"] >= 3
+
+
+def test_async_path_shares_the_tiers(cache):
+    load = Loader({1: 10})
+
+    async def async_load():
+        return load(1)()
+
+    async def fill_then_invalidate():
+        first = await cache.get_async(1, async_load)
+        cache.evict()
+        second = await cache.get_async(1, async_load)
+        await cache.invalidate_async(ids=[1])
+        return first, second
+
+    first, second = asyncio.run(fill_then_invalidate())
+
+    assert first == second == Item(id=1, project_id=10)
+    assert load.calls == 1
+    assert redis_client.exists("entity:test:1") == 0
+    assert cache.stats()["l1_size"] == 0
+
+
+def test_disabled_type_always_loads(events, monkeypatch):
+    monkeypatch.setattr(entity_cache, "ENTITY_CACHE_TYPES", set())
+    cache = EntityCache("test", Item)
+    load = Loader({1: 10})
+    try:
+        cache.get(1, load(1))
+        cache.get(1, load(1))
+        cache.invalidate(ids=[1])
+    finally:
+        entity_cache._caches.pop("test", None)
+
+    assert load.calls == 2
+    assert redis_client.keys("entity:*") == []
@@ -0,0 +1,167 @@
+"""Conditional GETs: ETag helpers and the 304/403/404 paths of the detail routes (api/etag.py)"""
+import importlib
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from api.etag import PROJECT_TASKS, USER_PROJECTS, make_etag, not_modified, requested_versions
+from models.project import Project, ProjectStats
+from models.task import Task
+from models.user import User
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_etags_name_the_scope_version_and_item():
+    assert make_etag(USER_PROJECTS, 7, 5) == 'W/"u7.5"'
+    assert make_etag(PROJECT_TASKS, 3, 5, item=12) == 'W/"p3.5.12"'
+    assert make_etag(USER_PROJECTS, 7, None) is None
+
+
+def test_requested_versions_of_one_kind():
+    request = _request('W/"p3.5.12", "u7.2", W/"p4.1", garbage, ' + ", ".join(f'W/"p{n}.1"' for n in range(10)))
+
+    assert requested_versions(request, PROJECT_TASKS)[:2] == [(3, 5), (4, 1)]
+    assert len(requested_versions(request, PROJECT_TASKS)) == 4
+    assert requested_versions(request, USER_PROJECTS) == [(7, 2)]
+
+
+def test_not_modified_compares_weakly():
+    etag = make_etag(USER_PROJECTS, 7, 5)
+    response = Response()
+
+    assert not_modified(_request('"u7.5"'), Response(), etag).status_code == 304
+    assert not_modified(_request('W/"u7.4", W/"u7.5"'), Response(), etag).headers["ETag"] == etag
+    assert not_modified(_request('W/"u7.4"'), response, etag) is None
+    assert response.headers["ETag"] == etag
+    assert not_modified(_request('W/"u7.5"'), Response(), None) is None
+
+
+class FakeProjectService:
+    def __init__(self):
+        self.version = 5
+        self.projects = {1: Project(id=1, nombre="a", user_id=7), 2: Project(id=2, nombre="b", user_id=7),
+                         3: Project(id=3, nombre="c", user_id=8)}
+
+    def get_user_version(self, user_id):
+        return self.version
+
+    def get_stats_version(self, project_id):
+        return self.version
+
+    def get_project_by_id(self, project_id):
+        return self.projects.get(project_id)
+
+    def get_project_stats(self, project_id):
+        return ProjectStats(project_id=project_id, total=1)
+
+
+class FakeTaskService:
+    def __init__(self):
+        self.versions = {1: 5, 2: 9}
+        self.tasks = {10: Task(id=10, detalle="t", project_id=1), 11: Task(id=11, detalle="u", project_id=1)}
+
+    def get_project_version(self, project_id):
+        return self.versions.get(project_id)
+
+    def get_task_by_id(self, task_id):
+        return self.tasks.get(task_id)
+
+
+class Async:
+    """The async request path's view of a fake service: same state, coroutine methods"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def __getattr__(self, name):
+        method = getattr(self.service, name)
+
+        async def call(*args):
+            return method(*args)
+
+        return call
+
+
+@pytest.fixture(params=["sync", "async"])
+def api(request):
+    prefix = "" if request.param == "sync" else "async_"
+    projects = importlib.import_module(f"api.{prefix}project_router")
+    tasks = importlib.import_module(f"api.{prefix}task_router")
+    project_service, task_service = FakeProjectService(), FakeTaskService()
+    wrap = (lambda service: service) if request.param == "sync" else Async
+
+    app = FastAPI()
+    app.include_router(projects.router)
+    app.include_router(tasks.router)
+    for module in (projects, tasks):
+        app.dependency_overrides[module.get_current_user] = lambda: User(id=7, nombre="ana")
+    app.dependency_overrides[projects.get_user_projects_read_service] = lambda: wrap(project_service)
+    app.dependency_overrides[projects.get_project_stats_read_service] = lambda: wrap(project_service)
+    app.dependency_overrides[tasks.get_task_detail_read_service] = lambda: wrap(task_service)
+    return TestClient(app), project_service, task_service
+
+
+def _get(client, url, etag=None):
+    return client.get(url, headers={"If-None-Match": etag} if etag else {})
+
+
+def test_project_detail_round_trip(api):
+    client, projects, _ = api
+
+    first = _get(client, "/api/projects/1")
+    assert first.headers["ETag"] == 'W/"u7.5.1"'
+    assert _get(client, "/api/projects/1", first.headers["ETag"]).status_code == 304
+
+    projects.version = 6
+    changed = _get(client, "/api/projects/1", first.headers["ETag"])
+    assert (changed.status_code, changed.headers["ETag"]) == (200, 'W/"u7.6.1"')
+
+
+def test_project_tag_never_matches_another_resource(api):
+    client, _, _ = api
+    etag = _get(client, "/api/projects/1").headers["ETag"]
+
+    assert _get(client, "/api/projects/2", etag).status_code == 200
+    assert _get(client, "/api/projects/3", 'W/"u7.5.3"').status_code == 403
+    assert _get(client, "/api/projects/4", 'W/"u7.5.4"').status_code == 404
+
+
+def test_project_stats_check_access_before_the_304(api):
+    client, _, _ = api
+    etag = _get(client, "/api/projects/1/stats").headers["ETag"]
+
+    assert etag == 'W/"p1.5"'
+    assert _get(client, "/api/projects/1/stats", etag).status_code == 304
+    assert _get(client, "/api/projects/3/stats", 'W/"p3.5"').status_code == 403
+    assert _get(client, "/api/projects/4/stats", 'W/"p4.5"').status_code == 404
+
+
+def test_task_detail_round_trip(api):
+    client, _, _ = api
+
+    # Versions are only read for the projects named in If-None-Match, so a bare GET tags version 0
+    first = _get(client, "/api/tasks/10")
+    assert first.headers["ETag"] == 'W/"p1.0.10"'
+    second = _get(client, "/api/tasks/10", first.headers["ETag"])
+    assert (second.status_code, second.headers["ETag"]) == (200, 'W/"p1.5.10"')
+    assert _get(client, "/api/tasks/10", second.headers["ETag"]).status_code == 304
+
+    assert _get(client, "/api/tasks/11", second.headers["ETag"]).status_code == 200
+    assert _get(client, "/api/tasks/12", second.headers["ETag"]).status_code == 404
+
+
+def test_moved_task_is_sent_again(api):
+    client, _, tasks = api
+    _get(client, "/api/tasks/10")
+    etag = _get(client, "/api/tasks/10", 'W/"p1.0.10"').headers["ETag"]
+
+    tasks.tasks[10] = Task(id=10, detalle="t", project_id=2)
+
+    moved = _get(client, "/api/tasks/10", etag)
+    assert (moved.status_code, moved.headers["ETag"]) == (200, 'W/"p2.0.10"')
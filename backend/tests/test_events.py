@@ -0,0 +1,207 @@
+"""Change events: the shared subscription, its fan-out to streams, resyncs and heartbeats (config/events.py)"""
+import asyncio
+import json
+
+import pytest
+
+from config import events
+from config.events import RESYNC, EventBroker, Subscription, change_event, project_channel, user_channel
+from config.redis_client import async_redis_client
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """A fresh broker for config.events, started by the test inside its event loop"""
+    broker = EventBroker()
+    monkeypatch.setattr(events, "broker", broker)
+    return broker
+
+
+async def _connect(broker):
+    broker.start()
+    while not broker.connected:
+        await asyncio.sleep(0.01)
+
+
+async def _stop(broker):
+    # See test_jobs: fakeredis may drop a cancellation racing the last reply
+    await asyncio.sleep(0.05)
+    await broker.stop()
+
+
+async def _publish(event, scope):
+    await async_redis_client.publish(*change_event(event, scope))
+
+
+async def _next(subscription):
+    return await asyncio.wait_for(subscription.queue.get(), 1)
+
+
+def test_events_name_the_scope_not_the_data():
+    assert change_event("projects", 7) == ("events:user:7", '{"type": "projects", "user_id": 7}')
+    assert change_event("tasks", 3) == ("events:project:3", '{"type": "tasks", "project_id": 3}')
+
+
+def test_full_inbox_marks_the_subscription_lagging():
+    async def fill():
+        subscription = Subscription(["c"])
+        for n in range(events.STREAM_QUEUE_SIZE):
+            subscription.push(str(n))
+        assert not subscription.lagging
+        subscription.push("one too many")
+        return subscription
+
+    subscription = asyncio.run(fill())
+
+    assert subscription.lagging
+    assert subscription.queue.qsize() == events.STREAM_QUEUE_SIZE
+
+
+def test_resync_wakes_an_idle_subscription():
+    async def resync():
+        subscription = Subscription(["c"])
+        subscription.resync()
+        return subscription
+
+    subscription = asyncio.run(resync())
+
+    assert subscription.lagging
+    assert subscription.queue.get_nowait() is None
+
+
+def test_one_subscription_fans_out_to_every_stream(broker):
+    async def fan_out():
+        await _connect(broker)
+        first = await broker.subscribe([user_channel(7), project_channel(1)])
+        second = await broker.subscribe([project_channel(1)])
+        other = await broker.subscribe([project_channel(2)])
+        assert broker.stats() == {"streams": 3, "channels": 3, "connected": 1}
+
+        await _publish("tasks", 1)
+        received = [await _next(first), await _next(second)]
+        assert other.queue.empty()
+
+        for subscription in (first, second, other):
+            await broker.unsubscribe(subscription)
+        stats = broker.stats()
+        await _stop(broker)
+        return received, stats
+
+    received, stats = asyncio.run(fan_out())
+
+    assert received == [change_event("tasks", 1)[1]] * 2
+    assert stats == {"streams": 0, "channels": 0, "connected": 1}
+
+
+def test_reconnect_resyncs_streams_and_handlers(broker, redis_data, monkeypatch):
+    # The reader notices the outage on its next read
+    monkeypatch.setattr(events, "STREAM_HEARTBEAT_INTERVAL", 0.1)
+    handled = []
+    broker.on_message("events:cache", handled.append)
+
+    async def outage():
+        await _connect(broker)
+        subscription = await broker.subscribe([user_channel(7)])
+        await async_redis_client.publish("events:cache", "key")
+        while not handled:
+            await asyncio.sleep(0.01)
+
+        redis_data.connected = False
+        while broker.connected:
+            await asyncio.sleep(0.01)
+        redis_data.connected = True
+        # The reader retries after a second
+        message = await asyncio.wait_for(subscription.queue.get(), 3)
+        await broker.unsubscribe(subscription)
+        await _stop(broker)
+        return subscription, message
+
+    subscription, message = asyncio.run(outage())
+
+    assert message is None and subscription.lagging
+    assert handled == ["key", None]
+
+
+def test_stream_sends_ready_events_and_heartbeats(broker, monkeypatch):
+    monkeypatch.setattr(events, "STREAM_HEARTBEAT_INTERVAL", 0.1)
+
+    async def read():
+        await _connect(broker)
+        stream = events.change_event_stream(7, [2, 1, 2])
+        frames = [await anext(stream)]
+        await _publish("projects", 7)
+        frames.append(await anext(stream))
+        frames.append(await anext(stream))
+        await stream.aclose()
+        streams = broker.stats()["streams"]
+        await _stop(broker)
+        return frames, streams
+
+    frames, streams = asyncio.run(read())
+
+    assert frames == [
+        'event: ready\ndata: {"user_id": 7, "project_ids": [1, 2]}\n\n',
+        'event: projects\ndata: {"type": "projects", "user_id": 7}\n\n',
+        ": ping\n\n",
+    ]
+    assert streams == 0
+
+
+def test_lagging_stream_gets_one_resync_then_carries_on(broker, monkeypatch):
+    monkeypatch.setattr(events, "STREAM_QUEUE_SIZE", 2)
+
+    async def lag():
+        await _connect(broker)
+        stream = events.change_events(7, [1])
+        await anext(stream)  # ready
+        for _ in range(4):
+            await _publish("tasks", 1)
+        await asyncio.sleep(0.1)
+        received = [await anext(stream)]
+        await _publish("projects", 7)
+        received.append(await anext(stream))
+        await stream.aclose()
+        await _stop(broker)
+        return received
+
+    assert asyncio.run(lag()) == [RESYNC, ("projects", json.dumps({"type": "projects", "user_id": 7}))]
+
+
+def test_websocket_stream_unsubscribes_when_the_client_leaves(broker, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api import stream_router
+    from config.jwt import create_access_token
+
+    monkeypatch.setattr(events, "STREAM_HEARTBEAT_INTERVAL", 0.05)
+    app = FastAPI()
+    app.include_router(stream_router.router)
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/stream/ws") as websocket:
+            websocket.send_text(create_access_token({"sub": "7"}))
+            assert websocket.receive_json() == {"event": "ready", "data": {"user_id": 7, "project_ids": []}}
+            assert websocket.receive_json() == {"event": "ping", "data": None}
+            assert broker.stats()["streams"] == 1
+
+    assert broker.stats()["streams"] == 0
+
+
+def test_websocket_without_a_valid_token_is_closed(broker):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    from api import stream_router
+
+    app = FastAPI()
+    app.include_router(stream_router.router)
+
+    with TestClient(app).websocket_connect("/api/stream/ws") as websocket:
+        websocket.send_text("Bearer nope")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+
+    assert (closed.value.code, closed.value.reason) == (1008, "Token inválido")
+    assert broker.stats()["streams"] == 0
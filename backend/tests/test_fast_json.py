@@ -0,0 +1,74 @@
+"""FAST_JSON: raw pages encode to the same JSON as the response models (api/pagination.py)"""
+import json
+
+import pytest
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+from api.pagination import NEXT_CURSOR_HEADER, paginate
+from models.pagination import PageRequest
+
+
+def _both(load, limit=2, raw_first=False):
+    """(items, next cursor header) of the model and the raw page of ``load``"""
+    pages = []
+    for raw in (True, False) if raw_first else (False, True):
+        response = Response()
+        result = paginate(response, load(PageRequest(limit=limit, raw=raw)))
+        if raw:
+            # A new Response, carrying the headers set so far
+            items, response = json.loads(result.body), result
+        else:
+            items = jsonable_encoder(result)
+        pages.append((items, response.headers.get(NEXT_CURSOR_HEADER)))
+    return pages[::-1] if raw_first else pages
+
+
+@pytest.fixture
+def session(database):
+    from config.database import SessionLocal
+
+    with SessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def seeded(project, database):
+    user_id, project_id = project
+    with database.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO projects (nombre, description, user_id, created_at) "
+            "SELECT 'p' || g, CASE WHEN g % 2 = 0 THEN 'd' END, :user_id, now() FROM generate_series(1, 3) g"
+        ), {"user_id": user_id})
+        connection.execute(text(
+            "INSERT INTO tasks (detalle, project_id, user_id, completed, created_at) "
+            "SELECT 't' || g, :project_id, CASE WHEN g % 2 = 0 THEN :user_id END, g = 1, now() FROM generate_series(1, 3) g"
+        ), {"user_id": user_id, "project_id": project_id})
+    return user_id, project_id
+
+
+@pytest.mark.parametrize("raw_first", [False, True], ids=["model-fills-cache", "raw-fills-cache"])
+def test_project_pages_match(seeded, session, raw_first):
+    from services.project_service import ProjectService
+
+    model, raw = _both(lambda page: ProjectService(session).get_projects_by_user(seeded[0], page), raw_first=raw_first)
+
+    assert raw == model and model[1] is not None
+
+
+def test_task_pages_match(seeded, session):
+    from services.task_service import TaskService
+
+    model, raw = _both(lambda page: TaskService(session).get_all_tasks(seeded[0], page, project_id=seeded[1]))
+
+    assert raw == model and model[1] is not None
+
+
+def test_user_pages_match(seeded, session):
+    from services.user_service import UserService
+
+    model, raw = _both(lambda page: UserService(session).get_all_users(page), limit=500)
+
+    assert raw == model
+    assert all("password_hash" not in user for user in raw[0])
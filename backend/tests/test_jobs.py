@@ -0,0 +1,141 @@
+"""Job status and waiters: pushed changes, the polling fallback and ownership (config/jobs.py)"""
+import asyncio
+import time
+
+import pytest
+
+from config import jobs
+from config.events import EventBroker
+from config.jobs import _to_job, get_job, job_updates, set_job_status, wait_for_job
+from config.redis_client import async_redis_client, redis_client
+
+
+def _set(job_id, status, **fields):
+    pipe = redis_client.pipeline()
+    set_job_status(pipe, job_id, status, **fields)
+    pipe.execute()
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    """A fresh broker for config.jobs, started by the test inside its event loop"""
+    broker = EventBroker()
+    monkeypatch.setattr(jobs, "broker", broker)
+    return broker
+
+
+async def _connect(broker):
+    broker.start()
+    while not broker.connected:
+        await asyncio.sleep(0.01)
+
+
+async def _stop(broker):
+    # Let the reader take the reply to the last unsubscribe first: fakeredis
+    # waits for replies with asyncio.wait_for, which on Python 3.11 drops a
+    # cancellation that races a result
+    await asyncio.sleep(0.05)
+    await broker.stop()
+
+
+def test_job_belongs_to_its_owner_only():
+    _set("j1", "queued", user_id=7)
+
+    assert get_job("j1", 7).status == "queued"
+    assert get_job("j1", 8) is None
+    assert get_job("missing", 7) is None
+    assert _to_job("j1", {"status": "done"}, 7) is None
+
+
+def test_updates_are_pushed_until_the_job_finishes(broker):
+    _set("j1", "queued", user_id=7)
+
+    async def follow():
+        await _connect(broker)
+        seen = []
+        async for job in job_updates("j1", 7, timeout=5):
+            seen.append(job.status)
+            if job.status == "queued":
+                await _publish("j1", "running")
+                await _publish("j1", "done", project_id=3)
+        await _stop(broker)
+        return seen
+
+    start = time.monotonic()
+    assert asyncio.run(follow()) == ["queued", "running", "done"]
+    assert time.monotonic() - start < jobs.JOB_POLL_INTERVAL
+    assert broker.stats()["streams"] == 0
+
+
+async def _publish(job_id, status, **fields):
+    pipe = async_redis_client.pipeline()
+    set_job_status(pipe, job_id, status, **fields)
+    await pipe.execute()
+
+
+def test_waiters_poll_while_the_broker_is_down(broker, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.05)
+    _set("j1", "queued", user_id=7)
+
+    async def wait():
+        waiter = asyncio.create_task(wait_for_job("j1", 7, timeout=5))
+        await asyncio.sleep(0.1)
+        _set("j1", "done", project_id=3)
+        return await waiter
+
+    job = asyncio.run(wait())
+
+    assert (job.status, job.project_id) == ("done", 3)
+
+
+def test_lagging_waiter_rereads_the_hash(broker):
+    _set("j1", "queued", user_id=7)
+
+    async def follow():
+        updates = job_updates("j1", 7, timeout=5)
+        assert (await anext(updates)).status == "queued"
+        [subscription] = broker._listeners[jobs.job_channel("j1")]
+        _set("j1", "done", project_id=3)
+        subscription.resync()  # as after a lost connection: the messages in between are gone
+        job = await anext(updates)
+        await updates.aclose()
+        return job
+
+    assert asyncio.run(follow()).status == "done"
+
+
+def test_wait_gives_up_with_the_current_state(broker):
+    _set("j1", "running", user_id=7)
+
+    async def wait():
+        await _connect(broker)
+        job = await wait_for_job("j1", 7, timeout=0.1)
+        await _stop(broker)
+        return job
+
+    assert asyncio.run(wait()).status == "running"
+
+
+def test_somebody_elses_job_yields_nothing(broker):
+    _set("j1", "queued", user_id=7)
+
+    assert asyncio.run(wait_for_job("j1", 8, timeout=1)) is None
+    assert broker.stats()["channels"] == 0
+
+
+def test_route_reports_redis_outage_as_503(redis_down):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.job_router import router
+    from config.auth_dependency import get_current_user
+    from models.user import User
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: User(id=7, nombre="test")
+
+    response = TestClient(app).get("/api/jobs/j1")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,62 @@
+"""Load test harness: percentiles, summaries, baseline comparison and the action mix (scripts/load_test.py)"""
+import argparse
+import asyncio
+import random
+import time
+
+import pytest
+
+import load_test
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+
+    assert [load_test.percentile(values, pct) for pct in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert load_test.percentile([7.0], 99) == 7.0
+
+
+def test_summary_counts_failures_and_connection_errors():
+    summary = load_test.summarize([(10.0, 200), (20.0, 201), (30.0, 404), (40.0, 0)], elapsed=2)
+
+    assert (summary["requests"], summary["errors"], summary["rps"]) == (4, 2, 2.0)
+    assert summary["statuses"] == {"0": 1, "200": 1, "201": 1, "404": 1}
+    assert summary["p50_ms"] == 20.0
+
+
+def _result(p95, rps, errors=0, requests=100):
+    return {"routes": {"GET /api/projects": {"p95_ms": p95, "rps": rps, "errors": errors, "requests": requests}}}
+
+
+def test_compare_flags_only_changes_beyond_the_tolerance():
+    baseline = _result(p95=10, rps=100)
+
+    assert load_test.compare(_result(p95=10.9, rps=91), baseline, tolerance=0.1) == []
+    assert len(load_test.compare(_result(p95=12, rps=80, errors=5), baseline, tolerance=0.1)) == 3
+
+
+def test_compare_skips_routes_missing_from_the_run():
+    assert load_test.compare({"routes": {}}, _result(p95=10, rps=100), tolerance=0.1) == []
+
+
+def test_mix_parsing():
+    assert load_test.parse_mix("login=1,list_tasks=3") == {"login": 1, "list_tasks": 3}
+    with pytest.raises(argparse.ArgumentTypeError):
+        load_test.parse_mix("nope=1")
+
+
+def test_same_seed_sends_the_same_action_sequence(monkeypatch):
+    def sequence(seed):
+        calls = []
+
+        async def record(name, *args):
+            calls.append(name)
+            await asyncio.sleep(0)
+
+        monkeypatch.setattr(load_test, "ACTIONS", {name: (lambda *args, name=name: record(name)) for name in ("a", "b")})
+        vu = load_test.VirtualUser(None, random.Random(seed))
+        asyncio.run(asyncio.wait_for(load_test.run_user(None, vu, {"a": 1, "b": 3}, time.monotonic() + 0.05, None), 1))
+        return calls[:20]
+
+    assert sequence("1-0") == sequence("1-0")
+    assert sequence("1-0") != sequence("2-0")
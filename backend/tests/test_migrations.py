@@ -0,0 +1,24 @@
+"""Alembic migrations: the head read at startup and the schema they build (config/database.py, migrations/)"""
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from config.database import ALEMBIC_INI, Base, schema_head, schema_version
+
+
+def test_schema_head_matches_alembic():
+    assert schema_head() == ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+
+
+def test_migrated_database_is_at_the_head(database):
+    assert schema_version() == schema_head()
+
+
+def test_models_match_the_migrated_schema(database):
+    from repos import project_repository, project_stats_repository, task_repository, user_repository  # noqa: F401
+
+    with database.connect() as connection:
+        differences = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+
+    assert differences == []
@@ -0,0 +1,153 @@
+"""Keyset pagination: cursors, page building and the page queries (api/pagination.py, models/pagination.py, repos/pagination.py)"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor, page_request, paginate,
+)
+from models.pagination import Page, PageRequest
+from models.user import User
+from repos.pagination import keyset_query
+from repos.user_repository import UserRepository
+
+START = datetime(2024, 1, 1, 12, 0, 0, 123456)
+
+
+def _user(i):
+    return User(id=i, nombre=f"user{i}", created_at=START + timedelta(seconds=i))
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor((START, 42))) == (START, 42)
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    value = encode_cursor((START, 42))
+
+    assert "=" not in value and "+" not in value and "/" not in value
+
+
+def test_search_cursor_round_trips_the_exact_rank():
+    cursor = (0.1 + 0.2, "task", 9)
+
+    assert decode_search_cursor(encode_search_cursor(cursor)) == cursor
+
+
+@pytest.mark.parametrize("value", ["garbage", encode_cursor((START, 42))[:-3], "//8"])
+def test_malformed_cursor_is_a_400(value):
+    with pytest.raises(HTTPException) as error:
+        page_request(limit=10, after=value)
+
+    assert error.value.status_code == 400
+
+
+def test_page_request_decodes_the_cursor():
+    assert page_request(limit=10, after=encode_cursor((START, 42))).after == (START, 42)
+    assert page_request(limit=10, after=None).after is None
+
+
+def test_from_rows_stops_at_the_limit_and_points_past_the_last_item():
+    page = Page[User].from_rows((_user(i) for i in range(1, 5)), PageRequest(limit=3))
+
+    assert [user.id for user in page.items] == [1, 2, 3]
+    assert page.next_cursor == (_user(3).created_at, 3)
+
+
+def test_from_rows_last_page_has_no_cursor():
+    page = Page[User].from_rows([_user(1), _user(2)], PageRequest(limit=2))
+
+    assert len(page.items) == 2
+    assert page.next_cursor is None
+
+
+def test_from_rows_converts_models_but_keeps_raw_rows():
+    rows = [{"id": i, "nombre": f"user{i}", "created_at": START + timedelta(seconds=i)} for i in range(1, 4)]
+
+    raw = Page.from_rows(rows, PageRequest(limit=2, raw=True), convert=pytest.fail)
+    models = Page[User].from_rows([_user(1)], PageRequest(limit=2), convert=lambda user: user.model_copy(update={"nombre": "x"}))
+
+    assert raw.raw and raw.items == rows[:2] and raw.next_cursor == (rows[1]["created_at"], 2)
+    assert models.items[0].nombre == "x"
+
+
+def test_from_async_rows_matches_from_rows():
+    async def rows():
+        for i in range(1, 5):
+            yield _user(i)
+
+    page = asyncio.run(Page[User].from_async_rows(rows(), PageRequest(limit=3)))
+
+    assert page == Page[User].from_rows((_user(i) for i in range(1, 5)), PageRequest(limit=3))
+
+
+def test_paginate_sets_the_next_cursor_header():
+    response = Response()
+    items = paginate(response, Page[User](items=[_user(1)], next_cursor=(START, 1)))
+
+    assert items == [_user(1)]
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (START, 1)
+
+
+def test_paginate_raw_page_encodes_the_rows():
+    response = paginate(Response(), Page.from_rows([{"id": 1}], PageRequest(limit=5, raw=True)))
+
+    assert response.body == b'[{"id":1}]'
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_raw_query_never_selects_private_columns():
+    raw = keyset_query(UserRepository._UserDB, PageRequest(limit=10, raw=True))
+
+    assert [column.name for column in raw.selected_columns] == ["id", "nombre", "created_at"]
+
+
+def test_raw_query_skips_generated_columns():
+    from repos.task_repository import TaskRepository
+
+    columns = {column.name for column in keyset_query(TaskRepository._TaskDB, PageRequest(raw=True)).selected_columns}
+
+    assert "search_vector" not in columns and "detalle" in columns
+
+
+@pytest.fixture
+def users_db():
+    engine = create_engine("sqlite://")
+    UserRepository._UserDB.__table__.create(engine)
+    with Session(engine) as db:
+        # Two rows share a timestamp: the id breaks the tie
+        db.add_all(UserRepository._UserDB(id=i, nombre=f"user{i}", password_hash="x",
+                                          created_at=START + timedelta(seconds=i // 2)) for i in range(1, 8))
+        db.commit()
+        yield db
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_walking_the_pages_returns_every_row_once(users_db, raw):
+    seen, after = [], None
+    while True:
+        page = PageRequest(limit=3, after=after, raw=raw)
+        result = Page.from_rows(UserRepository(users_db).get_page(page), page)
+        seen += [item["id"] if raw else item.id for item in result.items]
+        if result.next_cursor is None:
+            break
+        after = decode_cursor(encode_cursor(result.next_cursor))
+
+    assert seen == list(range(1, 8))
+
+
+@pytest.mark.parametrize("module", ["api.user_router", "api.async_user_router"])
+def test_user_lists_need_a_token(module):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.include_router(__import__(module, fromlist=["router"]).router)
+    client = TestClient(app)
+
+    assert client.get("/api/users").status_code in (401, 403)
+    assert client.get("/api/users/1").status_code in (401, 403)
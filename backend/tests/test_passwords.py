@@ -0,0 +1,84 @@
+"""Password hashing on the process pool, legacy hash upgrades and load shedding (config/passwords.py)"""
+import asyncio
+import hashlib
+import threading
+
+import pytest
+
+from config import passwords
+from config.passwords import PasswordHasherBusy, hash_password, hash_password_async, verify_password, verify_password_async
+from models.user import User
+from services.user_service import UserService
+
+LEGACY_HASH = hashlib.sha256(b"secret").hexdigest()
+
+
+def test_hash_verifies_and_is_salted():
+    first, second = hash_password("secret"), hash_password("secret")
+
+    assert first != second and first.startswith("$2")
+    assert verify_password("secret", first) == (True, None)
+    assert verify_password("wrong", first) == (False, None)
+
+
+def test_async_hash_verifies():
+    async def roundtrip():
+        return await verify_password_async("secret", await hash_password_async("secret"))
+
+    assert asyncio.run(roundtrip()) == (True, None)
+
+
+def test_legacy_sha256_hash_is_upgraded():
+    valid, new_hash = verify_password("secret", LEGACY_HASH)
+
+    assert valid and new_hash.startswith("$2")
+    assert verify_password("secret", new_hash) == (True, None)
+
+
+def test_saturated_hasher_sheds_load(monkeypatch):
+    monkeypatch.setattr(passwords, "_pending", threading.BoundedSemaphore(1))
+    passwords._pending.acquire()
+
+    with pytest.raises(PasswordHasherBusy):
+        hash_password("secret")
+
+
+def test_pending_slots_are_released():
+    for _ in range(passwords.PASSWORD_HASH_MAX_PENDING + 1):
+        hash_password("secret")
+
+
+class FakeUserRepository:
+    def __init__(self, password_hash):
+        self.user = User(id=7, nombre="ana", password_hash=password_hash)
+        self.saved_hash = None
+
+    def get_by_nombre(self, nombre):
+        return self.user if nombre == self.user.nombre else None
+
+    def set_password_hash(self, user_id, password_hash):
+        self.saved_hash = password_hash
+
+
+def _service(repository):
+    service = UserService(None)
+    service.user_repo = repository
+    return service
+
+
+def test_login_upgrades_a_legacy_hash_and_never_returns_it():
+    repository = FakeUserRepository(LEGACY_HASH)
+
+    user = _service(repository).authenticate("ana", "secret")
+
+    assert user.id == 7 and user.password_hash is None
+    assert verify_password("secret", repository.saved_hash) == (True, None)
+
+
+def test_login_rejects_bad_credentials_without_rehashing():
+    repository = FakeUserRepository(hash_password("secret"))
+
+    assert _service(repository).authenticate("ana", "wrong") is None
+    assert _service(repository).authenticate("nobody", "secret") is None
+    assert _service(repository).authenticate("ana", "secret").id == 7
+    assert repository.saved_hash is None
@@ -0,0 +1,154 @@
+"""Task counters: the triggers of migration 0003 and their reconciliation (repos/project_stats_repository.py, repos/task_stats_reconciler.py)"""
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from models.project import ProjectStats
+
+
+@pytest.fixture
+def projects(project, database):
+    """(user_id, [project_id, second project_id]) of the test user"""
+    user_id, project_id = project
+    with database.begin() as connection:
+        second = connection.execute(text(
+            "INSERT INTO projects (nombre, user_id, created_at) VALUES ('test 2', :user_id, now()) RETURNING id"
+        ), {"user_id": user_id}).scalar_one()
+    return user_id, [project_id, second]
+
+
+def _execute(database, sql, **params):
+    with database.begin() as connection:
+        result = connection.execute(text(sql), params)
+        return result.scalars().all() if result.returns_rows else None
+
+
+def _insert(database, project_id, count, parent=None, completed=False):
+    return _execute(
+        database,
+        "INSERT INTO tasks (detalle, project_id, parent_task_id, completed, created_at) "
+        "SELECT 'task ' || n, :project_id, :parent, :completed, now() FROM generate_series(1, :count) AS n RETURNING id",
+        project_id=project_id, parent=parent, completed=completed, count=count,
+    )
+
+
+def _stats(project_id):
+    from config.database import SessionLocal
+    from repos.project_stats_repository import ProjectStatsRepository
+
+    with SessionLocal() as db:
+        return ProjectStatsRepository(db).get_by_project_id(project_id)
+
+
+def test_triggers_follow_every_kind_of_write(projects, database):
+    _, (first, second) = projects
+    assert _stats(first) == ProjectStats(project_id=first)
+
+    roots = _insert(database, first, 3)
+    subtasks = _insert(database, first, 2, parent=roots[0], completed=True)
+    assert _stats(first) == ProjectStats(project_id=first, total=5, completed=2, subtasks=2)
+
+    _execute(database, "UPDATE tasks SET completed = true WHERE id = ANY(:ids)", ids=roots[1:])
+    _execute(database, "UPDATE tasks SET detalle = 'renamed' WHERE project_id = :id", id=first)
+    assert _stats(first) == ProjectStats(project_id=first, total=5, completed=4, subtasks=2)
+
+    # A subtree moved to another project
+    _execute(database, "UPDATE tasks SET project_id = :to WHERE id = ANY(:ids)", to=second, ids=[roots[0], *subtasks])
+    assert _stats(first) == ProjectStats(project_id=first, total=2, completed=2, subtasks=0)
+    assert _stats(second) == ProjectStats(project_id=second, total=3, completed=2, subtasks=2)
+
+    _execute(database, "DELETE FROM tasks WHERE project_id = :id", id=second)
+    assert _stats(second) == ProjectStats(project_id=second, total=0, completed=0, subtasks=0)
+
+
+def test_user_stats_list_every_project(projects, database):
+    from config.database import SessionLocal
+    from repos.project_stats_repository import ProjectStatsRepository
+
+    user_id, (first, second) = projects
+    _insert(database, first, 2, completed=True)
+
+    with SessionLocal() as db:
+        stats = ProjectStatsRepository(db).get_by_user_id(user_id)
+
+    assert stats == [ProjectStats(project_id=first, total=2, completed=2), ProjectStats(project_id=second)]
+
+
+def test_reconcile_fixes_only_drifted_counters(projects, database):
+    from config.database import SessionLocal
+    from repos.project_stats_repository import ProjectStatsRepository
+
+    _, (first, second) = projects
+    _insert(database, first, 2)
+    _insert(database, second, 1)
+    _execute(database, "UPDATE project_task_stats SET total = 9, subtasks = 1 WHERE project_id = :id", id=first)
+
+    with SessionLocal() as db:
+        assert ProjectStatsRepository(db).reconcile([first, second]) == [first]
+        assert ProjectStatsRepository(db).reconcile([first, second]) == []
+
+    assert _stats(first) == ProjectStats(project_id=first, total=2)
+    assert _stats(second) == ProjectStats(project_id=second, total=1)
+
+
+def test_reconcile_zeroes_a_project_without_tasks(projects, database):
+    from config.database import SessionLocal
+    from repos.project_stats_repository import ProjectStatsRepository
+
+    _, (first, _) = projects
+    _execute(database, "INSERT INTO project_task_stats (project_id, total, completed) VALUES (:id, 3, 1)", id=first)
+
+    with SessionLocal() as db:
+        assert ProjectStatsRepository(db).reconcile([first]) == [first]
+
+    assert _stats(first) == ProjectStats(project_id=first)
+
+
+def test_reconcile_job_bumps_the_fixed_projects(projects, database):
+    from repos.task_stats_reconciler import reconcile_task_stats
+    from services.task_service import TaskService
+
+    _, (first, second) = projects
+    _insert(database, first, 1)
+    _execute(database, "UPDATE project_task_stats SET completed = 1 WHERE project_id = :id", id=first)
+    versions = [TaskService.project_versions.get_version(project_id) for project_id in (first, second)]
+
+    assert reconcile_task_stats() >= 1
+
+    assert _stats(first) == ProjectStats(project_id=first, total=1)
+    assert TaskService.project_versions.get_version(first) == versions[0] + 1
+    assert TaskService.project_versions.get_version(second) == versions[1]
+
+
+def test_reconcile_job_runs_in_one_process_at_a_time(database):
+    from repos.task_stats_reconciler import RECONCILE_LOCK_KEY, reconcile_task_stats
+
+    with database.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": RECONCILE_LOCK_KEY})
+        try:
+            assert reconcile_task_stats() == -1
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RECONCILE_LOCK_KEY})
+
+
+def test_reconciler_thread_runs_until_stopped(projects, database, monkeypatch):
+    import repos.task_stats_reconciler as reconciler
+
+    _, (first, _) = projects
+    _insert(database, first, 1)
+    _execute(database, "UPDATE project_task_stats SET total = 5 WHERE project_id = :id", id=first)
+    monkeypatch.setattr(reconciler, "TASK_STATS_RECONCILE_INTERVAL", 0.01)
+    rounds = threading.Semaphore(0)
+    reconcile = reconciler.reconcile_task_stats
+    monkeypatch.setattr(reconciler, "reconcile_task_stats", lambda stop: (reconcile(stop), rounds.release())[0])
+    stop = threading.Event()
+    thread = reconciler.StatsReconciler(stop)
+
+    thread.start()
+    assert rounds.acquire(timeout=10)
+    stop.set()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert _stats(first) == ProjectStats(project_id=first, total=1)
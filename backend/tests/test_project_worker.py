@@ -0,0 +1,167 @@
+"""Project creation worker: batch fetch, ack, per-job fallback, retries and the reaper (repos/project_worker.py)"""
+import json
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+from config.jobs import get_job
+from config.redis_client import redis_client
+from config.redis_utils import CONSUMERS_KEY, DEAD_LETTER_QUEUE, QUEUE_NAME, enqueue_project_task, processing_key
+from models.project import Project, ProjectCreate
+from repos import project_worker
+from repos.project_worker import ProjectConsumer, reap_stale_consumers, requeue_processing
+
+
+class FakeSession:
+    def rollback(self):
+        pass
+
+
+class FakeProjectRepository:
+    """create_many fails the whole batch when any project is named "bad\""""
+
+    def __init__(self):
+        self.db = FakeSession()
+        self.batches = []
+        self.next_id = 100
+
+    def create_many(self, projects):
+        self.batches.append(len(projects))
+        if any(data.nombre == "bad" for data, _ in projects):
+            raise SQLAlchemyError("insert failed")
+        created = []
+        for data, user_id in projects:
+            self.next_id += 1
+            created.append(Project(id=self.next_id, nombre=data.nombre, user_id=user_id))
+        return created
+
+
+@pytest.fixture
+def consumer():
+    return ProjectConsumer("test-consumer", threading.Event())
+
+
+def _enqueue(*names, user_id=7):
+    return [enqueue_project_task(ProjectCreate(nombre=name), user_id) for name in names]
+
+
+def _run_batch(consumer, repository):
+    batch = consumer.fetch_batch()
+    consumer.process(repository, batch)
+    return batch
+
+
+def test_batch_is_inserted_once_and_acknowledged(consumer):
+    job_ids = _enqueue("a", "b", "c")
+    repository = FakeProjectRepository()
+
+    batch = _run_batch(consumer, repository)
+
+    assert len(batch) == 3 and repository.batches == [3]
+    assert redis_client.llen(consumer.processing) == 0
+    assert redis_client.llen(QUEUE_NAME) == 0
+    assert [get_job(job_id, 7).project_id for job_id in job_ids] == [101, 102, 103]
+    assert {get_job(job_id, 7).status for job_id in job_ids} == {"done"}
+
+
+def test_fetch_is_bounded_by_the_batch_size(consumer, monkeypatch):
+    monkeypatch.setattr(project_worker, "WORKER_BATCH_SIZE", 2)
+    _enqueue("a", "b", "c")
+
+    assert len(consumer.fetch_batch()) == 2
+    assert redis_client.llen(consumer.processing) == 2
+    assert redis_client.llen(QUEUE_NAME) == 1
+
+
+def test_failed_batch_falls_back_to_one_insert_per_job(consumer):
+    good, bad, other = _enqueue("a", "bad", "c")
+    repository = FakeProjectRepository()
+
+    _run_batch(consumer, repository)
+
+    assert repository.batches == [3, 1, 1, 1]
+    assert get_job(good, 7).status == get_job(other, 7).status == "done"
+    assert get_job(bad, 7).status == "queued"
+    requeued = json.loads(redis_client.lindex(QUEUE_NAME, 0))
+    assert (requeued["job_id"], requeued["attempts"]) == (bad, 1)
+    assert redis_client.llen(consumer.processing) == 0
+
+
+def test_job_failing_every_attempt_is_dead_lettered(consumer, monkeypatch):
+    monkeypatch.setattr(project_worker, "WORKER_MAX_ATTEMPTS", 2)
+    [job_id] = _enqueue("bad")
+
+    _run_batch(consumer, FakeProjectRepository())
+    _run_batch(consumer, FakeProjectRepository())
+
+    assert redis_client.llen(QUEUE_NAME) == 0
+    dead = json.loads(redis_client.lindex(DEAD_LETTER_QUEUE, 0))
+    assert (dead["job_id"], dead["attempts"], dead["error"]) == (job_id, 2, "insert failed")
+    assert get_job(job_id, 7).status == "failed"
+
+
+def test_malformed_job_goes_straight_to_the_dead_letter_list(consumer):
+    redis_client.rpush(QUEUE_NAME, "not json")
+    [job_id] = _enqueue("a")
+
+    _run_batch(consumer, FakeProjectRepository())
+
+    assert json.loads(redis_client.lindex(DEAD_LETTER_QUEUE, 0))["raw"] == "not json"
+    assert get_job(job_id, 7).status == "done"
+    assert redis_client.llen(consumer.processing) == 0
+
+
+def test_done_jobs_invalidate_their_owners_project_lists(consumer):
+    from services.project_service import ProjectService
+
+    version = ProjectService.project_list_cache.get_version(7)
+    _enqueue("a")
+
+    _run_batch(consumer, FakeProjectRepository())
+
+    assert ProjectService.project_list_cache.get_version(7) == version + 1
+
+
+def test_crash_before_ack_leaves_the_batch_in_flight(consumer):
+    class Crash(Exception):
+        pass
+
+    class CrashingRepository(FakeProjectRepository):
+        def create_many(self, projects):
+            raise Crash()
+
+    _enqueue("a", "b")
+    batch = consumer.fetch_batch()
+    with pytest.raises(Crash):
+        consumer.process(CrashingRepository(), batch)
+
+    assert redis_client.lrange(consumer.processing, 0, -1) == batch
+    assert requeue_processing(consumer.consumer_id) == 2
+    assert redis_client.lrange(QUEUE_NAME, 0, -1) == batch
+
+
+def test_reaper_requeues_only_stale_consumers(monkeypatch):
+    monkeypatch.setattr(project_worker, "WORKER_STALE_AFTER", 60)
+    redis_client.zadd(CONSUMERS_KEY, {"dead": time.time() - 120, "alive": time.time()})
+    redis_client.rpush(processing_key("dead"), "job-1", "job-2")
+    redis_client.rpush(processing_key("alive"), "job-3")
+
+    assert reap_stale_consumers() == 2
+    assert redis_client.lrange(QUEUE_NAME, 0, -1) == ["job-1", "job-2"]
+    assert redis_client.zrange(CONSUMERS_KEY, 0, -1) == ["alive"]
+    assert redis_client.llen(processing_key("alive")) == 1
+
+
+def test_jobs_are_created_in_the_database(consumer, project, database):
+    from config.database import SessionLocal
+    from repos.project_repository import ProjectRepository
+
+    user_id, _ = project
+    [job_id] = _enqueue("from the queue", user_id=user_id)
+    with SessionLocal() as db:
+        _run_batch(consumer, ProjectRepository(db))
+        created = ProjectRepository(db).get_by_id(get_job(job_id, user_id).project_id)
+
+    assert (created.nombre, created.user_id) == ("from the queue", user_id)
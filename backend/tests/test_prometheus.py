@@ -0,0 +1,78 @@
+"""Metrics: process counters, per-route request metrics with their SQL work, the /metrics exposition (config/metrics.py, config/prometheus.py)"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import create_engine, text
+
+from config import metrics, prometheus
+from config.db_pool import InstrumentedQueuePool, PoolStats
+
+
+def test_counters_are_grouped_by_name():
+    metrics.increment("test_hits", "users")
+    metrics.increment("test_hits", "users", 2)
+    metrics.increment("test_hits", "tasks")
+
+    assert metrics.snapshot()["test_hits"] == {"users": 3, "tasks": 1}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_labelled_by_route_template_with_their_statements(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/metrics.db")
+    prometheus.instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    def get_thing(thing_id: int):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        return {"id": thing_id}
+
+    app.add_middleware(prometheus.PrometheusMiddleware)
+    labels = {"method": "GET", "route": "/things/{thing_id}"}
+    before = (_sample("http_requests_total", status="200", **labels),
+              _sample("http_request_db_statements_sum", **labels))
+
+    client = TestClient(app)
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/nowhere")
+
+    assert _sample("http_requests_total", status="200", **labels) - before[0] == 2
+    assert _sample("http_request_db_statements_sum", **labels) - before[1] == 4
+    assert _sample("http_requests_total", method="GET", route=prometheus.UNMATCHED_ROUTE, status="404") >= 1
+
+
+def _scrape(pools, queue):
+    async def render():
+        return prometheus.render(pools, queue)
+
+    return {family.name: family for family in text_string_to_metric_families(asyncio.run(render()).decode())}
+
+
+def test_exposition_covers_counters_pools_and_queue(tmp_path):
+    metrics.increment("test_scraped", "users")
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool)
+    engine.pool.stats = PoolStats()
+    engine.connect().close()
+    queue = {"depth": 3, "in_flight": 1, "dead": 0, "consumers": 2, "processed_per_second": 1.5, "failed_per_second": 0}
+
+    families = _scrape({"sync": engine.pool.stats.snapshot(engine.pool), "pgbouncer": {"pool": "NullPool"}}, queue)
+
+    assert families["test_scraped"].samples[0].labels == {"label": "users"}
+    wait = {(s.name, s.labels.get("le")): s.value for s in families["db_pool_checkout_wait_seconds"].samples}
+    assert wait[("db_pool_checkout_wait_seconds_count", None)] == 1
+    assert {s.labels["engine"] for s in families["db_pool_connections"].samples} == {"sync"}
+    assert {s.labels["state"]: s.value for s in families["project_queue_jobs"].samples} == {"depth": 3, "in_flight": 1, "dead": 0}
+    assert "threadpool_threads" in families
+
+
+def test_exposition_without_redis_leaves_the_queue_out():
+    assert "project_queue_jobs" not in _scrape({}, None)
@@ -0,0 +1,18 @@
+"""Hot-path queries must not regress to sequential scans (scripts/check_query_plans.py).
+
+Seeds and rolls back inside a transaction, but still needs a disposable
+Postgres in DATABASE_URL; skipped without one.
+"""
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+
+
+def test_repository_queries_use_indexes():
+    import check_query_plans
+
+    failures = check_query_plans.check()
+
+    assert not failures, "Queries regressed to sequential scans:\n" + "\n".join(failures)
@@ -0,0 +1,119 @@
+"""Rate limiting: rules, the Redis token bucket, the per-process fallback and the middleware (config/rate_limit.py)"""
+import asyncio
+from collections import OrderedDict
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config import jwt, metrics, rate_limit
+from config.rate_limit import RateLimit, client_identities, parse_rate_limits, take_token
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    """Fresh per-process state; a generous Redis timeout so a slow first script load does not fall back"""
+    monkeypatch.setattr(rate_limit, "_redis_retry_at", 0.0)
+    monkeypatch.setattr(rate_limit, "_local_buckets", OrderedDict())
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_REDIS_TIMEOUT", 1.0)
+
+
+def _take(keys, rule):
+    return asyncio.run(take_token(keys, rule))
+
+
+def test_rules_prefer_exact_paths_then_longest_prefixes(monkeypatch):
+    default, rules = parse_rate_limits("default=300/60,/api=100/60,/api/auth/login=10/60,/health$=10/10,/health=0/1")
+    monkeypatch.setattr(rate_limit, "_default_rule", default)
+    monkeypatch.setattr(rate_limit, "_rules", rules)
+
+    assert default == RateLimit("default", 300, 60)
+    assert rate_limit.rule_for("/health") == RateLimit("/health", 10, 10, exact=True)
+    assert rate_limit.rule_for("/health/pool").capacity == 0
+    assert rate_limit.rule_for("/api/auth/login").capacity == 10
+    assert rate_limit.rule_for("/api/tasks").capacity == 100
+    assert rate_limit.rule_for("/other") is default
+
+
+def test_bucket_allows_its_capacity_then_asks_to_wait():
+    rule = RateLimit("/x", 3, 30)
+
+    waits = [_take(["ratelimit:/x:ip:1"], rule) for _ in range(4)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert 9 < waits[3] <= 10
+
+
+def test_bucket_refills_over_time():
+    rule = RateLimit("/x", 1, 0.05)
+    assert _take(["ratelimit:/x:ip:1"], rule) == 0
+    assert _take(["ratelimit:/x:ip:1"], rule) > 0
+
+    asyncio.run(asyncio.sleep(0.06))
+
+    assert _take(["ratelimit:/x:ip:1"], rule) == 0
+
+
+def test_request_is_charged_to_every_bucket_or_to_none():
+    rule = RateLimit("/x", 2, 60)
+    ip, user, other_ip = "ratelimit:/x:ip:1", "ratelimit:/x:user:7", "ratelimit:/x:ip:2"
+
+    assert _take([ip, user], rule) == 0
+    assert _take([other_ip, user], rule) == 0
+    # The user's bucket is empty: denied, and the fresh IP keeps its tokens
+    assert _take(["ratelimit:/x:ip:3", user], rule) > 0
+    assert _take(["ratelimit:/x:ip:3"], rule) == 0
+    assert _take(["ratelimit:/x:ip:3"], rule) == 0
+
+
+def test_redis_outage_falls_back_to_local_buckets(redis_down):
+    rule = RateLimit("/x", 2, 60)
+    local_checks = metrics.snapshot().get("rate_limit_local_checks", {}).get("", 0)
+
+    waits = [_take(["ratelimit:/x:ip:1", "ratelimit:/x:user:7"], rule) for _ in range(3)]
+
+    assert waits[:2] == [0, 0] and waits[2] > 0
+    assert rate_limit._redis_retry_at > 0
+    assert metrics.snapshot()["rate_limit_local_checks"][""] - local_checks == 3
+
+
+def test_local_buckets_are_all_or_nothing_and_bounded(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_LOCAL_SIZE", 3)
+    rule = RateLimit("/x", 1, 60)
+
+    assert rate_limit._take_local_token(["a", "user"], rule) == 0
+    assert rate_limit._take_local_token(["b", "user"], rule) > 0
+    assert rate_limit._take_local_token(["b"], rule) == 0
+    rate_limit._take_local_token(["c"], rule)
+    assert list(rate_limit._local_buckets) == ["user", "b", "c"]
+
+
+def _scope(client="10.0.0.1", token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"client": (client, 1234), "headers": headers}
+
+
+def test_identities_are_the_ip_and_a_verified_user():
+    assert client_identities(_scope()) == ["ip:10.0.0.1"]
+    assert client_identities(_scope(token=jwt.create_access_token({"sub": "7"}))) == ["ip:10.0.0.1", "user:7"]
+    assert client_identities(_scope(token="forged")) == ["ip:10.0.0.1"]
+
+
+def test_middleware_answers_429_with_retry_after(monkeypatch):
+    default, rules = parse_rate_limits("default=0/1,/limited=1/60")
+    monkeypatch.setattr(rate_limit, "_default_rule", default)
+    monkeypatch.setattr(rate_limit, "_rules", rules)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    app = FastAPI()
+    app.add_api_route("/limited", lambda: {"ok": True}, methods=["GET", "OPTIONS"])
+    app.add_api_route("/free", lambda: {"ok": True})
+    app.add_middleware(rate_limit.RateLimitMiddleware)
+    client = TestClient(app)
+
+    assert client.get("/limited").status_code == 200
+    denied = client.get("/limited")
+    assert client.options("/limited").status_code == 200
+    assert [client.get("/free").status_code for _ in range(3)] == [200] * 3
+
+    assert denied.status_code == 429
+    assert 1 <= int(denied.headers["Retry-After"]) <= 60
@@ -0,0 +1,156 @@
+"""Read routing: replica rotation and ejection, read-your-writes marks (config/database.py)"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import config.database as database
+from config.database import ReadYourWritesMiddleware, ReplicaSet, async_read_session, read_session, record_write
+from config.jwt import create_access_token
+from config.redis_client import redis_client
+
+
+def _replicas(*urls):
+    return ReplicaSet([create_engine(url) for url in urls], lambda replica: sessionmaker(bind=replica))
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    """Two SQLite replicas and a SQLite primary in config.database, for read_session"""
+    replicas = _replicas("sqlite://", "sqlite://")
+    primary = create_engine("sqlite://")
+    monkeypatch.setattr(database, "replicas", replicas)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=primary))
+    return replicas, primary
+
+
+def test_reads_rotate_over_the_replicas():
+    replicas = _replicas("sqlite://", "sqlite://", "sqlite://")
+
+    assert [replicas.pick() for _ in range(4)] == [0, 1, 2, 0]
+
+
+def test_ejected_replicas_are_skipped_until_they_are_back(monkeypatch):
+    replicas = _replicas("sqlite://", "sqlite://")
+    clock = [100.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: clock[0])
+
+    replicas.eject(0, OSError("down"))
+    assert [replicas.pick() for _ in range(3)] == [1, 1, 1]
+    replicas.eject(1, OSError("down"))
+    assert replicas.pick() is None
+
+    clock[0] += database.DB_REPLICA_EJECT_SECONDS
+    assert not replicas.ejected(0)
+    assert {replicas.pick() for _ in range(2)} == {0, 1}
+
+
+def test_failed_connect_ejects_the_replica(tmp_path):
+    replicas = _replicas(f"sqlite:///{tmp_path}/missing/dir/db.sqlite", "sqlite://")
+
+    with pytest.raises(OperationalError):
+        with replicas.engines[0].connect():
+            pass
+
+    assert replicas.ejected(0)
+    assert not replicas.ejected(1)
+
+
+def test_dropped_connection_ejects_the_replica():
+    replicas = _replicas("sqlite://", "sqlite://")
+
+    class Context:
+        is_disconnect = True
+        original_exception = OSError("connection reset")
+
+    replicas._on_error(1)(Context())
+
+    assert replicas.ejected(1)
+
+
+def test_anonymous_reads_go_to_a_replica(routing):
+    replicas, primary = routing
+
+    with read_session(None) as db:
+        assert db.get_bind() in replicas.engines
+
+
+def test_recent_writes_send_reads_to_the_primary(routing):
+    replicas, primary = routing
+    record_write(redis_client, 7)
+    redis_client.set("test:3:written", 1)
+
+    assert read_session(7).get_bind() is primary
+    assert read_session(8).get_bind() in replicas.engines
+    assert read_session(8, written=["test:3:written"]).get_bind() is primary
+    assert read_session(None, written=["test:4:written"]).get_bind() in replicas.engines
+
+
+def test_reads_fall_back_to_the_primary(routing, redis_down):
+    replicas, primary = routing
+
+    # Redis cannot tell whether the user wrote
+    assert read_session(7).get_bind() is primary
+    replicas.eject(0, OSError("down"))
+    replicas.eject(1, OSError("down"))
+    assert read_session(None).get_bind() is primary
+
+
+def test_async_reads_route_the_same(monkeypatch):
+    # asyncpg engines that are never connected: routing only builds the sessions
+    replicas = ReplicaSet(
+        [create_async_engine("postgresql+asyncpg://replica/db")],
+        lambda replica: async_sessionmaker(replica),
+    )
+    primary = create_async_engine("postgresql+asyncpg://primary/db")
+    monkeypatch.setattr(database, "async_replicas", replicas)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(primary))
+    record_write(redis_client, 7)
+
+    async def binds():
+        return [(await async_read_session(user_id)).bind for user_id in (7, 8)]
+
+    assert asyncio.run(binds()) == [primary, replicas.engines[0]]
+
+
+def _writes_app():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/ok")
+    def ok():
+        return {}
+
+    @app.post("/fail")
+    def fail():
+        raise HTTPException(status_code=400)
+
+    return TestClient(app)
+
+
+def test_successful_writes_mark_their_author(routing):
+    client = _writes_app()
+    token = {"Authorization": f"Bearer {create_access_token({'sub': '7'})}"}
+
+    client.post("/fail", headers=token)
+    assert redis_client.exists("db:recent_write:7") == 0
+    client.post("/ok")
+    assert redis_client.keys("db:recent_write:*") == []
+
+    client.post("/ok", headers=token)
+    assert 0 < redis_client.pttl("db:recent_write:7") <= database.DB_READ_YOUR_WRITES_WINDOW * 1000
+
+
+def test_writes_are_not_marked_without_replicas(monkeypatch):
+    monkeypatch.setattr(database, "replicas", ReplicaSet([], None))
+    monkeypatch.setattr(database, "async_replicas", ReplicaSet([], None))
+
+    _writes_app().post("/ok", headers={"Authorization": f"Bearer {create_access_token({'sub': '7'})}"})
+
+    assert redis_client.exists("db:recent_write:7") == 0
+
@@ -0,0 +1,55 @@
+"""Redis clients: shared pool and timeout settings, per-client overrides (config/redis_client.py)"""
+import asyncio
+import importlib.util
+
+import redis
+import redis.asyncio
+
+
+def _fresh_module(monkeypatch, **env):
+    """config.redis_client as imported with ``env``, unlike the fakeredis-patched one"""
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    spec = importlib.util.find_spec("config.redis_client")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_options_take_overrides(monkeypatch):
+    module = _fresh_module(monkeypatch, REDIS_SOCKET_TIMEOUT="2.5", REDIS_MAX_CONNECTIONS="9")
+
+    options = module._connection_options(socket_timeout=30)
+
+    assert options["socket_timeout"] == 30
+    assert options["max_connections"] == 9
+    assert options["decode_responses"] is True
+    assert module._connection_options()["socket_timeout"] == 2.5
+
+
+def test_clients_get_a_blocking_pool_with_a_short_retry(monkeypatch):
+    module = _fresh_module(
+        monkeypatch, REDIS_URL="redis://cache:6380/2", REDIS_MAX_CONNECTIONS="7", REDIS_POOL_TIMEOUT="0.5",
+        REDIS_RETRIES="2",
+    )
+
+    client = module.make_client(socket_timeout=40)
+    pool = client.connection_pool
+
+    assert isinstance(pool, redis.BlockingConnectionPool)
+    assert (pool.max_connections, pool.timeout) == (7, 0.5)
+    assert pool.connection_kwargs["host"] == "cache"
+    assert pool.connection_kwargs["db"] == 2
+    assert pool.connection_kwargs["socket_timeout"] == 40
+    assert pool.connection_kwargs["retry"]._retries == 2
+
+
+def test_async_clients_get_their_own_pools(monkeypatch):
+    module = _fresh_module(monkeypatch, REDIS_MAX_CONNECTIONS="3")
+
+    pool = module.async_redis_client.connection_pool
+
+    assert isinstance(pool, redis.asyncio.BlockingConnectionPool)
+    assert pool.max_connections == 3
+    assert pool is not module.async_pubsub_client.connection_pool
+    asyncio.run(module.close_clients())
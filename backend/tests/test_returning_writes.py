@@ -0,0 +1,99 @@
+"""Single-statement UPDATE/DELETE ... RETURNING in the repositories"""
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+
+from models.task import TaskCreate
+from models.user import UserCreate
+
+
+@pytest.fixture
+def statements(database):
+    """SQL statements the primary engine runs during the test"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    event.listen(database, "before_cursor_execute", record)
+    yield executed
+    event.remove(database, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def tasks(database):
+    from config.database import SessionLocal
+    from repos.task_repository import TaskRepository
+
+    with SessionLocal() as db:
+        yield TaskRepository(db)
+
+
+@pytest.fixture
+def other_project(project, database):
+    with database.begin() as connection:
+        return connection.execute(text(
+            "INSERT INTO projects (nombre, user_id, created_at) VALUES ('other', :user_id, now()) RETURNING id"
+        ), {"user_id": project[0]}).scalar_one()
+
+
+def test_task_update_moves_it_in_one_statement_and_returns_the_old_project(project, other_project, tasks, statements):
+    task = tasks.create(TaskCreate(detalle="before", project_id=project[1]))
+    statements.clear()
+
+    updated, previous_project_id = tasks.update(task.id, TaskCreate(detalle="after", project_id=other_project))
+
+    assert (updated.detalle, updated.project_id, previous_project_id) == ("after", other_project, project[1])
+    assert statements == ["WITH"]  # WITH previous AS (SELECT ... FOR UPDATE) UPDATE ... RETURNING
+
+
+def test_missing_rows_are_reported_without_a_read(tasks, statements):
+    assert tasks.update(-1, TaskCreate(detalle="x", project_id=1)) is None
+    assert tasks.mark_completed(-1) is None
+    assert tasks.delete(-1) is None
+    assert "SELECT" not in statements
+
+
+def test_task_complete_and_delete_return_the_row(project, tasks):
+    task = tasks.create(TaskCreate(detalle="t", project_id=project[1]))
+
+    assert tasks.mark_completed(task.id).completed
+    assert tasks.delete(task.id) == project[1]
+    assert tasks.get_by_id(task.id) is None
+
+
+def test_async_task_writes_match_the_sync_ones(project, other_project, tasks, run_async):
+    from config.database import AsyncSessionLocal
+    from repos.task_repository import AsyncTaskRepository
+
+    task = tasks.create(TaskCreate(detalle="before", project_id=project[1]))
+
+    async def write():
+        async with AsyncSessionLocal() as db:
+            repository = AsyncTaskRepository(db)
+            moved = await repository.update(task.id, TaskCreate(detalle="after", project_id=other_project))
+            completed = await repository.mark_completed(task.id)
+            return moved, completed, await repository.delete(task.id), await repository.delete(task.id)
+
+    (moved, previous_project_id), completed, deleted, again = run_async(write())
+
+    assert (moved.project_id, previous_project_id) == (other_project, project[1])
+    assert completed.completed
+    assert (deleted, again) == (other_project, None)
+
+
+def test_user_update_and_delete(database):
+    from config.database import SessionLocal
+    from repos.user_repository import UserRepository
+
+    with SessionLocal() as db:
+        users = UserRepository(db)
+        user = users.create(UserCreate(nombre=f"test_{uuid.uuid4().hex}", password="secret"))
+        renamed = f"test_{uuid.uuid4().hex}"
+
+        updated = users.update(user.id, UserCreate(nombre=renamed, password=""))
+
+        assert (updated.nombre, updated.password_hash) == (renamed, user.password_hash)
+        assert users.delete(user.id) and not users.delete(user.id)
+        assert users.update(user.id, UserCreate(nombre=renamed, password="")) is None
@@ -0,0 +1,146 @@
+"""Search: query building, ranked keyset pages and their cursor (services/search_service.py, repos/search_repository.py)"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from api.pagination import decode_search_cursor, encode_search_cursor, search_request
+from models.search import SearchHit, SearchRequest
+from services.search_service import SearchService
+
+
+def test_free_text_becomes_a_safe_tsquery():
+    assert SearchService.to_tsquery("Comprar  LECHE") == "comprar & leche:*"
+    assert SearchService.to_tsquery("a & !(b | c:*)") == "a & b & c"
+    assert SearchService.to_tsquery("año nuevo", prefix=False) == "año & nuevo"
+    assert SearchService.to_tsquery(" ".join(f"w{n}" for n in range(20))).count("&") == SearchService.MAX_TERMS - 1
+    assert SearchService.to_tsquery("&|!:*()") is None
+
+
+def test_nothing_to_search_skips_the_database():
+    assert SearchService(None).search(7, SearchRequest(q="¿?")).items == []
+
+
+def _hit(id, rank):
+    return SearchHit(kind="task", id=id, project_id=1, text="t", headline="t", rank=rank)
+
+
+def test_extra_hit_only_signals_a_next_page():
+    hits = [_hit(n, 1 - n / 10) for n in range(3)]
+
+    assert SearchService.to_page(hits[:2], 2).next_cursor is None
+    page = SearchService.to_page(hits, 2)
+    assert [hit.id for hit in page.items] == [0, 1]
+    assert page.next_cursor == (0.9, "task", 1)
+
+
+def test_search_cursor_round_trips_the_rank_exactly():
+    cursor = (0.1 + 0.2, "project", 42)
+
+    assert decode_search_cursor(encode_search_cursor(cursor)) == cursor
+
+
+def test_malformed_search_cursor_is_a_400():
+    with pytest.raises(HTTPException) as error:
+        search_request(q="x", limit=20, after="not a cursor", prefix=True)
+
+    assert error.value.status_code == 400
+
+
+@pytest.fixture
+def stranger(database):
+    """Project of another user, to be kept out of the test user's results"""
+    with database.begin() as connection:
+        user_id = connection.execute(text(
+            "INSERT INTO users (nombre, password_hash, created_at) VALUES ('test_' || gen_random_uuid(), 'x', now()) RETURNING id"
+        )).scalar_one()
+        connection.execute(text(
+            "INSERT INTO projects (nombre, description, user_id, created_at) VALUES ('zumbalorio ajeno', '', :id, now())"
+        ), {"id": user_id})
+    yield
+    with database.begin() as connection:
+        connection.execute(text("DELETE FROM projects WHERE user_id = :id"), {"id": user_id})
+        connection.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+
+@pytest.fixture
+def searchable(project, stranger, database):
+    """The test user's project, described with the searched word, and five equally ranked tasks"""
+    user_id, project_id = project
+    with database.begin() as connection:
+        connection.execute(text("UPDATE projects SET description = 'todo sobre el zumbalorio' WHERE id = :id"), {"id": project_id})
+        connection.execute(text(
+            "INSERT INTO tasks (detalle, project_id, completed, created_at) "
+            "SELECT 'limpiar el zumbalorio ' || n, :id, false, now() FROM generate_series(1, 5) AS n"
+        ), {"id": project_id})
+        connection.execute(text(
+            "INSERT INTO tasks (detalle, project_id, completed, created_at) VALUES ('otra cosa', :id, false, now())"
+        ), {"id": project_id})
+    return user_id, project_id
+
+
+def _search(user_id, request):
+    from config.database import SessionLocal
+
+    with SessionLocal() as db:
+        return SearchService(db).search(user_id, request)
+
+
+def test_search_finds_only_the_users_matches(searchable):
+    user_id, project_id = searchable
+
+    hits = _search(user_id, SearchRequest(q="zumbalorio", limit=20)).items
+
+    assert sorted(hit.kind for hit in hits) == ["project"] + ["task"] * 5
+    assert {hit.project_id for hit in hits} == {project_id}
+    assert all("<mark>" in hit.headline for hit in hits)
+    assert [hit.rank for hit in hits] == sorted((hit.rank for hit in hits), reverse=True)
+    project_hit = next(hit for hit in hits if hit.kind == "project")
+    assert (project_hit.id, project_hit.text) == (project_id, "test")
+
+
+def test_last_word_matches_as_a_prefix(searchable):
+    user_id, _ = searchable
+
+    assert len(_search(user_id, SearchRequest(q="limpiar zumbal")).items) == 5
+    assert _search(user_id, SearchRequest(q="limpiar zumbal", prefix=False)).items == []
+
+
+def test_pages_walk_every_hit_once(searchable):
+    user_id, _ = searchable
+    seen, after = [], None
+
+    while True:
+        page = _search(user_id, SearchRequest(q="zumbalorio", limit=2, after=after))
+        seen += [(hit.kind, hit.id) for hit in page.items]
+        if page.next_cursor is None:
+            break
+        # The cursor as the client sends it back
+        after = decode_search_cursor(encode_search_cursor(page.next_cursor))
+
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_async_search_matches_sync(searchable, run_async):
+    from config.database import AsyncSessionLocal
+    from services.search_service import AsyncSearchService
+
+    user_id, _ = searchable
+
+    async def search(after=None):
+        async with AsyncSessionLocal() as db:
+            return await AsyncSearchService(db).search(user_id, SearchRequest(q="zumbalorio", limit=3, after=after))
+
+    async def both_pages():
+        first = await search()
+        return first, await search(first.next_cursor)
+
+    first, second = run_async(both_pages())
+
+    # asyncpg reads the real ranks at full float precision, psycopg2 as their shortest decimal
+    assert _ids(first) == _ids(_search(user_id, SearchRequest(q="zumbalorio", limit=3)))
+    assert _ids(second) == _ids(_search(user_id, SearchRequest(q="zumbalorio", limit=3, after=first.next_cursor)))
+    assert len(set(_ids(first) + _ids(second))) == 6
+
+
+def _ids(page):
+    return [(hit.kind, hit.id) for hit in page.items]
@@ -0,0 +1,128 @@
+"""Boot sequence: background start, retries, degraded warm-ups and the readiness report (config/startup.py)"""
+import asyncio
+
+import pytest
+
+from config import startup
+from config.startup import STEPS, Readiness
+
+
+@pytest.fixture
+def boot(monkeypatch):
+    """Database and pool steps replaced by recorded no-ops; every asyncio.sleep is a bare yield, so retries do not wait"""
+    calls = []
+    monkeypatch.setattr(startup, "init_db", lambda: calls.append("init_db"))
+    monkeypatch.setattr(startup, "warm_pool", lambda: calls.append("warm_pool"))
+
+    async def warm_async_pool():
+        calls.append("warm_async_pool")
+
+    monkeypatch.setattr(startup, "warm_async_pool", warm_async_pool)
+    sleep = asyncio.sleep
+    monkeypatch.setattr(startup.asyncio, "sleep", lambda delay: sleep(0))
+    return calls
+
+
+async def _until_done(readiness):
+    await asyncio.wait_for(asyncio.shield(readiness._task), 5)
+    return readiness.snapshot()
+
+
+def test_background_start_reports_ready_once_every_step_ran(boot):
+    readiness = Readiness()
+
+    async def boot_up():
+        await readiness.start("sync")
+        before = readiness.snapshot()
+        return before, await _until_done(readiness)
+
+    before, after = asyncio.run(boot_up())
+
+    assert not before["ready"]
+    assert after["ready"]
+    assert list(after["steps"]) == list(STEPS)
+    assert all(seconds is not None for seconds in after["steps"].values())
+    assert boot == ["init_db", "warm_pool"]
+
+
+def test_foreground_start_is_ready_when_it_returns(boot, monkeypatch):
+    monkeypatch.setattr(startup, "STARTUP_BACKGROUND", False)
+    readiness = Readiness()
+
+    asyncio.run(readiness.start("async"))
+
+    assert readiness.ready
+    assert boot == ["init_db", "warm_async_pool"]
+
+
+def test_database_is_retried_until_it_answers(boot, monkeypatch):
+    attempts = []
+
+    def init_db():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("connection refused")
+
+    monkeypatch.setattr(startup, "init_db", init_db)
+    readiness = Readiness()
+
+    async def boot_up():
+        await readiness.start("sync")
+        return await _until_done(readiness)
+
+    assert asyncio.run(boot_up())["ready"]
+    assert len(attempts) == 3
+
+
+def test_failed_warm_ups_still_end_ready(boot, monkeypatch, redis_down):
+    def warm_pool():
+        raise OSError("too many connections")
+
+    monkeypatch.setattr(startup, "warm_pool", warm_pool)
+    readiness = Readiness()
+
+    async def boot_up():
+        await readiness.start("sync")
+        return await _until_done(readiness)
+
+    assert asyncio.run(boot_up())["ready"]
+
+
+def test_crashed_startup_is_reported_and_stays_not_ready(boot, monkeypatch, capsys):
+    async def broken(api_mode):
+        raise ValueError("bad config")
+
+    monkeypatch.setattr(Readiness, "_warm_redis", staticmethod(broken))
+    readiness = Readiness()
+
+    async def boot_up():
+        await readiness.start("sync")
+        with pytest.raises(ValueError):
+            await _until_done(readiness)
+        await asyncio.sleep(0)  # done callbacks run on the next loop iteration
+
+    asyncio.run(boot_up())
+
+    assert not readiness.ready
+    assert readiness.snapshot()["steps"]["pools"] is not None
+    assert "Startup failed, not ready: ValueError('bad config')" in capsys.readouterr().out
+
+
+def test_stop_cancels_a_pending_start(boot, monkeypatch, capsys):
+    def init_db():
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(startup, "init_db", init_db)
+    readiness = Readiness()
+
+    async def boot_then_stop():
+        await readiness.start("sync")
+        for _ in range(10):
+            await asyncio.sleep(0)  # a few failed attempts
+        await readiness.stop()
+
+    asyncio.run(boot_then_stop())
+
+    assert not readiness.ready
+    assert readiness._task is None
+    assert "Startup failed" not in capsys.readouterr().out
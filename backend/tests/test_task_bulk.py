@@ -0,0 +1,88 @@
+"""Bulk task creation: temp_id validation and ordering, multi-row INSERT and COPY paths (repos/task_repository.py)"""
+import pytest
+from sqlalchemy import text
+
+from models.task import TaskBulkItem
+from repos.task_repository import TaskRepository
+from services.task_service import _bulk_result
+
+
+def _item(temp_id=None, parent=None, project_id=1, **fields):
+    return TaskBulkItem(detalle=temp_id or "task", project_id=project_id, temp_id=temp_id, parent_temp_id=parent, **fields)
+
+
+def test_levels_put_parents_before_children():
+    items = [_item("c", parent="b"), _item("b", parent="a"), _item("a"), _item()]
+
+    assert TaskRepository.bulk_levels(items) == [[2, 3], [1], [0]]
+
+
+@pytest.mark.parametrize("items, message", [
+    ([_item("a"), _item("a")], "duplicado"),
+    ([_item("a", parent="x")], "desconocido"),
+    ([_item("a", parent="b"), _item("b", parent="a")], "Ciclo"),
+    ([_item("a"), _item("b", parent="a", parent_task_id=5)], "excluyentes"),
+])
+def test_invalid_batches_are_rejected(items, message):
+    with pytest.raises(ValueError, match=message):
+        TaskRepository.bulk_levels(items)
+
+
+def test_result_maps_temp_ids_to_new_ids():
+    result = _bulk_result([_item("a"), _item(), _item("b")], [10, 11, 12])
+
+    assert result.ids == [10, 11, 12]
+    assert result.temp_ids == {"a": 10, "b": 12}
+
+
+def _batch(project_id):
+    return [_item("child", parent="root", project_id=project_id), _item("root", project_id=project_id),
+            _item("grandchild", parent="child", project_id=project_id)]
+
+
+def _parents(database, ids):
+    with database.connect() as connection:
+        rows = connection.execute(text("SELECT id, parent_task_id FROM tasks WHERE id = ANY(:ids)"), {"ids": ids})
+        return dict(rows.all())
+
+
+@pytest.mark.parametrize("copy_threshold", [1000, 1])
+def test_batch_is_created_linked_and_in_input_order(project, database, monkeypatch, copy_threshold):
+    from config.database import SessionLocal
+
+    monkeypatch.setattr(TaskRepository, "BULK_COPY_THRESHOLD", copy_threshold)
+    with SessionLocal() as db:
+        child, root, grandchild = TaskRepository(db).create_many(_batch(project[1]))
+
+    assert _parents(database, [child, root, grandchild]) == {root: None, child: root, grandchild: child}
+
+
+@pytest.mark.parametrize("copy_threshold", [1000, 1])
+def test_async_batch_is_created_linked_and_in_input_order(project, database, run_async, monkeypatch, copy_threshold):
+    from config.database import AsyncSessionLocal
+    from repos.task_repository import AsyncTaskRepository
+
+    monkeypatch.setattr(TaskRepository, "BULK_COPY_THRESHOLD", copy_threshold)
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            return await AsyncTaskRepository(db).create_many(_batch(project[1]))
+
+    child, root, grandchild = run_async(create())
+
+    assert _parents(database, [child, root, grandchild]) == {root: None, child: root, grandchild: child}
+
+
+@pytest.mark.parametrize("copy_threshold", [1000, 1])
+def test_unknown_references_roll_the_whole_batch_back(project, database, monkeypatch, copy_threshold):
+    from config.database import SessionLocal
+    from services.task_service import TaskService
+
+    monkeypatch.setattr(TaskRepository, "BULK_COPY_THRESHOLD", copy_threshold)
+    items = [_item("ok", project_id=project[1]), _item("bad", project_id=-1)]
+    with SessionLocal() as db, pytest.raises(ValueError, match="inexistente"):
+        TaskService(db).create_tasks_bulk(items)
+
+    with database.connect() as connection:
+        count = connection.execute(text("SELECT count(*) FROM tasks WHERE project_id = :id"), {"id": project[1]}).scalar()
+    assert count == 0
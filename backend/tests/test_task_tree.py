@@ -0,0 +1,87 @@
+"""Task trees: the recursive CTE (repos/task_repository.py) and the nesting of its rows (services/task_service.py)"""
+import pytest
+from sqlalchemy import text
+
+from models.task import TaskCreate, TaskNode
+from services.task_service import _nest
+
+
+def _node(id, parent=None, depth=0):
+    return TaskNode(id=id, detalle=f"task {id}", project_id=1, parent_task_id=parent, depth=depth)
+
+
+def test_nest_links_depth_first_rows():
+    roots = _nest([_node(1), _node(2, 1, 1), _node(3, 2, 2), _node(4, 1, 1), _node(5)])
+
+    assert [root.id for root in roots] == [1, 5]
+    assert [child.id for child in roots[0].children] == [2, 4]
+    assert [child.id for child in roots[0].children[0].children] == [3]
+
+
+def test_nest_keeps_a_subtree_root_with_a_parent_as_root():
+    roots = _nest([_node(2, 1, 0), _node(3, 2, 1)])
+
+    assert [root.id for root in roots] == [2]
+    assert roots[0].children[0].id == 3
+
+
+@pytest.fixture
+def tree(project, database):
+    """1 -> (2 -> 3, 4) in the test project, plus a second root 5"""
+    from config.database import SessionLocal
+    from repos.task_repository import TaskRepository
+
+    _, project_id = project
+    with SessionLocal() as db:
+        repository = TaskRepository(db)
+        one = repository.create(TaskCreate(detalle="1", project_id=project_id))
+        two = repository.create(TaskCreate(detalle="2", project_id=project_id, parent_task_id=one.id))
+        three = repository.create(TaskCreate(detalle="3", project_id=project_id, parent_task_id=two.id))
+        four = repository.create(TaskCreate(detalle="4", project_id=project_id, parent_task_id=one.id))
+        five = repository.create(TaskCreate(detalle="5", project_id=project_id))
+    return project_id, [one.id, two.id, three.id, four.id, five.id]
+
+
+@pytest.fixture
+def repository(database):
+    from config.database import SessionLocal
+    from repos.task_repository import TaskRepository
+
+    with SessionLocal() as db:
+        yield TaskRepository(db)
+
+
+def test_tree_rows_are_depth_first_with_depths_and_counts(tree, repository):
+    _, (one, two, three, four, _) = tree
+
+    rows = repository.get_tree(one)
+
+    assert [(row.id, row.depth, row.descendant_count) for row in rows] == [
+        (one, 0, 3), (two, 1, 1), (three, 2, 0), (four, 1, 0)
+    ]
+
+
+def test_max_depth_cuts_rows_but_not_counts(tree, repository):
+    _, (one, two, _, four, _) = tree
+
+    rows = repository.get_tree(one, max_depth=1)
+
+    assert [(row.id, row.descendant_count) for row in rows] == [(one, 3), (two, 1), (four, 0)]
+
+
+def test_project_tree_starts_at_every_root(tree, repository):
+    project_id, (one, _, _, _, five) = tree
+
+    rows = repository.get_project_tree(project_id)
+
+    assert [root.id for root in _nest(rows)] == [one, five]
+
+
+def test_cycles_are_cut(tree, repository, database):
+    _, (one, two, three, four, _) = tree
+    with database.begin() as connection:
+        connection.execute(text("UPDATE tasks SET parent_task_id = :child WHERE id = :id"), {"child": three, "id": one})
+
+    rows = repository.get_tree(one)
+
+    assert sorted(row.id for row in rows) == sorted([one, two, three, four])
@@ -0,0 +1,8 @@
+export type JobStatus = 'queued' | 'running' | 'done' | 'failed';
+
+export interface Job {
+  id: string;
+  status: JobStatus;
+  project_id?: number;
+  error?: string;
+}
@@ -1,4 +1,4 @@
-import type { Project, ProjectCreate } from '$lib/models';
+import type { Job, Project, ProjectCreate } from '$lib/models';
 import { getAuthToken } from './auth_service';
 
 // Resolve API base URL from Vite env at build time, fallback to localhost for local dev.
@@ -13,13 +13,26 @@ function getAuthHeaders(): HeadersInit {
 }
 
 export async function getProjects(): Promise<Project[]> {
+  const projects: Project[] = [];
+  let cursor: string | null = null;
+  // List endpoints are paginated: follow X-Next-Cursor until the last page
+  do {
+    const page = await getProjectsPage(cursor);
+    projects.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return projects;
+}
+
+async function getProjectsPage(cursor: string | null): Promise<{ items: Project[]; nextCursor: string | null }> {
+  const url = cursor ? `${API_BASE_URL}/projects?after=${encodeURIComponent(cursor)}` : `${API_BASE_URL}/projects`;
   let retry = 1;
   while (retry <= 6) {
-    const response = await fetch(`${API_BASE_URL}/projects`, {
+    const response = await fetch(url, {
       headers: getAuthHeaders(),
     });
     if (response.ok) {
-      return response.json();
+      return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
     }
     // wait and then retry
     await new Promise((resolve) => setTimeout(resolve, retry * 1000));
@@ -47,5 +60,24 @@ export async function createProject(project: ProjectCreate, userId: number): Pro
   if (!response.ok) {
     throw new Error(`Failed to create project: ${response.statusText}`);
   }
-  return response.json();
+  // Creation is queued: wait for the job instead of polling the project list
+  const job = await waitForJob(await response.json());
+  if (job.status === 'failed' || job.project_id === undefined) {
+    throw new Error(job.error ?? 'Failed to create project');
+  }
+  return getProject(job.project_id);
+}
+
+async function waitForJob(job: Job): Promise<Job> {
+  while (job.status !== 'done' && job.status !== 'failed') {
+    // Long-poll: the server answers as soon as the job finishes (or after `wait` seconds)
+    const response = await fetch(`${API_BASE_URL}/jobs/${job.id}?wait=25`, {
+      headers: getAuthHeaders(),
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to fetch job: ${response.statusText}`);
+    }
+    job = await response.json();
+  }
+  return job;
 }
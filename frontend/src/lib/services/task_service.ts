@@ -13,13 +13,23 @@ function getAuthHeaders(): HeadersInit {
 }
 
 export async function getTasks(projectId: number): Promise<Task[]> {
-  const response = await fetch(`${API_BASE_URL}/tasks/project/${projectId}`, {
-    headers: getAuthHeaders(),
-  });
-  if (!response.ok) {
-    throw new Error(`Failed to fetch tasks: ${response.statusText}`);
-  }
-  return response.json();
+  const tasks: Task[] = [];
+  let cursor: string | null = null;
+  // List endpoints are paginated: follow X-Next-Cursor until the last page
+  do {
+    const url = cursor
+      ? `${API_BASE_URL}/tasks/project/${projectId}?after=${encodeURIComponent(cursor)}`
+      : `${API_BASE_URL}/tasks/project/${projectId}`;
+    const response = await fetch(url, {
+      headers: getAuthHeaders(),
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to fetch tasks: ${response.statusText}`);
+    }
+    tasks.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return tasks;
 }
 
 export async function createTask(task: TaskCreate): Promise<Task> {